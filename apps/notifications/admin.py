@@ -1,11 +1,12 @@
 from django.contrib import admin
 from django.urls import path, reverse
-from django.utils import timezone
-from fcm_django.models import FCMDevice
-from .models import NotificationHistory
+from .counters import ACTIVE_DEVICES, TOTAL_NOTIFICATIONS, get_counters, sent_key
+from .models import NotificationDailyRollup, NotificationHistory
 from .admin_views import (
     send_notification_view,
     notification_history_view,
+    notification_history_json_view,
+    user_search_view,
     GetUserDevicesView,
 )
 
@@ -22,6 +23,8 @@ class NotificationHistoryAdmin(admin.ModelAdmin):
         "target_display",
         "sent_by",
         "devices_count",
+        "success_count",
+        "failure_count",
         "status_display",
         "created_at",
     ]
@@ -30,10 +33,18 @@ class NotificationHistoryAdmin(admin.ModelAdmin):
     readonly_fields = [
         "sent_by",
         "devices_count",
+        "success_count",
+        "failure_count",
+        "pruned_count",
         "status",
         "error_message",
         "created_at",
+        "started_at",
+        "finished_at",
+        "last_device_id",
+        "checkpoint_at",
         "data_payload",
+        "segment",
     ]
     ordering = ["-created_at"]
 
@@ -54,6 +65,8 @@ class NotificationHistoryAdmin(admin.ModelAdmin):
             return f"👤 {obj.target_user.username}"
         elif obj.notification_type == "broadcast":
             return "📢 Todos los usuarios"
+        elif obj.notification_type == "segment":
+            return "🎯 Segmento"
         return "❓ No especificado"
 
     target_display.short_description = "Destinatario"
@@ -81,6 +94,33 @@ class NotificationAdminSite(admin.AdminSite):
 notification_admin_site = NotificationAdminSite(name="notification_admin")
 
 
+@admin.register(NotificationDailyRollup)
+class NotificationDailyRollupAdmin(admin.ModelAdmin):
+    """
+    Resúmenes diarios de envíos (solo lectura; se generan desde el historial)
+    """
+
+    list_display = [
+        "day",
+        "notification_type",
+        "status",
+        "sent_by",
+        "notifications",
+        "devices_count",
+        "success_count",
+        "failure_count",
+    ]
+    list_filter = ["notification_type", "status", "day"]
+    date_hierarchy = "day"
+    ordering = ["-day"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 class CustomNotificationAdmin:
     """
     Admin personalizado con vistas adicionales para notificaciones
@@ -102,6 +142,16 @@ class CustomNotificationAdmin:
                 self.admin_site.admin_view(notification_history_view),
                 name="notification_history",
             ),
+            path(
+                "notification-history/json/",
+                self.admin_site.admin_view(notification_history_json_view),
+                name="notification_history_json",
+            ),
+            path(
+                "ajax/user-search/",
+                self.admin_site.admin_view(user_search_view, cacheable=True),
+                name="ajax_user_search",
+            ),
             path(
                 "ajax/user-devices/",
                 GetUserDevicesView.as_view(),
@@ -116,18 +166,15 @@ class CustomNotificationAdmin:
         """
         extra_context = extra_context or {}
 
-        # Estadísticas rápidas
-        total_notifications = NotificationHistory.objects.count()
-        sent_today = NotificationHistory.objects.filter(
-            created_at__date=timezone.now().date(), status="sent"
-        ).count()
-        total_devices = FCMDevice.objects.filter(active=True).count()
+        # Contadores precalculados (ver counters.py), una sola consulta
+        today = sent_key()
+        values = get_counters(TOTAL_NOTIFICATIONS, ACTIVE_DEVICES, today)
 
         extra_context.update(
             {
-                "total_notifications": total_notifications,
-                "sent_today": sent_today,
-                "total_devices": total_devices,
+                "total_notifications": values[TOTAL_NOTIFICATIONS],
+                "sent_today": values[today],
+                "total_devices": values[ACTIVE_DEVICES],
                 "send_notification_url": reverse("admin:send_notification"),
                 "notification_history_url": reverse("admin:notification_history"),
             }
@@ -163,6 +210,16 @@ class EnhancedNotificationHistoryAdmin(
                 self.admin_site.admin_view(notification_history_view),
                 name="notification_history",
             ),
+            path(
+                "notification-history/json/",
+                self.admin_site.admin_view(notification_history_json_view),
+                name="notification_history_json",
+            ),
+            path(
+                "ajax/user-search/",
+                self.admin_site.admin_view(user_search_view, cacheable=True),
+                name="ajax_user_search",
+            ),
             path(
                 "ajax/user-devices/",
                 GetUserDevicesView.as_view(),
@@ -2,38 +2,51 @@ from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import get_user_model
+from django.db.models import Q
 from django.http import JsonResponse
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import urlencode, urlsafe_base64_decode, urlsafe_base64_encode
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.views import View
 from fcm_django.models import FCMDevice
-from firebase_admin.messaging import Message, Notification
+from .counters import ACTIVE_DEVICES, USERS_WITH_DEVICES, get_counters
+from .jobs import enqueue_notification
 from .models import NotificationHistory
 import json
+from datetime import datetime, time, timedelta
 
 User = get_user_model()
 
+# Resultados del autocompletado de usuarios (por defecto y máximo)
+USER_SEARCH_LIMIT = 10
+USER_SEARCH_MAX_LIMIT = 25
+
+# Filas por página del historial detallado
+HISTORY_PAGE_SIZE = 50
+HISTORY_FILTERS = ('date_from', 'date_to', 'status', 'notification_type')
+
 
 @staff_member_required
 def send_notification_view(request):
     """
     Vista personalizada para enviar notificaciones desde el admin
     """
-    users = User.objects.all().order_by('username')
     recent_notifications = NotificationHistory.objects.all()[:10]
     
-    # Estadísticas
-    total_devices = FCMDevice.objects.filter(active=True).count()
-    total_users_with_devices = FCMDevice.objects.filter(active=True).values('user').distinct().count()
+    # Contadores precalculados (una consulta por clave primaria)
+    values = get_counters(ACTIVE_DEVICES, USERS_WITH_DEVICES)
+    stats = {
+        'total_devices': values[ACTIVE_DEVICES],
+        'total_users_with_devices': values[USERS_WITH_DEVICES],
+    }
     
     context = {
         'title': 'Enviar Notificaciones Push',
-        'users': users,
         'recent_notifications': recent_notifications,
-        'stats': {
-            'total_devices': total_devices,
-            'total_users_with_devices': total_users_with_devices,
-        }
+        'stats': stats,
     }
     
     if request.method == 'POST':
@@ -44,6 +57,10 @@ def send_notification_view(request):
             body = request.POST.get('body', '').strip()
             target_user_id = request.POST.get('target_user')
             data_payload = {}
+
+            # Mantener el usuario elegido si el formulario se vuelve a mostrar
+            if target_user_id and target_user_id.isdigit():
+                context['selected_user'] = User.objects.filter(id=target_user_id).first()
             
             # Validaciones
             if not title or not body:
@@ -63,69 +80,93 @@ def send_notification_view(request):
                     messages.error(request, 'Los datos personalizados deben ser JSON válido.')
                     return render(request, 'admin/notifications/send_notification.html', context)
             
-            # Crear registro en historial
-            notification_record = NotificationHistory.objects.create(
-                title=title,
-                body=body,
-                notification_type=notification_type,
-                target_user_id=target_user_id if target_user_id else None,
-                sent_by=request.user,
-                data_payload=data_payload
-            )
-            
-            # Determinar dispositivos objetivo
+            # Determinar destino
             if notification_type == 'broadcast':
-                target_devices = FCMDevice.objects.filter(active=True)
-                success_message = "Notificación broadcast enviada a todos los usuarios"
+                target_user = None
+                success_message = "Notificación broadcast encolada para todos los usuarios"
             elif notification_type == 'user' and target_user_id:
                 target_user = User.objects.get(id=target_user_id)
-                target_devices = FCMDevice.objects.filter(user=target_user, active=True)
-                success_message = f"Notificación enviada a {target_user.username}"
+                if not FCMDevice.objects.filter(user=target_user, active=True).exists():
+                    messages.error(request, 'No hay dispositivos activos para enviar la notificación.')
+                    return render(request, 'admin/notifications/send_notification.html', context)
+                success_message = f"Notificación encolada para {target_user.username}"
             else:
                 messages.error(request, 'Tipo de notificación inválido.')
                 return render(request, 'admin/notifications/send_notification.html', context)
-            
-            if not target_devices.exists():
-                notification_record.status = 'failed'
-                notification_record.error_message = 'No hay dispositivos activos para el objetivo seleccionado'
-                notification_record.save()
-                messages.error(request, 'No hay dispositivos activos para enviar la notificación.')
-                return render(request, 'admin/notifications/send_notification.html', context)
-            
-            # Crear mensaje Firebase
-            message = Message(
-                notification=Notification(
-                    title=title,
-                    body=body
-                ),
-                data=data_payload
+
+            # El worker (manage.py process_notifications) hace el envío
+            notification_record = enqueue_notification(
+                title, body, notification_type,
+                sent_by=request.user, target_user=target_user, data=data_payload
             )
-            
-            # Enviar notificación
-            target_devices.send_message(message)
-            
-            # Actualizar registro
-            notification_record.status = 'sent'
-            notification_record.devices_count = target_devices.count()
-            notification_record.save()
-            
-            messages.success(request, f'{success_message} ({target_devices.count()} dispositivos)')
+
+            messages.success(request, f'{success_message} (envío #{notification_record.id})')
             return redirect('admin:send_notification')
             
         except User.DoesNotExist:
             messages.error(request, 'Usuario seleccionado no existe.')
         except Exception as e:
-            # Actualizar registro con error
-            if 'notification_record' in locals():
-                notification_record.status = 'failed'
-                notification_record.error_message = str(e)
-                notification_record.save()
-            
             messages.error(request, f'Error enviando notificación: {str(e)}')
     
     return render(request, 'admin/notifications/send_notification.html', context)
 
 
+def user_search_label(user):
+    """Texto de una opción del autocompletado: ``usuario (Nombre Apellido)``"""
+    full_name = f'{user.first_name} {user.last_name}'.strip()
+    return f'{user.username} ({full_name})' if full_name else user.username
+
+
+def search_users(query, limit=USER_SEARCH_LIMIT):
+    """
+    Usuarios cuyo username, nombre o apellido empiezan por ``query``.
+
+    Solo busca por prefijo (``istartswith``), que en PostgreSQL se
+    resuelve con los índices ``user_*_prefix``. Con dos palabras busca
+    también "nombre apellido". Retorna como mucho ``limit`` usuarios.
+    """
+    words = query.split()
+    if not words:
+        return []
+    condition = (
+        Q(username__istartswith=query)
+        | Q(first_name__istartswith=query)
+        | Q(last_name__istartswith=query)
+    )
+    if len(words) == 2:
+        condition |= Q(first_name__istartswith=words[0], last_name__istartswith=words[1])
+    return list(
+        User.objects.filter(condition)
+        .order_by('username')
+        .only('id', 'username', 'first_name', 'last_name')[:limit]
+    )
+
+
+@staff_member_required
+def user_search_view(request):
+    """
+    Autocompletado de usuarios para el formulario de envío
+
+    ``GET ?q=<prefijo>&limit=<n>``. La respuesta es pequeña y cacheable
+    por unos segundos en el navegador, pensada para pedirse con debounce
+    mientras se escribe.
+    """
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = int(request.GET.get('limit', USER_SEARCH_LIMIT))
+    except ValueError:
+        limit = USER_SEARCH_LIMIT
+    limit = max(1, min(limit, USER_SEARCH_MAX_LIMIT))
+
+    results = [
+        {'id': user.id, 'username': user.username, 'label': user_search_label(user)}
+        for user in search_users(query, limit)
+    ]
+    response = JsonResponse({'results': results})
+    response['Cache-Control'] = 'private, max-age=30'
+    return response
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class GetUserDevicesView(View):
     """
@@ -144,7 +185,7 @@ class GetUserDevicesView(View):
                 return JsonResponse({'error': 'user_id requerido'}, status=400)
             
             user = User.objects.get(id=user_id)
-            devices = FCMDevice.objects.filter(user=user, active=True)
+            devices = FCMDevice.objects.filter(user=user, active=True).order_by('id')
             
             devices_data = []
             for device in devices:
@@ -158,7 +199,7 @@ class GetUserDevicesView(View):
             return JsonResponse({
                 'user': user.username,
                 'devices': devices_data,
-                'devices_count': devices.count()
+                'devices_count': len(devices_data)
             })
             
         except User.DoesNotExist:
@@ -169,16 +210,134 @@ class GetUserDevicesView(View):
             return JsonResponse({'error': str(e)}, status=500)
 
 
+def encode_history_cursor(notification):
+    """Cursor opaco con la posición ``(created_at, id)`` de una fila"""
+    value = f'{notification.created_at.isoformat()}|{notification.id}'
+    return urlsafe_base64_encode(value.encode())
+
+
+def decode_history_cursor(cursor):
+    """Retorna ``(created_at, id)`` o ``None`` si el cursor no es válido"""
+    try:
+        created_at, pk = urlsafe_base64_decode(cursor).decode().split('|')
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        return None
+    if created_at is None:
+        return None
+    return created_at, pk
+
+
+def parse_history_filters(params):
+    """
+    Filtros válidos del historial a partir de los parámetros GET.
+
+    Los valores desconocidos o mal formados se ignoran, igual que hace
+    el changelist del admin.
+    """
+    filters = {}
+    for field in ('date_from', 'date_to'):
+        value = parse_date(params.get(field, ''))
+        if value:
+            filters[field] = value
+    if params.get('status') in dict(NotificationHistory.STATUS_CHOICES):
+        filters['status'] = params['status']
+    if params.get('notification_type') in dict(NotificationHistory.NOTIFICATION_TYPES):
+        filters['notification_type'] = params['notification_type']
+    return filters
+
+
+def history_page(params, page_size=HISTORY_PAGE_SIZE):
+    """
+    Una página del historial filtrado, paginado por keyset.
+
+    Ordena por ``(created_at, id)`` descendente y continúa desde el
+    cursor con ``WHERE (created_at, id) < cursor``, así que cada página
+    cuesta lo mismo sin importar cuántas notificaciones haya ni cuántas
+    páginas se hayan recorrido (sin COUNT ni OFFSET). Se pide una fila
+    extra para saber si hay más páginas.
+
+    Retorna ``(notificaciones, filtros, siguiente_cursor)``.
+    """
+    filters = parse_history_filters(params)
+    queryset = NotificationHistory.objects.select_related('sent_by', 'target_user')
+
+    tz = timezone.get_current_timezone()
+    if 'date_from' in filters:
+        desde = datetime.combine(filters['date_from'], time.min, tzinfo=tz)
+        queryset = queryset.filter(created_at__gte=desde)
+    if 'date_to' in filters:
+        hasta = datetime.combine(filters['date_to'] + timedelta(days=1), time.min, tzinfo=tz)
+        queryset = queryset.filter(created_at__lt=hasta)
+    if 'status' in filters:
+        queryset = queryset.filter(status=filters['status'])
+    if 'notification_type' in filters:
+        queryset = queryset.filter(notification_type=filters['notification_type'])
+
+    position = decode_history_cursor(params.get('cursor', ''))
+    if position:
+        created_at, pk = position
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+
+    notifications = list(queryset.order_by('-created_at', '-id')[:page_size + 1])
+    next_cursor = None
+    if len(notifications) > page_size:
+        notifications = notifications[:page_size]
+        next_cursor = encode_history_cursor(notifications[-1])
+    return notifications, filters, next_cursor
+
+
+def history_query_string(filters, cursor=None):
+    """Parámetros GET de una página del historial (filtros + cursor)"""
+    params = {field: str(filters[field]) for field in HISTORY_FILTERS if field in filters}
+    if cursor:
+        params['cursor'] = cursor
+    return urlencode(params)
+
+
 @staff_member_required
 def notification_history_view(request):
     """
     Vista para mostrar el historial detallado de notificaciones
+
+    Muestra una página a la vez (ver ``history_page``); el template
+    carga las siguientes desde ``notification_history_json`` al hacer
+    scroll, o con el enlace "Cargar más" sin JavaScript.
     """
-    notifications = NotificationHistory.objects.select_related('sent_by', 'target_user').all()
-    
+    notifications, filters, next_cursor = history_page(request.GET)
+
     context = {
         'title': 'Historial de Notificaciones',
         'notifications': notifications,
+        'filters': filters,
+        'status_choices': NotificationHistory.STATUS_CHOICES,
+        'type_choices': NotificationHistory.NOTIFICATION_TYPES,
+        'next_query': history_query_string(filters, next_cursor) if next_cursor else '',
+        'filters_query': history_query_string(filters),
     }
-    
+
     return render(request, 'admin/notifications/history.html', context)
+
+
+@staff_member_required
+def notification_history_json_view(request):
+    """
+    Página del historial en JSON para el scroll infinito
+
+    ``html`` trae las filas ya renderizadas con el mismo template de la
+    vista; ``next`` es el cursor de la página siguiente o ``null``.
+    """
+    notifications, filters, next_cursor = history_page(request.GET)
+    html = render_to_string(
+        'admin/notifications/history_rows.html',
+        {'notifications': notifications},
+        request=request,
+    )
+    return JsonResponse({
+        'html': html,
+        'count': len(notifications),
+        'next': next_cursor,
+    })
@@ -0,0 +1,203 @@
+import logging
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from fcm_django.models import FCMDevice
+
+from .models import NotificationCounter, NotificationHistory
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_DEVICES = 'active_devices'
+USERS_WITH_DEVICES = 'users_with_devices'
+TOTAL_NOTIFICATIONS = 'total_notifications'
+SENT_PREFIX = 'sent:'
+
+
+def sent_key(day=None):
+    """Clave del contador de notificaciones enviadas creadas en ``day``"""
+    return f'{SENT_PREFIX}{(day or timezone.localdate()).isoformat()}'
+
+
+def increment(key, delta=1):
+    """
+    Suma ``delta`` al contador con un ``UPDATE ... SET value = value + n``.
+
+    La suma la hace la base de datos, así que no hay carreras entre
+    procesos; si la clave aún no existe se crea.
+    """
+    if not delta:
+        return
+    updated = NotificationCounter.objects.filter(key=key).update(
+        value=F('value') + delta, updated_at=timezone.now()
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            NotificationCounter.objects.create(key=key, value=delta)
+    except IntegrityError:
+        # Otro proceso la creó entre el UPDATE y el INSERT
+        NotificationCounter.objects.filter(key=key).update(
+            value=F('value') + delta, updated_at=timezone.now()
+        )
+
+
+def get_counters(*keys):
+    """Valores de ``keys`` en una sola consulta (0 si no existen)"""
+    values = dict(
+        NotificationCounter.objects.filter(key__in=keys).values_list('key', 'value')
+    )
+    return {key: values.get(key, 0) for key in keys}
+
+
+def _has_other_active_device(user_id, exclude_id):
+    return (
+        FCMDevice.objects.filter(user_id=user_id, active=True)
+        .exclude(id=exclude_id)
+        .exists()
+    )
+
+
+def device_changed(device_id, old_state, new_state):
+    """
+    Actualiza los contadores de dispositivos tras guardar o eliminar uno.
+
+    Los estados son ``(user_id, active)``; ``old_state`` es ``None`` en
+    las altas (las bajas van por ``device_deleted``). Un usuario cuenta mientras
+    tenga al menos un dispositivo activo, así que solo cambia al pasar de
+    cero a uno o de uno a cero.
+
+    Solo se llama desde las señales de modelo: los ``update()`` de
+    queryset (por ejemplo las acciones de admin de fcm-django para
+    activar o desactivar dispositivos) no las disparan y dejan los
+    contadores desviados hasta ``manage.py rebuild_notification_counters``.
+    """
+    old_user, old_active = old_state or (None, False)
+    new_user, new_active = new_state or (None, False)
+
+    increment(ACTIVE_DEVICES, int(new_active) - int(old_active))
+
+    old_counts = old_active and old_user is not None
+    new_counts = new_active and new_user is not None
+    if old_counts and new_counts and old_user == new_user:
+        return
+    if old_counts and not _has_other_active_device(old_user, device_id):
+        increment(USERS_WITH_DEVICES, -1)
+    if new_counts and not _has_other_active_device(new_user, device_id):
+        increment(USERS_WITH_DEVICES, 1)
+
+
+def device_deleted(device_id, state, origin=None):
+    """
+    Descuenta un dispositivo eliminado.
+
+    Al borrar un queryset, ``post_delete`` llega por cada fila cuando
+    todas ya se borraron: sin más, un usuario que pierde varios
+    dispositivos a la vez se descontaría varias veces. Los usuarios ya
+    descontados se recuerdan en ``origin`` (el queryset o la instancia
+    que inició el borrado).
+    """
+    user_id, active = state or (None, False)
+    if not active:
+        return
+    increment(ACTIVE_DEVICES, -1)
+    if user_id is None:
+        return
+    counted = getattr(origin, '_counter_users', None)
+    if counted is None:
+        counted = set()
+        if origin is not None:
+            origin._counter_users = counted
+    if user_id in counted or _has_other_active_device(user_id, device_id):
+        return
+    counted.add(user_id)
+    increment(USERS_WITH_DEVICES, -1)
+
+
+def bulk_deactivate(devices):
+    """
+    Desactiva ``devices`` con un solo ``update()`` y ajusta los contadores.
+
+    ``update()`` no dispara señales, así que los usuarios que se quedan
+    sin dispositivos activos se calculan antes y después del cambio.
+    Retorna cuántos dispositivos se desactivaron.
+    """
+    devices = devices.filter(active=True)
+    user_ids = set(
+        devices.exclude(user_id=None).values_list('user_id', flat=True).distinct()
+    )
+    deactivated = devices.update(active=False)
+    increment(ACTIVE_DEVICES, -deactivated)
+    if user_ids:
+        still_active = set(
+            FCMDevice.objects.filter(user_id__in=user_ids, active=True)
+            .values_list('user_id', flat=True)
+            .distinct()
+        )
+        increment(USERS_WITH_DEVICES, -len(user_ids - still_active))
+    return deactivated
+
+
+def notification_changed(notification, old_status, deleted=False):
+    """
+    Actualiza el total y los enviados por día tras guardar o eliminar
+    una notificación. ``old_status`` es ``None`` en las altas.
+    """
+    day = timezone.localdate(notification.created_at)
+    if deleted:
+        increment(TOTAL_NOTIFICATIONS, -1)
+        if notification.status == 'sent':
+            increment(sent_key(day), -1)
+        return
+    if old_status is None:
+        increment(TOTAL_NOTIFICATIONS, 1)
+    was_sent = old_status == 'sent'
+    is_sent = notification.status == 'sent'
+    if was_sent != is_sent:
+        increment(sent_key(day), 1 if is_sent else -1)
+
+
+def rebuild_device_counters():
+    """Recalcula los contadores de dispositivos con dos COUNT"""
+    totals = FCMDevice.objects.filter(active=True).aggregate(
+        active_devices=Count('id'),
+        users_with_devices=Count('user', distinct=True),
+    )
+    for key in (ACTIVE_DEVICES, USERS_WITH_DEVICES):
+        NotificationCounter.objects.update_or_create(key=key, defaults={'value': totals[key]})
+    return totals
+
+
+@transaction.atomic
+def rebuild_counters():
+    """
+    Recalcula todos los contadores desde las tablas de origen.
+
+    Corrige cualquier desvío (cambios hechos con ``update()`` o SQL
+    directo, que no disparan señales). Retorna los valores nuevos.
+    """
+    counters = rebuild_device_counters()
+
+    total = NotificationHistory.objects.count()
+    NotificationCounter.objects.update_or_create(
+        key=TOTAL_NOTIFICATIONS, defaults={'value': total}
+    )
+    counters[TOTAL_NOTIFICATIONS] = total
+
+    NotificationCounter.objects.filter(key__startswith=SENT_PREFIX).delete()
+    sent_per_day = (
+        NotificationHistory.objects.filter(status='sent')
+        .annotate(day=TruncDate('created_at', tzinfo=timezone.get_current_timezone()))
+        .values('day')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    NotificationCounter.objects.bulk_create([
+        NotificationCounter(key=sent_key(row['day']), value=row['total'])
+        for row in sent_per_day
+    ])
+    counters['sent_days'] = len(sent_per_day)
+    return counters
@@ -0,0 +1,293 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from fcm_django.models import FCMDevice
+from fcm_django.settings import FCM_DJANGO_SETTINGS
+from firebase_admin import exceptions, messaging
+
+from .counters import bulk_deactivate
+
+logger = logging.getLogger(__name__)
+
+# Límite de tokens por llamada multicast de FCM
+MAX_BATCH_SIZE = 500
+
+# Segundos entre latidos por defecto (ver ``fan_out``)
+HEARTBEAT_INTERVAL = 10
+
+# Errores de FCM que indican que el token ya no sirve
+INVALID_TOKEN_ERRORS = (messaging.UnregisteredError, messaging.SenderIdMismatchError)
+
+
+class FanOutResult:
+    """
+    Resultado estructurado de un envío por lotes
+
+    ``devices_count`` sale de los lotes leídos, no de un ``count()``.
+    """
+
+    def __init__(self):
+        self.devices_count = 0
+        self.success_count = 0
+        self.failure_count = 0
+        self.pruned_count = 0
+        self.batches = 0
+        self.errors = []
+
+    def add_batch(self, size, success, failure):
+        self.batches += 1
+        self.devices_count += size
+        self.success_count += success
+        self.failure_count += failure
+
+    def merge(self, other):
+        """Suma los contadores y errores de otro resultado"""
+        self.batches += other.batches
+        self.devices_count += other.devices_count
+        self.success_count += other.success_count
+        self.failure_count += other.failure_count
+        self.pruned_count += other.pruned_count
+        self.errors.extend(other.errors)
+
+    @property
+    def status(self):
+        """``sent`` si llegó al menos a un dispositivo o no había ninguno"""
+        if self.devices_count and not self.success_count:
+            return 'failed'
+        return 'sent'
+
+    def as_dict(self):
+        return {
+            'devices_count': self.devices_count,
+            'success_count': self.success_count,
+            'failure_count': self.failure_count,
+            'pruned_count': self.pruned_count,
+            'batches': self.batches,
+        }
+
+
+class TokenBucket:
+    """
+    Limitador token bucket: ``rate`` mensajes por segundo con ráfagas de
+    hasta ``capacity``.
+
+    ``acquire(n)`` descuenta ``n`` tokens y, si el balance queda en
+    negativo, duerme lo necesario para pagar la deuda (con ``sleep``,
+    por defecto ``time.sleep``). Así un lote mayor que la capacidad
+    también pasa, solo que espera más.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n=1, sleep=time.sleep):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated_at) * self.rate
+            )
+            self.updated_at = now
+            self.tokens -= n
+            wait_seconds = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait_seconds:
+            sleep(wait_seconds)
+        return wait_seconds
+
+
+def get_rate_limiter():
+    """Token bucket según ``NOTIFICATIONS_FANOUT``, o ``None`` sin límite"""
+    config = settings.NOTIFICATIONS_FANOUT
+    if not config.get('RATE_LIMIT'):
+        return None
+    return TokenBucket(config['RATE_LIMIT'], config.get('BURST') or config['RATE_LIMIT'])
+
+
+def iter_token_batches(queryset, batch_size=MAX_BATCH_SIZE, active=True, start_after=0):
+    """
+    Recorre los dispositivos activos (o inactivos con ``active=False``)
+    en lotes de ``(ids, tokens)``, empezando después de ``start_after``.
+
+    Pagina por keyset sobre ``id`` para no cargar la tabla completa en
+    memoria ni usar OFFSET: cada lote es una consulta indexada. Los lotes
+    son la única lectura de dispositivos del envío; la existencia y el
+    total se derivan de ellos (``FanOutResult``) en lugar de repetir
+    ``exists()``/``count()`` sobre el mismo queryset.
+    """
+    devices = queryset.filter(active=active).order_by('id').values_list(
+        'id', 'registration_id'
+    )
+    last_id = start_after
+    while True:
+        rows = list(devices.filter(id__gt=last_id)[:batch_size])
+        if not rows:
+            return
+        ids, tokens = zip(*rows)
+        yield list(ids), list(tokens)
+        # Un lote incompleto es el último: no hace falta otra consulta
+        if len(rows) < batch_size:
+            return
+        last_id = ids[-1]
+
+
+def is_invalid_token_error(exc):
+    """
+    Indica si el error de un envío se debe a un token inválido.
+
+    Igual que fcm-django, ``INVALID_ARGUMENT`` solo cuenta cuando la
+    causa es el token y no, por ejemplo, un payload mal formado.
+    """
+    if isinstance(exc, INVALID_TOKEN_ERRORS):
+        return True
+    return (
+        isinstance(exc, exceptions.InvalidArgumentError)
+        and getattr(exc, 'cause', None) == 'Invalid registration'
+    )
+
+
+def prune_devices(ids, response):
+    """
+    Desactiva (o elimina, según ``DELETE_INACTIVE_DEVICES``) los
+    dispositivos cuyos tokens fallaron por ser inválidos.
+
+    Retorna cuántos se depuraron. Siempre se desactivan primero con
+    ``bulk_deactivate``, que ajusta los contadores del panel para todo el
+    lote a la vez; así las señales del borrado no tienen nada que
+    descontar fila por fila.
+    """
+    dead_ids = [
+        device_id
+        for device_id, item in zip(ids, response.responses)
+        if not item.success and is_invalid_token_error(item.exception)
+    ]
+    if not dead_ids:
+        return 0
+    devices = FCMDevice.objects.filter(id__in=dead_ids)
+    deactivated = bulk_deactivate(devices)
+    if FCM_DJANGO_SETTINGS['DELETE_INACTIVE_DEVICES']:
+        deleted, _ = devices.delete()
+        return deleted
+    return deactivated
+
+
+def send_multicast(tokens, title, body, data=None):
+    """Envía un mensaje multicast a un lote de hasta 500 tokens"""
+    message = messaging.MulticastMessage(
+        tokens=tokens,
+        notification=messaging.Notification(title=title, body=body),
+        data=data or None,
+    )
+    return messaging.send_each_for_multicast(
+        message, app=FCM_DJANGO_SETTINGS['DEFAULT_FIREBASE_APP']
+    )
+
+
+def fan_out(queryset, title, body, data=None, workers=None, batch_size=None,
+            start_after=0, checkpoint=None, limiter=None, heartbeat=None,
+            heartbeat_interval=HEARTBEAT_INTERVAL):
+    """
+    Envía una notificación a los dispositivos activos de ``queryset``.
+
+    Los tokens se leen por lotes en el hilo actual (las consultas no
+    salen de él) y cada lote se envía con ``send_each_for_multicast``
+    desde un pool de ``workers`` hilos. Como mucho hay ``2 * workers``
+    lotes en memoria a la vez, así que el consumo no depende del número
+    de dispositivos. Un lote cuya llamada falla completa cuenta todos sus
+    tokens como fallidos y no interrumpe el resto.
+
+    Los tokens que FCM reporta como inválidos se depuran al procesar cada
+    lote (ver ``prune_devices``), para no volver a enviarles.
+
+    Antes de enviar cada lote se descuentan sus tokens de ``limiter``
+    (por defecto ``get_rate_limiter()``), lo que frena tanto las llamadas
+    a FCM como las lecturas de dispositivos.
+
+    ``checkpoint(last_id, result)`` se llama cada vez que avanza el mayor
+    ``id`` tal que todos los lotes hasta él ya terminaron, y ``result``
+    solo suma esos lotes; pasando ese ``id`` como ``start_after`` un
+    envío interrumpido se reanuda sin repetir ni contar dos veces lo ya
+    enviado (salvo los lotes que estaban en vuelo). Mientras espera al
+    limitador o a los lotes en vuelo, ``heartbeat()`` se llama cada
+    ``heartbeat_interval`` segundos para indicar que el envío sigue vivo.
+    Una excepción de cualquiera de los dos interrumpe el envío.
+    """
+    config = settings.NOTIFICATIONS_FANOUT
+    workers = workers or config['WORKERS']
+    batch_size = min(batch_size or config['BATCH_SIZE'], MAX_BATCH_SIZE)
+    limiter = limiter or get_rate_limiter()
+    result = FanOutResult()
+    # Lotes en orden de envío, para calcular hasta dónde está todo enviado
+    submitted = deque()
+    # Resultado de los lotes terminados que aún no entran en ``result``
+    finished = {}
+    pending = {}
+    last_beat = time.monotonic()
+
+    def beat():
+        nonlocal last_beat
+        if heartbeat and time.monotonic() - last_beat >= heartbeat_interval:
+            heartbeat()
+            last_beat = time.monotonic()
+
+    def pause(seconds):
+        # Espera del limitador en tramos, latiendo entre ellos
+        deadline = time.monotonic() + seconds
+        while (remaining := deadline - time.monotonic()) > 0:
+            time.sleep(min(remaining, heartbeat_interval))
+            beat()
+
+    def batch_result(future, batch):
+        ids, tokens = batch
+        outcome = FanOutResult()
+        try:
+            response = future.result()
+        except Exception as exc:
+            logger.warning('Falló el envío de un lote de %d tokens', len(tokens), exc_info=True)
+            outcome.add_batch(len(tokens), 0, len(tokens))
+            outcome.errors.append(str(exc))
+            return outcome
+        outcome.add_batch(len(tokens), response.success_count, response.failure_count)
+        if response.failure_count:
+            outcome.pruned_count += prune_devices(ids, response)
+        return outcome
+
+    def collect(block=False):
+        """Procesa los lotes terminados; con ``block`` espera al menos uno"""
+        nonlocal last_beat
+        done = [future for future in pending if future.done()]
+        while block and pending and not done:
+            wait(pending, timeout=heartbeat_interval, return_when=FIRST_COMPLETED)
+            beat()
+            done = [future for future in pending if future.done()]
+        for future in done:
+            finished[future] = batch_result(future, pending.pop(future))
+
+        last_id = None
+        while submitted and submitted[0][0] in finished:
+            future, last_id = submitted.popleft()
+            result.merge(finished.pop(future))
+        if last_id is not None and checkpoint:
+            checkpoint(last_id, result)
+            last_beat = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fcm-fanout') as pool:
+        for ids, tokens in iter_token_batches(queryset, batch_size, start_after=start_after):
+            collect(block=len(pending) >= 2 * workers)
+            if limiter:
+                beat()
+                limiter.acquire(len(tokens), sleep=pause)
+            future = pool.submit(send_multicast, tokens, title, body, data)
+            pending[future] = (ids, tokens)
+            submitted.append((future, ids[-1]))
+
+        while pending:
+            collect(block=True)
+
+    return result
@@ -0,0 +1,256 @@
+import logging
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from fcm_django.models import FCMDevice
+
+from .fanout import fan_out
+from .models import NotificationHistory
+from .rollups import record_send
+from .segments import segment_devices
+from .topics import send_to_topic, topic_mode_enabled
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseLost(Exception):
+    """El envío se recuperó como abandonado y ahora lo procesa otro worker"""
+
+
+def enqueue_notification(title, body, notification_type, sent_by, target_user=None,
+                         data=None, segment=None, scheduled_for=None):
+    """
+    Registra un envío pendiente y retorna su ``NotificationHistory``.
+
+    El envío real lo hace el worker (``manage.py process_notifications``),
+    así que la petición HTTP no espera a FCM. Con ``scheduled_for`` el
+    worker no lo toma antes de esa fecha.
+    """
+    return NotificationHistory.objects.create(
+        title=title,
+        body=body,
+        notification_type=notification_type,
+        target_user=target_user,
+        sent_by=sent_by,
+        data_payload=data or {},
+        segment=segment or {},
+        scheduled_for=scheduled_for,
+        status='pending',
+    )
+
+
+def claim_next_job():
+    """
+    Toma el envío pendiente más antiguo cuya fecha programada ya llegó y
+    lo marca como ``processing``.
+
+    En PostgreSQL usa ``SELECT ... FOR UPDATE SKIP LOCKED``, de modo que
+    varios workers pueden consumir la cola sin tomar el mismo envío. Cada
+    toma genera un ``lease_id`` nuevo que las escrituras posteriores del
+    worker comprueban (ver ``save_leased``).
+    """
+    with transaction.atomic():
+        job = (
+            NotificationHistory.objects.select_for_update(skip_locked=True)
+            .filter(status='pending')
+            .filter(Q(scheduled_for__isnull=True) | Q(scheduled_for__lte=timezone.now()))
+            .order_by('created_at', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'processing'
+        job.started_at = job.started_at or timezone.now()
+        job.checkpoint_at = timezone.now()
+        job.lease_id = uuid.uuid4()
+        job.save(update_fields=['status', 'started_at', 'checkpoint_at', 'lease_id'])
+    return job
+
+
+def recover_stale_jobs(stale_after=None):
+    """
+    Devuelve a la cola los envíos en proceso sin checkpoint reciente.
+
+    Un worker que se cae deja su envío en ``processing``; al volver a
+    ``pending`` otro worker lo retoma desde ``last_device_id`` en lugar
+    de reenviar a todos. El lease se anula, así que si el worker original
+    solo estaba colgado su siguiente escritura falla con ``LeaseLost`` y
+    abandona el envío. Retorna cuántos envíos se recuperaron.
+    """
+    if stale_after is None:
+        stale_after = settings.NOTIFICATIONS_QUEUE['STALE_AFTER']
+    limit = timezone.now() - timedelta(seconds=stale_after)
+    recovered = NotificationHistory.objects.filter(
+        status='processing', checkpoint_at__lt=limit
+    ).update(status='pending', lease_id=None)
+    if recovered:
+        logger.warning('%d envíos abandonados vuelven a la cola', recovered)
+    return recovered
+
+
+def target_devices(job):
+    """
+    Dispositivos destino de un envío según su tipo.
+
+    ``target_user`` se pone en NULL al borrar el usuario; un envío
+    'user' o 'test' sin destino falla en lugar de filtrar por
+    ``user_id IS NULL``, que seleccionaría los dispositivos anónimos.
+    """
+    if job.notification_type == 'broadcast':
+        return FCMDevice.objects.all()
+    if job.notification_type == 'segment':
+        return segment_devices(job.segment)
+    if job.target_user_id is None:
+        raise ValueError('El usuario destino ya no existe')
+    return FCMDevice.objects.filter(user_id=job.target_user_id)
+
+
+# Contadores del envío que se acumulan entre checkpoints
+COUNTER_FIELDS = ('devices_count', 'success_count', 'failure_count', 'pruned_count')
+
+
+def update_leased(job, **fields):
+    """
+    ``UPDATE`` de columnas del envío condicionado a que siga siendo del
+    worker (mismo ``lease_id``). Lanza ``LeaseLost`` si no lo es.
+    """
+    updated = NotificationHistory.objects.filter(
+        pk=job.pk, lease_id=job.lease_id
+    ).update(**fields)
+    if not updated:
+        raise LeaseLost(job.pk)
+    for field, value in fields.items():
+        setattr(job, field, value)
+
+
+def save_leased(job, update_fields):
+    """
+    Guarda el envío con ``save()`` (las señales mantienen los contadores)
+    si sigue siendo del worker; bloquea la fila para que no se recupere
+    entre la comprobación y la escritura. Lanza ``LeaseLost`` si no.
+    """
+    with transaction.atomic():
+        lease_id = (
+            NotificationHistory.objects.select_for_update()
+            .filter(pk=job.pk)
+            .values_list('lease_id', flat=True)
+            .first()
+        )
+        if lease_id is None or lease_id != job.lease_id:
+            raise LeaseLost(job.pk)
+        job.save(update_fields=update_fields)
+
+
+def process_job(job):
+    """Envía una notificación encolada y guarda el resultado en el historial"""
+    if job.notification_type == 'broadcast' and topic_mode_enabled():
+        return process_topic_job(job)
+
+    # Contadores de un intento anterior interrumpido (ver checkpoint)
+    base = {field: getattr(job, field) for field in COUNTER_FIELDS}
+
+    def apply_counts(result):
+        for field in COUNTER_FIELDS:
+            setattr(job, field, base[field] + getattr(result, field))
+
+    def checkpoint(last_id, result):
+        # ``result`` solo suma los lotes hasta ``last_id``: al reanudar
+        # desde ahí ningún lote se cuenta dos veces
+        update_leased(
+            job,
+            last_device_id=last_id,
+            checkpoint_at=timezone.now(),
+            **{field: base[field] + getattr(result, field) for field in COUNTER_FIELDS},
+        )
+
+    def heartbeat():
+        update_leased(job, checkpoint_at=timezone.now())
+
+    try:
+        result = fan_out(
+            target_devices(job), job.title, job.body, job.data_payload,
+            start_after=job.last_device_id, checkpoint=checkpoint,
+            heartbeat=heartbeat,
+            heartbeat_interval=settings.NOTIFICATIONS_QUEUE['HEARTBEAT'],
+        )
+    except LeaseLost:
+        logger.warning('La notificación %s la retomó otro worker; se abandona', job.id)
+        return job
+    except Exception as exc:
+        logger.exception('Error procesando la notificación %s', job.id)
+        job.status = 'failed'
+        job.error_message = str(exc)
+    else:
+        apply_counts(result)
+        if not job.devices_count:
+            job.status = 'failed'
+            job.error_message = 'No hay dispositivos activos para el objetivo seleccionado'
+        else:
+            job.status = 'failed' if not job.success_count else 'sent'
+            job.error_message = '\n'.join(result.errors)
+
+    job.finished_at = timezone.now()
+    return finish_job(job, [
+        'status', 'devices_count', 'success_count', 'failure_count',
+        'pruned_count', 'error_message', 'finished_at',
+    ])
+
+
+def finish_job(job, update_fields):
+    """Guarda el resultado final y lo suma al rollup diario si el lease sigue vigente"""
+    try:
+        save_leased(job, update_fields)
+    except LeaseLost:
+        logger.warning('La notificación %s la retomó otro worker; se descarta el resultado', job.id)
+        return job
+    record_send(job)
+    return job
+
+
+def process_topic_job(job):
+    """
+    Envía un broadcast como un único mensaje al tópico de FCM.
+
+    FCM no informa a cuántos dispositivos llega, así que los contadores
+    quedan en cero.
+    """
+    try:
+        send_to_topic(job.title, job.body, job.data_payload)
+    except Exception as exc:
+        logger.exception('Error enviando la notificación %s al tópico', job.id)
+        job.status = 'failed'
+        job.error_message = str(exc)
+    else:
+        job.status = 'sent'
+
+    job.finished_at = timezone.now()
+    return finish_job(job, ['status', 'error_message', 'finished_at'])
+
+
+def run_worker(poll_interval=2, once=False):
+    """
+    Procesa la cola de notificaciones.
+
+    Con ``once=True`` procesa los pendientes y termina; si no, espera
+    ``poll_interval`` segundos cada vez que no hay envíos vencidos. Los
+    programados se toman en la primera consulta posterior a su fecha y
+    los abandonados por otro worker se recuperan en cada espera.
+    """
+    processed = 0
+    recover_stale_jobs()
+    while True:
+        close_old_connections()
+        job = claim_next_job()
+        if job is not None:
+            process_job(job)
+            processed += 1
+            continue
+        if once:
+            return processed
+        time.sleep(poll_interval)
+        recover_stale_jobs()
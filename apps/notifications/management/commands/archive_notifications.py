@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.notifications.retention import archive_notifications, expired_notifications, retention_cutoff
+
+
+class Command(BaseCommand):
+    help = "Archiva en .jsonl.gz y elimina el historial de notificaciones antiguo"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="Conservar los últimos N días (default: NOTIFICATIONS_RETENTION_DAYS)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Filas por lote (default: NOTIFICATIONS_RETENTION['BATCH_SIZE'])",
+        )
+        parser.add_argument(
+            "--archive-dir",
+            help="Directorio de los segmentos (default: NOTIFICATIONS_ARCHIVE_DIR)",
+        )
+        parser.add_argument(
+            "--no-archive",
+            action="store_true",
+            help="Eliminar sin escribir el archivo",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0,
+            help="Segundos de pausa entre lotes (default: 0)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo mostrar cuántos envíos se eliminarían",
+        )
+
+    def handle(self, *args, **options):
+        """Aplica la política de retención al historial"""
+        days = options["days"]
+        if days is None:
+            days = settings.NOTIFICATIONS_RETENTION["DAYS"]
+        cutoff = retention_cutoff(days)
+
+        if options["dry_run"]:
+            total = expired_notifications(cutoff).count()
+            self.stdout.write(f"{total} envíos anteriores a {cutoff:%Y-%m-%d} se eliminarían")
+            return
+
+        result = archive_notifications(
+            days=days,
+            batch_size=options["batch_size"],
+            archive=False if options["no_archive"] else None,
+            archive_dir=options["archive_dir"],
+            sleep=options["sleep"],
+            stdout=self.stdout if options["verbosity"] > 1 else None,
+        )
+        for segment in result["segments"]:
+            self.stdout.write(f"  {segment}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{result['deleted']} envíos anteriores a {cutoff:%Y-%m-%d} eliminados "
+                f"({len(result['segments'])} segmentos de archivo)"
+            )
+        )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from apps.notifications.jobs import run_worker
+
+
+class Command(BaseCommand):
+    help = "Worker que envía las notificaciones encoladas (estado pendiente)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Procesa los envíos pendientes y termina",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=2,
+            help="Segundos de espera cuando la cola está vacía (default: 2)",
+        )
+
+    def handle(self, *args, **options):
+        """Procesa la cola de notificaciones"""
+        processed = run_worker(poll_interval=options["sleep"], once=options["once"])
+        self.stdout.write(self.style.SUCCESS(f"Notificaciones procesadas: {processed}"))
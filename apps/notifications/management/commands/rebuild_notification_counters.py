@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.notifications.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = "Recalcula los contadores del panel de notificaciones desde cero"
+
+    def handle(self, *args, **options):
+        """Recalcula dispositivos activos, usuarios, total y enviados por día"""
+        counters = rebuild_counters()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Contadores recalculados: {counters['active_devices']} dispositivos activos, "
+                f"{counters['users_with_devices']} usuarios con dispositivos, "
+                f"{counters['total_notifications']} notificaciones, "
+                f"{counters['sent_days']} días con envíos"
+            )
+        )
@@ -0,0 +1,45 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.notifications.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recalcula los resúmenes diarios de notificaciones desde el historial"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=2,
+            help="Recalcular los últimos N días, incluido hoy (default: 2)",
+        )
+        parser.add_argument(
+            "--since",
+            help="Recalcular desde esta fecha (YYYY-MM-DD) hasta hoy",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Recalcular todo el historial",
+        )
+
+    def handle(self, *args, **options):
+        """Reemplaza las filas del rango por los totales del historial"""
+        if options["all"]:
+            date_from = None
+        elif options["since"]:
+            try:
+                date_from = date.fromisoformat(options["since"])
+            except ValueError:
+                raise CommandError("--since debe tener el formato YYYY-MM-DD")
+        else:
+            date_from = timezone.localdate() - timedelta(days=max(options["days"], 1) - 1)
+
+        rows = rebuild_rollups(date_from=date_from)
+        desde = date_from.isoformat() if date_from else "el inicio"
+        self.stdout.write(
+            self.style.SUCCESS(f"Resúmenes recalculados desde {desde}: {rows} filas")
+        )
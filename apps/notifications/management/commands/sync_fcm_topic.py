@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from apps.notifications.topics import MAX_TOPIC_BATCH_SIZE, broadcast_topic, sync_topic
+
+
+class Command(BaseCommand):
+    help = "Re-sincroniza la suscripción de los dispositivos al tópico de broadcast"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--topic",
+            help="Tópico a sincronizar (default: NOTIFICATIONS_BROADCAST_TOPIC)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=MAX_TOPIC_BATCH_SIZE,
+            help=f"Tokens por llamada a FCM (máximo {MAX_TOPIC_BATCH_SIZE})",
+        )
+
+    def handle(self, *args, **options):
+        """Suscribe los dispositivos activos y desuscribe los inactivos"""
+        topic = options["topic"] or broadcast_topic()
+        totals = sync_topic(topic=topic, batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Tópico '{topic}': {totals['subscribed']} suscritos, "
+                f"{totals['unsubscribed']} desuscritos, {totals['failed']} fallidos"
+            )
+        )
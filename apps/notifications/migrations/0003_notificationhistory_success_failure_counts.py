@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_notificationhistory_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationhistory',
+            name='failure_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Envíos fallidos'),
+        ),
+        migrations.AddField(
+            model_name='notificationhistory',
+            name='success_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Envíos exitosos'),
+        ),
+    ]
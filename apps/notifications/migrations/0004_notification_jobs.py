@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_notificationhistory_success_failure_counts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationhistory',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Fin del Envío'),
+        ),
+        migrations.AddField(
+            model_name='notificationhistory',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Inicio del Envío'),
+        ),
+        migrations.AlterField(
+            model_name='notificationhistory',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pendiente'), ('processing', 'Procesando'), ('sent', 'Enviado'), ('failed', 'Fallido')], default='pending', max_length=20, verbose_name='Estado'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationhistory',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['created_at', 'id'], name='notif_pending_idx'),
+        ),
+    ]
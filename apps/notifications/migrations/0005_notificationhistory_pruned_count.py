@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_notification_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationhistory',
+            name='pruned_count',
+            field=models.PositiveIntegerField(default=0, help_text='Dispositivos desactivados o eliminados por token inválido', verbose_name='Tokens depurados'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:06
+
+from django.db import migrations, models
+
+# Índices parciales sobre los dispositivos activos: los lotes del envío
+# recorren por ``id`` y los segmentos filtran por ``user_id``.
+#
+# La tabla ``fcm_django_fcmdevice`` es de fcm-django y estos índices no
+# forman parte de su estado de migraciones: llevan nombres propios
+# (``notif_``) y se crean con IF NOT EXISTS para no chocar con los suyos.
+# Si una migración futura de fcm-django recrea la tabla se pierden; se
+# restauran revirtiendo y volviendo a aplicar esta migración. Solo
+# PostgreSQL.
+INDICES_DISPOSITIVOS = {
+    'notif_fcmdevice_active_id_idx': ('id',),
+    'notif_fcmdevice_active_user_idx': ('user_id', 'id'),
+}
+
+
+def crear_indices_dispositivos(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    table = quote(apps.get_model('fcm_django', 'FCMDevice')._meta.db_table)
+    for name, columns in INDICES_DISPOSITIVOS.items():
+        columns = ', '.join(quote(column) for column in columns)
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {quote(name)} ON {table} ({columns}) WHERE active'
+        )
+
+
+def eliminar_indices_dispositivos(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in INDICES_DISPOSITIVOS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(name)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_notificationhistory_pruned_count'),
+        ('fcm_django', '0011_fcmdevice_fcm_django_registration_id_user_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationhistory',
+            name='segment',
+            field=models.JSONField(blank=True, default=dict, help_text='Criterios de audiencia para notificaciones por segmento', verbose_name='Segmento'),
+        ),
+        migrations.AlterField(
+            model_name='notificationhistory',
+            name='notification_type',
+            field=models.CharField(choices=[('test', 'Prueba'), ('user', 'Usuario Específico'), ('broadcast', 'Broadcast'), ('segment', 'Segmento'), ('admin', 'Administrador')], max_length=20, verbose_name='Tipo'),
+        ),
+        migrations.RunPython(crear_indices_dispositivos, eliminar_indices_dispositivos),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0006_notification_segments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationhistory',
+            name='checkpoint_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Último checkpoint'),
+        ),
+        migrations.AddField(
+            model_name='notificationhistory',
+            name='last_device_id',
+            field=models.PositiveBigIntegerField(default=0, help_text='Checkpoint del envío: al reanudarlo se continúa desde aquí', verbose_name='Último dispositivo enviado'),
+        ),
+        migrations.AddField(
+            model_name='notificationhistory',
+            name='scheduled_for',
+            field=models.DateTimeField(blank=True, help_text='Dejar vacío para enviar apenas lo tome el worker', null=True, verbose_name='Programado para'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0007_notification_scheduling'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notificationhistory',
+            index=models.Index(fields=['status', 'notification_type', 'created_at'], name='notif_status_type_created_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:13
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def calcular_contadores(apps, schema_editor):
+    """Valores iniciales de los contadores (igual que rebuild_counters)"""
+    FCMDevice = apps.get_model('fcm_django', 'FCMDevice')
+    NotificationHistory = apps.get_model('notifications', 'NotificationHistory')
+    NotificationCounter = apps.get_model('notifications', 'NotificationCounter')
+
+    devices = FCMDevice.objects.filter(active=True).aggregate(
+        active_devices=Count('id'),
+        users_with_devices=Count('user', distinct=True),
+    )
+    counters = [
+        NotificationCounter(key=key, value=value) for key, value in devices.items()
+    ]
+    counters.append(NotificationCounter(
+        key='total_notifications', value=NotificationHistory.objects.count()
+    ))
+    sent_per_day = (
+        NotificationHistory.objects.filter(status='sent')
+        .annotate(day=TruncDate('created_at', tzinfo=timezone.get_current_timezone()))
+        .values('day')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    counters.extend(
+        NotificationCounter(key=f"sent:{row['day'].isoformat()}", value=row['total'])
+        for row in sent_per_day
+    )
+    NotificationCounter.objects.bulk_create(counters)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0008_notification_history_indexes'),
+        ('fcm_django', '0011_fcmdevice_fcm_django_registration_id_user_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('key', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='Clave')),
+                ('value', models.BigIntegerField(default=0, verbose_name='Valor')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Actualizado')),
+            ],
+            options={
+                'verbose_name': 'Contador de Notificaciones',
+                'verbose_name_plural': 'Contadores de Notificaciones',
+            },
+        ),
+        migrations.RunPython(calcular_contadores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0009_notification_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Día')),
+                ('notification_type', models.CharField(choices=[('test', 'Prueba'), ('user', 'Usuario Específico'), ('broadcast', 'Broadcast'), ('segment', 'Segmento'), ('admin', 'Administrador')], max_length=20, verbose_name='Tipo')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('processing', 'Procesando'), ('sent', 'Enviado'), ('failed', 'Fallido')], max_length=20, verbose_name='Estado')),
+                ('notifications', models.PositiveIntegerField(default=0, verbose_name='Notificaciones')),
+                ('devices_count', models.PositiveBigIntegerField(default=0, verbose_name='Dispositivos')),
+                ('success_count', models.PositiveBigIntegerField(default=0, verbose_name='Envíos exitosos')),
+                ('failure_count', models.PositiveBigIntegerField(default=0, verbose_name='Envíos fallidos')),
+                ('pruned_count', models.PositiveBigIntegerField(default=0, verbose_name='Tokens depurados')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Actualizado')),
+                ('sent_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_rollups', to=settings.AUTH_USER_MODEL, verbose_name='Enviado por')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Notificaciones',
+                'verbose_name_plural': 'Resúmenes Diarios de Notificaciones',
+                'ordering': ['-day'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'notification_type', 'status', 'sent_by'), name='notif_rollup_unique')],
+            },
+        ),
+    ]
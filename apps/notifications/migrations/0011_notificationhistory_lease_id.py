@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0010_notification_daily_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationhistory',
+            name='lease_id',
+            field=models.UUIDField(blank=True, editable=False, help_text='Identifica al worker que procesa el envío; cambia al recuperarlo', null=True, verbose_name='Lease del worker'),
+        ),
+    ]
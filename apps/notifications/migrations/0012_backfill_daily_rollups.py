@@ -0,0 +1,65 @@
+from datetime import date, datetime, time
+
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def calcular_resumenes(apps, schema_editor):
+    """
+    Resúmenes del historial existente (igual que ``rebuild_rollups``).
+
+    Reemplaza los que ya se hayan acumulado desde 0010 y conserva los
+    días archivados, cuyo historial ya no está en la tabla.
+    """
+    NotificationHistory = apps.get_model('notifications', 'NotificationHistory')
+    NotificationDailyRollup = apps.get_model('notifications', 'NotificationDailyRollup')
+    NotificationCounter = apps.get_model('notifications', 'NotificationCounter')
+
+    tz = timezone.get_current_timezone()
+    history = NotificationHistory.objects.filter(status__in=('sent', 'failed'))
+    rollups = NotificationDailyRollup.objects.all()
+    archived = NotificationCounter.objects.filter(key='rollups_archived_before').first()
+    if archived:
+        floor = date.fromordinal(archived.value)
+        history = history.filter(created_at__gte=datetime.combine(floor, time.min, tzinfo=tz))
+        rollups = rollups.filter(day__gte=floor)
+
+    metric_fields = ('devices_count', 'success_count', 'failure_count', 'pruned_count')
+    rows = (
+        history
+        .annotate(day=TruncDate('created_at', tzinfo=tz))
+        .values('day', 'notification_type', 'status', 'sent_by_id')
+        .annotate(
+            notifications=Count('id'),
+            **{f'total_{field}': Sum(field) for field in metric_fields},
+        )
+        .order_by()
+    )
+    rollups.delete()
+    NotificationDailyRollup.objects.bulk_create(
+        [
+            NotificationDailyRollup(
+                day=row['day'],
+                notification_type=row['notification_type'],
+                status=row['status'],
+                sent_by_id=row['sent_by_id'],
+                notifications=row['notifications'],
+                **{field: row[f'total_{field}'] or 0 for field in metric_fields},
+            )
+            for row in rows.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0011_notificationhistory_lease_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(calcular_resumenes, migrations.RunPython.noop),
+    ]
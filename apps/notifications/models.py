@@ -13,11 +13,13 @@ class NotificationHistory(models.Model):
         ('test', 'Prueba'),
         ('user', 'Usuario Específico'),
         ('broadcast', 'Broadcast'),
+        ('segment', 'Segmento'),
         ('admin', 'Administrador'),
     ]
     
     STATUS_CHOICES = [
         ('pending', 'Pendiente'),
+        ('processing', 'Procesando'),
         ('sent', 'Enviado'),
         ('failed', 'Fallido'),
     ]
@@ -47,6 +49,19 @@ class NotificationHistory(models.Model):
         default=0,
         verbose_name="Dispositivos alcanzados"
     )
+    success_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Envíos exitosos"
+    )
+    failure_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Envíos fallidos"
+    )
+    pruned_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Tokens depurados",
+        help_text="Dispositivos desactivados o eliminados por token inválido"
+    )
     status = models.CharField(
         max_length=20,
         choices=STATUS_CHOICES,
@@ -66,17 +81,74 @@ class NotificationHistory(models.Model):
         blank=True,
         verbose_name="Datos Adicionales"
     )
+    segment = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name="Segmento",
+        help_text="Criterios de audiencia para notificaciones por segmento"
+    )
+    scheduled_for = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Programado para",
+        help_text="Dejar vacío para enviar apenas lo tome el worker"
+    )
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Inicio del Envío"
+    )
+    last_device_id = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name="Último dispositivo enviado",
+        help_text="Checkpoint del envío: al reanudarlo se continúa desde aquí"
+    )
+    checkpoint_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Último checkpoint"
+    )
+    lease_id = models.UUIDField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Lease del worker",
+        help_text="Identifica al worker que procesa el envío; cambia al recuperarlo"
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Fin del Envío"
+    )
 
     class Meta:
         verbose_name = "Historial de Notificación"
         verbose_name_plural = "Historial de Notificaciones"
         ordering = ['-created_at']
+        indexes = [
+            # Paginación por keyset del historial (created_at, id); también
+            # sirve al historial del admin filtrado solo por fechas
+            models.Index(fields=['created_at', 'id'], name='notif_created_id_idx'),
+            # Historial del admin filtrado por estado y tipo (y fechas)
+            models.Index(
+                fields=['status', 'notification_type', 'created_at'],
+                name='notif_status_type_created_idx',
+            ),
+            # Cola de envíos: el worker busca los pendientes más antiguos
+            models.Index(
+                fields=['created_at', 'id'],
+                name='notif_pending_idx',
+                condition=models.Q(status='pending'),
+            ),
+        ]
 
     def __str__(self):
         if self.target_user:
             return f"{self.title} → {self.target_user.username}"
         elif self.notification_type == 'broadcast':
             return f"{self.title} → Todos los usuarios"
+        elif self.notification_type == 'segment':
+            return f"{self.title} → Segmento"
         return self.title
 
     @property
@@ -84,6 +156,7 @@ class NotificationHistory(models.Model):
         """Retorna un badge HTML para el estado"""
         colors = {
             'pending': '#ffc107',
+            'processing': '#17a2b8',
             'sent': '#28a745',
             'failed': '#dc3545'
         }
@@ -96,6 +169,74 @@ class NotificationHistory(models.Model):
             'test': '🧪',
             'user': '👤',
             'broadcast': '📢',
+            'segment': '🎯',
             'admin': '👨‍💼'
         }
-        return f'{icons.get(self.notification_type, "📱")} {self.get_notification_type_display()}'
\ No newline at end of file
+        return f'{icons.get(self.notification_type, "📱")} {self.get_notification_type_display()}'
+
+
+class NotificationCounter(models.Model):
+    """
+    Contadores precalculados del panel de notificaciones
+
+    Se mantienen con señales (ver ``counters.py``) para que el admin los
+    lea con una sola consulta por clave primaria. ``manage.py
+    rebuild_notification_counters`` los recalcula desde cero.
+    """
+    key = models.CharField(max_length=50, primary_key=True, verbose_name="Clave")
+    value = models.BigIntegerField(default=0, verbose_name="Valor")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Actualizado")
+
+    class Meta:
+        verbose_name = "Contador de Notificaciones"
+        verbose_name_plural = "Contadores de Notificaciones"
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
+
+
+class NotificationDailyRollup(models.Model):
+    """
+    Resumen diario de envíos por tipo, estado y remitente
+
+    Se alimenta al terminar cada envío (ver ``rollups.py``) y se puede
+    recalcular con ``manage.py rollup_notifications``. Las consultas de
+    analítica leen esta tabla en lugar del historial completo.
+    """
+    day = models.DateField(verbose_name="Día")
+    notification_type = models.CharField(
+        max_length=20,
+        choices=NotificationHistory.NOTIFICATION_TYPES,
+        verbose_name="Tipo"
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=NotificationHistory.STATUS_CHOICES,
+        verbose_name="Estado"
+    )
+    sent_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notification_rollups',
+        verbose_name="Enviado por"
+    )
+    notifications = models.PositiveIntegerField(default=0, verbose_name="Notificaciones")
+    devices_count = models.PositiveBigIntegerField(default=0, verbose_name="Dispositivos")
+    success_count = models.PositiveBigIntegerField(default=0, verbose_name="Envíos exitosos")
+    failure_count = models.PositiveBigIntegerField(default=0, verbose_name="Envíos fallidos")
+    pruned_count = models.PositiveBigIntegerField(default=0, verbose_name="Tokens depurados")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Actualizado")
+
+    class Meta:
+        verbose_name = "Resumen Diario de Notificaciones"
+        verbose_name_plural = "Resúmenes Diarios de Notificaciones"
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'notification_type', 'status', 'sent_by'],
+                name='notif_rollup_unique'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.notification_type}/{self.status}: {self.notifications}"
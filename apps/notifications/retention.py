@@ -0,0 +1,156 @@
+import gzip
+import json
+import logging
+import os
+import time as time_module
+from collections import Counter
+from datetime import datetime, time, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import counters
+from .models import NotificationHistory
+from .rollups import FINAL_STATUSES, rebuild_rollups, set_archived_before
+
+logger = logging.getLogger(__name__)
+
+
+def retention_cutoff(days=None):
+    """
+    Inicio del día local a partir del cual se conserva el historial.
+
+    Se corta en el límite de un día para que cada día quede completo en
+    la tabla o completo en el archivo, nunca a medias.
+    """
+    if days is None:
+        days = settings.NOTIFICATIONS_RETENTION['DAYS']
+    day = timezone.localdate() - timedelta(days=days)
+    return datetime.combine(day, time.min, tzinfo=timezone.get_current_timezone())
+
+
+def expired_notifications(cutoff):
+    """Envíos terminados creados antes de ``cutoff``, los más antiguos primero"""
+    return NotificationHistory.objects.filter(
+        created_at__lt=cutoff, status__in=FINAL_STATUSES
+    ).order_by('created_at', 'id')
+
+
+class ArchiveWriter:
+    """
+    Escribe el historial archivado en segmentos ``.jsonl.gz``.
+
+    Cada lote se agrega al segmento como un miembro gzip independiente y
+    se sincroniza a disco antes de borrar sus filas, así el archivo es
+    válido (``zcat``/``gzip.open`` leen los miembros concatenados) aunque
+    el proceso se corte. Al llegar a ``segment_rows`` filas se abre un
+    segmento nuevo.
+    """
+
+    def __init__(self, directory, segment_rows):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_rows = segment_rows
+        self.prefix = f"notifications-{timezone.now():%Y%m%dT%H%M%S}"
+        self.segments = []
+        self._rows_in_segment = segment_rows
+
+    def _next_segment(self):
+        path = self.directory / f"{self.prefix}-{len(self.segments) + 1:04d}.jsonl.gz"
+        self.segments.append(path)
+        self._rows_in_segment = 0
+        return path
+
+    def write(self, rows):
+        if self._rows_in_segment >= self.segment_rows:
+            self._next_segment()
+        lines = ''.join(
+            json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n' for row in rows
+        )
+        with open(self.segments[-1], 'ab') as segment:
+            segment.write(gzip.compress(lines.encode('utf-8')))
+            segment.flush()
+            os.fsync(segment.fileno())
+        self._rows_in_segment += len(rows)
+
+
+def _delete_rows(ids):
+    """
+    ``DELETE ... WHERE id IN (...)`` sin cargar instancias ni disparar
+    señales (los contadores se ajustan por lote en ``archive_notifications``).
+    """
+    table = connection.ops.quote_name(NotificationHistory._meta.db_table)
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE id IN ({placeholders})', ids)
+        return cursor.rowcount
+
+
+def archive_notifications(days=None, batch_size=None, archive=None, archive_dir=None,
+                          sleep=0, stdout=None):
+    """
+    Archiva y elimina los envíos terminados más antiguos que la retención.
+
+    1. Recalcula los resúmenes diarios de los días a eliminar y marca
+       esos días como archivados, para que la analítica los conserve.
+    2. Recorre las filas en lotes de ``batch_size``: cada lote se escribe
+       al archivo (si ``archive``) y se borra en su propia transacción
+       corta, de modo que la tabla nunca queda bloqueada mucho tiempo.
+       ``sleep`` agrega una pausa entre lotes.
+
+    Los envíos pendientes o en proceso nunca se tocan. Retorna un dict
+    con las filas eliminadas y los segmentos escritos.
+    """
+    config = settings.NOTIFICATIONS_RETENTION
+    batch_size = batch_size or config['BATCH_SIZE']
+    archive = config['ARCHIVE'] if archive is None else archive
+    cutoff = retention_cutoff(days)
+    expired = expired_notifications(cutoff)
+
+    oldest = expired.values_list('created_at', flat=True).first()
+    if oldest is None:
+        return {'deleted': 0, 'segments': [], 'cutoff': cutoff}
+
+    cutoff_day = cutoff.date()
+    rebuild_rollups(date_from=timezone.localdate(oldest), date_to=cutoff_day - timedelta(days=1))
+    set_archived_before(cutoff_day)
+
+    writer = None
+    if archive:
+        writer = ArchiveWriter(archive_dir or config['ARCHIVE_DIR'], config['SEGMENT_ROWS'])
+
+    fields = [field.attname for field in NotificationHistory._meta.concrete_fields]
+    deleted = 0
+    while True:
+        rows = list(expired.values(*fields)[:batch_size])
+        if not rows:
+            break
+        if writer:
+            writer.write(rows)
+
+        with transaction.atomic():
+            removed = _delete_rows([row['id'] for row in rows])
+            counters.increment(counters.TOTAL_NOTIFICATIONS, -removed)
+            sent_per_day = Counter(
+                timezone.localdate(row['created_at']) for row in rows if row['status'] == 'sent'
+            )
+            for day, total in sent_per_day.items():
+                counters.increment(counters.sent_key(day), -total)
+
+        deleted += removed
+        if stdout:
+            stdout.write(f"  {deleted} envíos archivados...")
+        if len(rows) < batch_size:
+            break
+        if sleep:
+            time_module.sleep(sleep)
+
+    logger.info('Retención: %d envíos anteriores a %s eliminados', deleted, cutoff_day)
+    return {
+        'deleted': deleted,
+        'segments': writer.segments if writer else [],
+        'cutoff': cutoff,
+    }
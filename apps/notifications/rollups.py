@@ -0,0 +1,142 @@
+import logging
+from datetime import date, datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import NotificationCounter, NotificationDailyRollup, NotificationHistory
+
+logger = logging.getLogger(__name__)
+
+# Solo los envíos terminados entran en los resúmenes
+FINAL_STATUSES = ('sent', 'failed')
+
+# Métricas que se suman en cada fila del resumen
+METRIC_FIELDS = ('devices_count', 'success_count', 'failure_count', 'pruned_count')
+
+# Contador con el primer día cuyo historial sigue en la tabla (ordinal)
+ARCHIVED_BEFORE_KEY = 'rollups_archived_before'
+
+
+def archived_before():
+    """
+    Día a partir del cual el historial está completo, o ``None``.
+
+    Los días anteriores ya se archivaron (ver ``retention.py``): sus
+    resúmenes son el único registro y no se pueden recalcular.
+    """
+    counter = NotificationCounter.objects.filter(key=ARCHIVED_BEFORE_KEY).first()
+    return date.fromordinal(counter.value) if counter else None
+
+
+def set_archived_before(day):
+    """Avanza (nunca retrocede) el límite de días archivados"""
+    current = archived_before()
+    if current is None or day > current:
+        NotificationCounter.objects.update_or_create(
+            key=ARCHIVED_BEFORE_KEY, defaults={'value': day.toordinal()}
+        )
+
+
+def rollup_key(notification):
+    """Fila del resumen a la que pertenece una notificación"""
+    return {
+        'day': timezone.localdate(notification.created_at),
+        'notification_type': notification.notification_type,
+        'status': notification.status,
+        'sent_by_id': notification.sent_by_id,
+    }
+
+
+def record_send(notification):
+    """
+    Suma un envío terminado a su fila del resumen diario.
+
+    Se llama desde el worker al cerrar cada envío; como ``counters``,
+    suma con ``UPDATE ... SET campo = campo + n`` y crea la fila si no
+    existe. Un fallo aquí se registra sin afectar al envío
+    (``rollup_notifications`` lo corrige).
+    """
+    if notification.status not in FINAL_STATUSES:
+        return
+    key = rollup_key(notification)
+    increments = {field: getattr(notification, field) for field in METRIC_FIELDS}
+    try:
+        rows = NotificationDailyRollup.objects.filter(**key)
+        updated = rows.update(
+            notifications=F('notifications') + 1,
+            updated_at=timezone.now(),
+            **{field: F(field) + value for field, value in increments.items()},
+        )
+        if updated:
+            return
+        try:
+            with transaction.atomic():
+                NotificationDailyRollup.objects.create(notifications=1, **key, **increments)
+        except IntegrityError:
+            # Otro worker creó la fila entre el UPDATE y el INSERT
+            rows.update(
+                notifications=F('notifications') + 1,
+                updated_at=timezone.now(),
+                **{field: F(field) + value for field, value in increments.items()},
+            )
+    except Exception:
+        logger.exception('No se pudo actualizar el resumen del envío %s', notification.id)
+
+
+@transaction.atomic
+def rebuild_rollups(date_from=None, date_to=None):
+    """
+    Recalcula los resúmenes de ``[date_from, date_to]`` (días locales,
+    ambos opcionales) desde el historial.
+
+    Borra las filas del rango y las vuelve a insertar con un solo
+    ``GROUP BY`` día × tipo × estado × remitente. Los días ya archivados
+    se excluyen siempre. Retorna cuántas filas se generaron.
+    """
+    floor = archived_before()
+    if floor and (date_from is None or date_from < floor):
+        date_from = floor
+    if date_from and date_to and date_from > date_to:
+        return 0
+
+    tz = timezone.get_current_timezone()
+    history = NotificationHistory.objects.filter(status__in=FINAL_STATUSES)
+    rollups = NotificationDailyRollup.objects.all()
+    # Límites sobre created_at (no sobre el día truncado) para usar su índice
+    if date_from:
+        history = history.filter(created_at__gte=datetime.combine(date_from, time.min, tzinfo=tz))
+        rollups = rollups.filter(day__gte=date_from)
+    if date_to:
+        history = history.filter(
+            created_at__lt=datetime.combine(date_to + timedelta(days=1), time.min, tzinfo=tz)
+        )
+        rollups = rollups.filter(day__lte=date_to)
+    history = history.annotate(day=TruncDate('created_at', tzinfo=tz))
+
+    rows = (
+        history.values('day', 'notification_type', 'status', 'sent_by_id')
+        .annotate(
+            notifications=Count('id'),
+            **{f'total_{field}': Sum(field) for field in METRIC_FIELDS},
+        )
+        .order_by()
+    )
+    rollups.delete()
+    created = NotificationDailyRollup.objects.bulk_create(
+        [
+            NotificationDailyRollup(
+                day=row['day'],
+                notification_type=row['notification_type'],
+                status=row['status'],
+                sent_by_id=row['sent_by_id'],
+                notifications=row['notifications'],
+                **{field: row[f'total_{field}'] or 0 for field in METRIC_FIELDS},
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+    return len(created)
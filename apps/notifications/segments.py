@@ -0,0 +1,45 @@
+from fcm_django.models import FCMDevice
+
+from .serializers import SegmentSerializer
+
+# Criterio del segmento -> lookup sobre FCMDevice (join con users.User)
+SEGMENT_LOOKUPS = {
+    'tipo_documento': 'user__tipo_documento__in',
+    'is_staff': 'user__is_staff',
+    'date_joined_from': 'user__date_joined__gte',
+    'date_joined_to': 'user__date_joined__lt',
+    'last_login_from': 'user__last_login__gte',
+    'last_login_to': 'user__last_login__lt',
+    'device_type': 'type__in',
+}
+
+
+def parse_segment(data):
+    """
+    Valida los criterios de un segmento.
+
+    Retorna la versión serializable (fechas ISO) para guardarla en
+    ``NotificationHistory.segment``; lanza ``ValidationError`` si no es
+    válido.
+    """
+    serializer = SegmentSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+    return serializer.data
+
+
+def segment_devices(segment):
+    """
+    Dispositivos de un segmento como un único queryset.
+
+    Todos los criterios se traducen a filtros sobre ``FCMDevice`` con un
+    solo JOIN a usuarios, de modo que los tokens se leen por lotes desde
+    la base de datos (``fanout.iter_token_batches``) sin cargar usuarios
+    en Python.
+    """
+    serializer = SegmentSerializer(data=segment)
+    serializer.is_valid(raise_exception=True)
+    filters = {
+        SEGMENT_LOOKUPS[criterio]: valor
+        for criterio, valor in serializer.validated_data.items()
+    }
+    return FCMDevice.objects.filter(**filters)
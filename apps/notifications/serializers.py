@@ -0,0 +1,140 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from fcm_django.models import FCMDevice
+from rest_framework import serializers
+from .models import NotificationHistory
+
+User = get_user_model()
+
+
+class NotificationHistorySerializer(serializers.ModelSerializer):
+    """
+    Serializer de solo lectura para el historial de notificaciones
+    """
+    notification_type_display = serializers.CharField(
+        source='get_notification_type_display', read_only=True
+    )
+    status_display = serializers.CharField(
+        source='get_status_display', read_only=True
+    )
+    target_username = serializers.CharField(
+        source='target_user.username', read_only=True, default=None
+    )
+    sent_by_username = serializers.CharField(
+        source='sent_by.username', read_only=True
+    )
+
+    class Meta:
+        model = NotificationHistory
+        fields = [
+            'id',
+            'title',
+            'body',
+            'notification_type',
+            'notification_type_display',
+            'target_user',
+            'target_username',
+            'sent_by',
+            'sent_by_username',
+            'devices_count',
+            'success_count',
+            'failure_count',
+            'pruned_count',
+            'status',
+            'status_display',
+            'segment',
+            'error_message',
+            'created_at',
+            'scheduled_for',
+            'started_at',
+            'finished_at',
+            'last_device_id',
+            'data_payload',
+        ]
+        read_only_fields = fields
+
+
+class SegmentSerializer(serializers.Serializer):
+    """
+    Criterios de un segmento de audiencia
+
+    Todos los criterios se combinan con AND; los rangos de fechas son
+    ``[desde, hasta)``.
+    """
+    tipo_documento = serializers.ListField(
+        child=serializers.ChoiceField(choices=User.TIPO_DOCUMENTO_CHOICES),
+        required=False,
+        allow_empty=False
+    )
+    is_staff = serializers.BooleanField(required=False)
+    date_joined_from = serializers.DateTimeField(required=False)
+    date_joined_to = serializers.DateTimeField(required=False)
+    last_login_from = serializers.DateTimeField(required=False)
+    last_login_to = serializers.DateTimeField(required=False)
+    device_type = serializers.ListField(
+        child=serializers.ChoiceField(choices=FCMDevice._meta.get_field('type').choices),
+        required=False,
+        allow_empty=False
+    )
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError(
+                'El segmento debe tener al menos un criterio'
+            )
+        for campo in ('date_joined', 'last_login'):
+            desde = attrs.get(f'{campo}_from')
+            hasta = attrs.get(f'{campo}_to')
+            if desde and hasta and desde >= hasta:
+                raise serializers.ValidationError(
+                    {f'{campo}_to': 'Debe ser posterior a la fecha inicial'}
+                )
+        return attrs
+
+
+class AnalyticsQuerySerializer(serializers.Serializer):
+    """
+    Parámetros de la analítica de envíos (sobre los resúmenes diarios)
+
+    El rango es de días locales, ambos incluidos; por defecto los últimos
+    30 días.
+    """
+    GROUP_BY_CHOICES = ['day', 'notification_type', 'status', 'sent_by']
+    MAX_DAYS = 731
+
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    group_by = serializers.CharField(required=False, default='day')
+    notification_type = serializers.ChoiceField(
+        choices=NotificationHistory.NOTIFICATION_TYPES, required=False
+    )
+    status = serializers.ChoiceField(
+        choices=NotificationHistory.STATUS_CHOICES, required=False
+    )
+    sent_by = serializers.IntegerField(required=False)
+
+    def validate_group_by(self, value):
+        fields = [field.strip() for field in value.split(',') if field.strip()]
+        invalid = [field for field in fields if field not in self.GROUP_BY_CHOICES]
+        if invalid:
+            raise serializers.ValidationError(
+                f"Valores no válidos: {', '.join(invalid)}. "
+                f"Opciones: {', '.join(self.GROUP_BY_CHOICES)}"
+            )
+        return fields or ['day']
+
+    def validate(self, attrs):
+        today = timezone.localdate()
+        attrs.setdefault('date_to', today)
+        attrs.setdefault('date_from', attrs['date_to'] - timedelta(days=29))
+        if attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError(
+                {'date_to': 'Debe ser igual o posterior a date_from'}
+            )
+        if (attrs['date_to'] - attrs['date_from']).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(
+                {'date_from': f'El rango no puede superar {self.MAX_DAYS} días'}
+            )
+        return attrs
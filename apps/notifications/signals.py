@@ -0,0 +1,55 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from fcm_django.models import FCMDevice
+
+from . import counters
+from .models import NotificationHistory
+
+
+def _device_state(device):
+    """``(user_id, active)`` tal como se cargó, sin consultar campos diferidos"""
+    if 'active' not in device.__dict__ or 'user_id' not in device.__dict__:
+        return None
+    return device.user_id, device.active
+
+
+@receiver(post_init, sender=FCMDevice)
+def recordar_estado_dispositivo(sender, instance, **kwargs):
+    """Guarda el estado inicial para calcular el cambio al guardar"""
+    instance._counter_state = _device_state(instance) if instance.pk else None
+
+
+@receiver(post_save, sender=FCMDevice)
+def actualizar_contadores_dispositivo(sender, instance, created, **kwargs):
+    """Mantiene los contadores de dispositivos activos y usuarios"""
+    old_state = None if created else instance._counter_state
+    if not created and old_state is None:
+        # Instancia cargada con campos diferidos: no se sabe qué cambió
+        counters.rebuild_device_counters()
+    else:
+        counters.device_changed(instance.pk, old_state, _device_state(instance))
+    instance._counter_state = _device_state(instance)
+
+
+@receiver(post_delete, sender=FCMDevice)
+def descontar_dispositivo(sender, instance, origin=None, **kwargs):
+    counters.device_deleted(instance.pk, _device_state(instance), origin)
+
+
+@receiver(post_init, sender=NotificationHistory)
+def recordar_estado_notificacion(sender, instance, **kwargs):
+    instance._counter_status = instance.__dict__.get('status') if instance.pk else None
+
+
+@receiver(post_save, sender=NotificationHistory)
+def actualizar_contadores_notificacion(sender, instance, created, **kwargs):
+    """Mantiene el total de notificaciones y los enviados por día"""
+    old_status = None if created else instance._counter_status
+    if created or old_status is not None:
+        counters.notification_changed(instance, old_status)
+    instance._counter_status = instance.status
+
+
+@receiver(post_delete, sender=NotificationHistory)
+def descontar_notificacion(sender, instance, **kwargs):
+    counters.notification_changed(instance, instance.status, deleted=True)
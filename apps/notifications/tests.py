@@ -1,3 +1,802 @@
-from django.test import TestCase
+import gzip
+import json
+import tempfile
+import threading
+from datetime import datetime, time, timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from fcm_django.models import FCMDevice
+from fcm_django.settings import FCM_DJANGO_SETTINGS
+from firebase_admin import exceptions, messaging
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from . import counters, fanout, jobs, topics
+from .admin_views import history_page, search_users
+from .models import NotificationDailyRollup, NotificationHistory
+from .retention import archive_notifications
+from .rollups import archived_before, rebuild_rollups, record_send, set_archived_before
+from .segments import parse_segment, segment_devices
+
+User = get_user_model()
+
+
+def crear_usuario(username):
+    return User.objects.create(username=username, email=f'{username}@example.com')
+
+
+def crear_dispositivos(cantidad, user=None, prefijo='token'):
+    """Dispositivos activos con tokens ``{prefijo}-{n}``, en orden de id"""
+    FCMDevice.objects.bulk_create(
+        FCMDevice(registration_id=f'{prefijo}-{n}', type='android', user=user)
+        for n in range(cantidad)
+    )
+    return list(
+        FCMDevice.objects.filter(registration_id__startswith=f'{prefijo}-')
+        .order_by('id').values_list('id', flat=True)
+    )
+
+
+def crear_historial(sent_by, day, status='sent', notification_type='broadcast', **counts):
+    """Envío terminado creado al mediodía (hora local) de ``day``"""
+    created_at = datetime.combine(day, time(12), tzinfo=timezone.get_current_timezone())
+    return NotificationHistory.objects.create(
+        title='Título', body='Mensaje', sent_by=sent_by, status=status,
+        notification_type=notification_type, created_at=created_at, **counts,
+    )
+
+
+def respuesta_fcm(tokens):
+    """Respuesta de ``send_each_for_multicast`` con todos los envíos exitosos"""
+    return SimpleNamespace(success_count=len(tokens), failure_count=0, responses=[])
+
+
+class JobTestCase(TestCase):
+    """Envía por FCM con ``send_multicast`` simulado y sin tópicos"""
+
+    def setUp(self):
+        self.admin = crear_usuario('admin')
+        self.enviados = []
+
+        def send_multicast(tokens, title, body, data=None):
+            self.enviados.extend(tokens)
+            return respuesta_fcm(tokens)
+
+        for patcher in (
+            mock.patch.object(fanout, 'send_multicast', side_effect=send_multicast),
+            mock.patch.object(jobs, 'topic_mode_enabled', return_value=False),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def encolar(self, notification_type='broadcast', **kwargs):
+        return jobs.enqueue_notification(
+            'Título', 'Mensaje', notification_type, sent_by=self.admin, **kwargs
+        )
+
+
+class FanOutTests(JobTestCase):
+    """Envío por lotes multicast en paralelo"""
+
+    def test_lotes_y_totales(self):
+        ids = crear_dispositivos(7)
+        FCMDevice.objects.filter(id=ids[2]).update(active=False)
+        lotes = []
+
+        def send_multicast(tokens, title, body, data=None):
+            lotes.append(list(tokens))
+            self.enviados.extend(tokens)
+            return respuesta_fcm(tokens)
+
+        with mock.patch.object(fanout, 'send_multicast', side_effect=send_multicast):
+            result = fanout.fan_out(
+                FCMDevice.objects.all(), 'Título', 'Mensaje', workers=2, batch_size=2
+            )
+
+        self.assertEqual(sorted(len(lote) for lote in lotes), [2, 2, 2])
+        self.assertEqual(sorted(self.enviados), [f'token-{n}' for n in range(7) if n != 2])
+        self.assertEqual(result.as_dict(), {
+            'devices_count': 6, 'success_count': 6, 'failure_count': 0,
+            'pruned_count': 0, 'batches': 3,
+        })
+        self.assertEqual(result.status, 'sent')
+
+    def test_lote_fallido_no_interrumpe_el_resto(self):
+        crear_dispositivos(5)
+
+        def send_multicast(tokens, title, body, data=None):
+            if 'token-0' in tokens:
+                raise RuntimeError('FCM no disponible')
+            return respuesta_fcm(tokens)
+
+        with mock.patch.object(fanout, 'send_multicast', side_effect=send_multicast), \
+                self.assertLogs('apps.notifications.fanout', 'WARNING'):
+            result = fanout.fan_out(FCMDevice.objects.all(), 'Título', 'Mensaje', batch_size=2)
+
+        self.assertEqual(
+            (result.devices_count, result.success_count, result.failure_count), (5, 3, 2)
+        )
+        self.assertEqual(result.errors, ['FCM no disponible'])
+
+    def test_sin_dispositivos(self):
+        result = fanout.fan_out(FCMDevice.objects.all(), 'Título', 'Mensaje')
+
+        self.assertEqual((result.batches, result.devices_count, result.status), (0, 0, 'sent'))
+        self.assertEqual(self.enviados, [])
+
+    @override_settings(NOTIFICATIONS_FANOUT={'BATCH_SIZE': 10_000, 'WORKERS': 1})
+    def test_lote_limitado_al_maximo_de_fcm(self):
+        crear_dispositivos(3)
+
+        with mock.patch.object(fanout, 'MAX_BATCH_SIZE', 2):
+            result = fanout.fan_out(FCMDevice.objects.all(), 'Título', 'Mensaje')
+
+        self.assertEqual((result.batches, result.devices_count), (2, 3))
+
+
+class PruneDevicesTests(TestCase):
+    """Depuración de dispositivos con tokens inválidos"""
+
+    def setUp(self):
+        self.ids = crear_dispositivos(5)
+        # token-0 y token-3: no registrados; token-1: error transitorio
+        errores = {
+            'token-0': messaging.UnregisteredError('Token no registrado'),
+            'token-1': exceptions.UnavailableError('FCM no disponible'),
+            'token-3': messaging.UnregisteredError('Token no registrado'),
+        }
+
+        def send_multicast(tokens, title, body, data=None):
+            responses = [
+                SimpleNamespace(success=token not in errores, exception=errores.get(token))
+                for token in tokens
+            ]
+            fallidos = sum(not item.success for item in responses)
+            return SimpleNamespace(
+                success_count=len(tokens) - fallidos, failure_count=fallidos, responses=responses
+            )
+
+        patcher = mock.patch.object(fanout, 'send_multicast', side_effect=send_multicast)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def enviar(self):
+        return fanout.fan_out(FCMDevice.objects.all(), 'Título', 'Mensaje', batch_size=2)
+
+    def test_desactiva_solo_tokens_no_registrados(self):
+        with mock.patch.dict(FCM_DJANGO_SETTINGS, {'DELETE_INACTIVE_DEVICES': False}):
+            result = self.enviar()
+
+        self.assertEqual(
+            (result.success_count, result.failure_count, result.pruned_count), (2, 3, 2)
+        )
+        self.assertCountEqual(
+            FCMDevice.objects.filter(active=False).values_list('registration_id', flat=True),
+            ['token-0', 'token-3'],
+        )
+        self.assertEqual(FCMDevice.objects.count(), 5)
+
+    def test_elimina_si_delete_inactive_devices(self):
+        with mock.patch.dict(FCM_DJANGO_SETTINGS, {'DELETE_INACTIVE_DEVICES': True}):
+            result = self.enviar()
+
+        self.assertEqual(result.pruned_count, 2)
+        self.assertCountEqual(
+            FCMDevice.objects.values_list('registration_id', flat=True),
+            ['token-1', 'token-2', 'token-4'],
+        )
+
+    def test_invalid_argument_solo_por_el_token(self):
+        token = exceptions.InvalidArgumentError('Token inválido', cause='Invalid registration')
+        payload = exceptions.InvalidArgumentError('Payload inválido')
+
+        self.assertTrue(fanout.is_invalid_token_error(token))
+        self.assertFalse(fanout.is_invalid_token_error(payload))
+        self.assertTrue(fanout.is_invalid_token_error(messaging.SenderIdMismatchError('x')))
+
+
+class ClaimJobTests(JobTestCase):
+    """Toma de envíos de la cola, recuperación y destino"""
+
+    def test_toma_el_pendiente_mas_antiguo(self):
+        primero = self.encolar()
+        segundo = self.encolar()
+        NotificationHistory.objects.filter(pk=segundo.pk).update(
+            created_at=primero.created_at - timedelta(minutes=1)
+        )
+
+        job = jobs.claim_next_job()
+        self.assertEqual(job.pk, segundo.pk)
+        self.assertEqual(job.status, 'processing')
+        self.assertIsNotNone(job.lease_id)
+        self.assertIsNotNone(job.checkpoint_at)
+
+        self.assertEqual(jobs.claim_next_job().pk, primero.pk)
+        self.assertIsNone(jobs.claim_next_job())
+
+    def test_respeta_scheduled_for(self):
+        programado = self.encolar(scheduled_for=timezone.now() + timedelta(hours=1))
+        self.assertIsNone(jobs.claim_next_job())
+
+        NotificationHistory.objects.filter(pk=programado.pk).update(
+            scheduled_for=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(jobs.claim_next_job().pk, programado.pk)
+
+    def test_cada_toma_genera_un_lease_nuevo(self):
+        self.encolar()
+        job = jobs.claim_next_job()
+
+        self.assertEqual(jobs.recover_stale_jobs(stale_after=60), 0)
+        NotificationHistory.objects.filter(pk=job.pk).update(
+            checkpoint_at=timezone.now() - timedelta(minutes=5)
+        )
+        with self.assertLogs('apps.notifications.jobs', 'WARNING'):
+            self.assertEqual(jobs.recover_stale_jobs(stale_after=60), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.lease_id), ('pending', None))
+
+        retomado = jobs.claim_next_job()
+        self.assertEqual(retomado.pk, job.pk)
+        self.assertIsNotNone(retomado.lease_id)
+
+    def test_envio_a_usuario(self):
+        destino = crear_usuario('destino')
+        crear_dispositivos(2, user=destino, prefijo='destino')
+        crear_dispositivos(3, prefijo='anonimo')
+        self.encolar('user', target_user=destino)
+
+        self.assertEqual(jobs.run_worker(once=True), 1)
+
+        job = NotificationHistory.objects.get()
+        self.assertEqual((job.status, job.devices_count, job.success_count), ('sent', 2, 2))
+        self.assertEqual(sorted(self.enviados), ['destino-0', 'destino-1'])
+
+    def test_usuario_eliminado_falla_sin_enviar(self):
+        destino = crear_usuario('destino')
+        crear_dispositivos(3, prefijo='anonimo')
+        job = self.encolar('user', target_user=destino)
+        destino.delete()
+
+        with self.assertLogs('apps.notifications.jobs', 'ERROR'):
+            jobs.process_job(jobs.claim_next_job())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.error_message, 'El usuario destino ya no existe')
+        self.assertEqual(self.enviados, [])
+
+
+class SegmentTests(JobTestCase):
+    """Segmentos de audiencia resueltos como un queryset de dispositivos"""
+
+    url = '/api/v1/notifications/segment/'
+
+    def setUp(self):
+        super().setUp()
+        self.admin.is_staff = True
+        self.admin.save()
+        hace_un_anio = timezone.now() - timedelta(days=365)
+        usuarios = {
+            'v-antiguo': {'tipo_documento': 'V', 'date_joined': hace_un_anio},
+            'v-nuevo': {'tipo_documento': 'V'},
+            'e-nuevo': {'tipo_documento': 'E'},
+        }
+        for username, campos in usuarios.items():
+            user = User.objects.create(username=username, **campos)
+            for tipo in ('android', 'ios'):
+                FCMDevice.objects.create(
+                    user=user, type=tipo, registration_id=f'{username}-{tipo}'
+                )
+        FCMDevice.objects.filter(registration_id='v-nuevo-ios').update(active=False)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def tokens(self, segment):
+        return sorted(
+            segment_devices(segment).filter(active=True)
+            .values_list('registration_id', flat=True)
+        )
+
+    def test_criterios_se_combinan_con_and(self):
+        self.assertEqual(
+            self.tokens({'tipo_documento': ['V']}),
+            ['v-antiguo-android', 'v-antiguo-ios', 'v-nuevo-android'],
+        )
+        self.assertEqual(
+            self.tokens({'tipo_documento': ['V', 'E'], 'device_type': ['ios']}),
+            ['e-nuevo-ios', 'v-antiguo-ios'],
+        )
+        desde = (timezone.now() - timedelta(days=30)).isoformat()
+        self.assertEqual(
+            self.tokens({'tipo_documento': ['V'], 'date_joined_from': desde}),
+            ['v-nuevo-android'],
+        )
+        self.assertEqual(self.tokens({'is_staff': True}), [])
+
+    def test_validacion(self):
+        hoy = timezone.now()
+        for segment in (
+            {},
+            {'tipo_documento': []},
+            {'tipo_documento': ['X']},
+            {'device_type': ['blackberry']},
+            {'date_joined_from': hoy.isoformat(), 'date_joined_to': hoy.isoformat()},
+        ):
+            with self.subTest(segment=segment), self.assertRaises(ValidationError):
+                parse_segment(segment)
+
+        self.assertEqual(parse_segment({'is_staff': 'false'}), {'is_staff': False})
+
+    def test_preview_cuenta_solo_dispositivos_activos(self):
+        response = self.client.post(
+            self.url, {'segment': {'tipo_documento': ['V']}, 'preview': True}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['devices_count'], 3)
+        self.assertFalse(NotificationHistory.objects.exists())
+
+    def test_segmento_invalido_o_sin_permiso(self):
+        response = self.client.post(
+            self.url, {'title': 'T', 'body': 'B', 'segment': {}}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+        self.client.force_authenticate(User.objects.get(username='v-nuevo'))
+        response = self.client.post(
+            self.url, {'segment': {'is_staff': False}, 'preview': True}, format='json'
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_envio_al_segmento(self):
+        response = self.client.post(self.url, {
+            'title': 'Título', 'body': 'Mensaje', 'segment': {'device_type': ['android']},
+        }, format='json')
+        self.assertEqual(response.status_code, 202)
+
+        jobs.process_job(jobs.claim_next_job())
+
+        job = NotificationHistory.objects.get(pk=response.json()['job_id'])
+        self.assertEqual((job.notification_type, job.segment), ('segment', {'device_type': ['android']}))
+        self.assertEqual(
+            sorted(self.enviados), ['e-nuevo-android', 'v-antiguo-android', 'v-nuevo-android']
+        )
+        self.assertEqual(job.devices_count, 3)
+
+
+class FakeClock:
+    """Reemplazo de ``time.monotonic`` que solo avanza a mano"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TokenBucketTests(TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(fanout.time, 'monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.sleep = mock.Mock()
+
+    def test_rafaga_sin_espera(self):
+        bucket = fanout.TokenBucket(rate=100, capacity=500)
+
+        self.assertEqual(bucket.acquire(500, sleep=self.sleep), 0)
+        self.sleep.assert_not_called()
+
+    def test_deuda_se_paga_esperando(self):
+        bucket = fanout.TokenBucket(rate=100, capacity=200)
+
+        bucket.acquire(200, sleep=self.sleep)
+        self.assertAlmostEqual(bucket.acquire(50, sleep=self.sleep), 0.5)
+        self.sleep.assert_called_once_with(0.5)
+
+        # Un lote mayor que la capacidad también pasa
+        self.clock.now += 10
+        self.assertAlmostEqual(bucket.acquire(300, sleep=self.sleep), 1)
+
+    def test_recarga_limitada_a_la_capacidad(self):
+        bucket = fanout.TokenBucket(rate=100, capacity=200)
+        bucket.acquire(200, sleep=self.sleep)
+
+        self.clock.now += 60
+        self.assertEqual(bucket.acquire(200, sleep=self.sleep), 0)
+        self.assertAlmostEqual(bucket.acquire(100, sleep=self.sleep), 1)
+
+
+@override_settings(NOTIFICATIONS_FANOUT={'BATCH_SIZE': 2, 'WORKERS': 3, 'RATE_LIMIT': 0})
+class CheckpointTests(JobTestCase):
+    """Checkpoints, reanudación y lease de los envíos por lotes"""
+
+    def setUp(self):
+        super().setUp()
+        self.ids = crear_dispositivos(7)
+
+    def test_checkpoint_solo_cuenta_el_prefijo_terminado(self):
+        # El primer lote termina después que los siguientes
+        liberar = threading.Event()
+
+        def send_multicast(tokens, title, body, data=None):
+            if tokens[0] == 'token-0':
+                liberar.wait(5)
+            elif tokens[0] == 'token-4':
+                liberar.set()
+            return respuesta_fcm(tokens)
+
+        checkpoints = []
+        with mock.patch.object(fanout, 'send_multicast', side_effect=send_multicast):
+            result = fanout.fan_out(
+                FCMDevice.objects.all(), 'Título', 'Mensaje',
+                checkpoint=lambda last_id, result: checkpoints.append(
+                    (last_id, result.devices_count)
+                ),
+            )
+
+        self.assertEqual(result.devices_count, 7)
+        self.assertEqual(checkpoints[-1], (self.ids[-1], 7))
+        for last_id, devices in checkpoints:
+            self.assertEqual(devices, self.ids.index(last_id) + 1)
+
+    def test_reanuda_desde_el_checkpoint(self):
+        job = self.encolar()
+        NotificationHistory.objects.filter(pk=job.pk).update(
+            last_device_id=self.ids[3], devices_count=4, success_count=4
+        )
+
+        jobs.process_job(jobs.claim_next_job())
+
+        job.refresh_from_db()
+        self.assertEqual(sorted(self.enviados), ['token-4', 'token-5', 'token-6'])
+        self.assertEqual((job.status, job.devices_count, job.success_count), ('sent', 7, 7))
+        self.assertEqual(job.last_device_id, self.ids[-1])
+
+    @override_settings(NOTIFICATIONS_FANOUT={'BATCH_SIZE': 2, 'WORKERS': 1, 'RATE_LIMIT': 0})
+    def test_lease_perdido_abandona_el_envio(self):
+        job = self.encolar()
+        claimed = jobs.claim_next_job()
+
+        update_leased = jobs.update_leased
+
+        def checkpoint_y_recuperacion(job_, **fields):
+            update_leased(job_, **fields)
+            # Tras el primer checkpoint otro worker lo recupera como abandonado
+            NotificationHistory.objects.filter(pk=job.pk).update(status='pending', lease_id=None)
+
+        with mock.patch.object(jobs, 'update_leased', side_effect=checkpoint_y_recuperacion), \
+                self.assertLogs('apps.notifications.jobs', 'WARNING'):
+            jobs.process_job(claimed)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'pending')
+        self.assertEqual((job.last_device_id, job.devices_count), (self.ids[1], 2))
+
+    def test_heartbeat_mientras_espera_al_limitador(self):
+        heartbeats = []
+
+        fanout.fan_out(
+            FCMDevice.objects.all(), 'Título', 'Mensaje',
+            limiter=fanout.TokenBucket(rate=100, capacity=1),
+            heartbeat=lambda: heartbeats.append(1), heartbeat_interval=0.005,
+        )
+
+        self.assertGreater(len(heartbeats), 0)
+        self.assertEqual(len(self.enviados), 7)
+
+
+class HistoryPageTests(TestCase):
+    """Historial del admin paginado por keyset sobre (created_at, id)"""
+
+    def setUp(self):
+        self.admin = crear_usuario('admin')
+        self.admin.is_staff = True
+        self.admin.save()
+        ahora = timezone.now().replace(microsecond=0)
+        # Grupos de filas con el mismo created_at que cruzan los límites de página
+        momentos = [ahora] * 3 + [ahora - timedelta(hours=1)] * 3 + [ahora - timedelta(days=2)]
+        for numero, created_at in enumerate(momentos):
+            NotificationHistory.objects.create(
+                title=f'Envío {numero}', body='Mensaje', sent_by=self.admin,
+                status='failed' if numero % 3 == 0 else 'sent', created_at=created_at,
+            )
+
+    def recorrer(self, params, page_size=2):
+        ids, cursor = [], None
+        while True:
+            notifications, _, cursor = history_page(dict(params, cursor=cursor or ''), page_size)
+            self.assertLessEqual(len(notifications), page_size)
+            ids += [n.id for n in notifications]
+            if cursor is None:
+                return ids
+
+    def test_sin_duplicados_ni_huecos(self):
+        esperado = list(
+            NotificationHistory.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        for page_size in (1, 2, 3, 7):
+            with self.subTest(page_size=page_size):
+                self.assertEqual(self.recorrer({}, page_size), esperado)
+
+    def test_filtros(self):
+        fallidos = NotificationHistory.objects.filter(status='failed')
+        self.assertCountEqual(self.recorrer({'status': 'failed'}), fallidos.values_list('id', flat=True))
+
+        hoy = timezone.localdate().isoformat()
+        ids = self.recorrer({'date_from': hoy, 'date_to': hoy, 'status': 'desconocido'})
+        self.assertEqual(len(ids), 6)
+
+    def test_cursor_invalido_empieza_desde_el_principio(self):
+        primera, _, _ = history_page({}, 2)
+        pagina, _, _ = history_page({'cursor': 'no-es-un-cursor'}, 2)
+        self.assertEqual(pagina, primera)
+
+    def test_vista_json(self):
+        self.client.force_login(self.admin)
+        url = reverse('admin:notification_history_json')
+
+        primera = self.client.get(url, {'status': 'sent'}).json()
+        self.assertEqual(primera['count'], 4)
+        self.assertIsNone(primera['next'])
+        self.assertIn('Envío 1', primera['html'])
+
+
+class UserSearchTests(TestCase):
+    """Autocompletado de usuarios del formulario de envío (por prefijo)"""
+
+    def setUp(self):
+        for username, first_name, last_name in (
+            ('ana.perez', 'Ana', 'Pérez'),
+            ('andres', 'Andrés', 'Gómez'),
+            ('maria', 'María', 'Anzola'),
+            ('juana', 'Juana', 'Pérez'),
+        ):
+            User.objects.create(username=username, first_name=first_name, last_name=last_name)
+
+    def usernames(self, query, **kwargs):
+        return [user.username for user in search_users(query, **kwargs)]
+
+    def test_prefijo_en_username_nombre_o_apellido(self):
+        self.assertEqual(self.usernames('an'), ['ana.perez', 'andres', 'maria'])
+        self.assertEqual(self.usernames('ANZ'), ['maria'])
+        # "juana" contiene "ana" pero no empieza por ella
+        self.assertNotIn('juana', self.usernames('ana'))
+
+    def test_nombre_y_apellido(self):
+        self.assertEqual(self.usernames('ana p'), ['ana.perez'])
+        self.assertEqual(self.usernames('juana g'), [])
+        self.assertEqual(self.usernames('  '), [])
+
+    def test_limite(self):
+        self.assertEqual(self.usernames('an', limit=2), ['ana.perez', 'andres'])
+
+    def test_vista_limita_y_acota_el_limite(self):
+        staff = User.objects.create(username='staff', is_staff=True)
+        self.client.force_login(staff)
+        url = reverse('admin:ajax_user_search')
+
+        response = self.client.get(url, {'q': 'an', 'limit': '1'})
+        self.assertEqual(response.json()['results'][0]['username'], 'ana.perez')
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertEqual(response['Cache-Control'], 'private, max-age=30')
+        for limit in ('0', 'x', '1000'):
+            response = self.client.get(url, {'q': 'a', 'limit': limit})
+            self.assertGreaterEqual(len(response.json()['results']), 1)
+
+    def test_vista_solo_staff(self):
+        self.client.force_login(User.objects.get(username='maria'))
+
+        response = self.client.get(reverse('admin:ajax_user_search'), {'q': 'an'})
+        self.assertEqual(response.status_code, 302)
+
+
+class DeviceCounterTests(TestCase):
+    """Contadores de dispositivos mantenidos por señales"""
+
+    claves = (counters.ACTIVE_DEVICES, counters.USERS_WITH_DEVICES)
+
+    def setUp(self):
+        self.user = crear_usuario('cliente')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def contadores(self):
+        return tuple(counters.get_counters(*self.claves).values())
+
+    def test_alta_y_baja_por_la_api(self):
+        FCMDevice.objects.create(registration_id='tok-1', type='android', user=self.user)
+        FCMDevice.objects.create(registration_id='tok-2', type='android', user=self.user)
+        self.assertEqual(self.contadores(), (2, 1))
+
+        with mock.patch.object(topics, 'topic_mode_enabled', return_value=True), \
+                mock.patch.object(topics, 'unsubscribe') as unsubscribe:
+            response = self.client.delete('/api/v1/fcm/devices/tok-1/')
+        self.assertEqual(response.status_code, 204)
+        unsubscribe.assert_called_once_with(['tok-1'])
+        self.assertEqual(self.contadores(), (1, 1))
+
+        self.client.delete('/api/v1/fcm/devices/tok-2/')
+        self.assertEqual(self.contadores(), (0, 0))
+        counters.rebuild_device_counters()
+        self.assertEqual(self.contadores(), (0, 0))
+
+
+class RollupTests(TestCase):
+    """Resúmenes diarios: suma incremental, recálculo y analítica"""
+
+    def setUp(self):
+        self.admin = crear_usuario('admin')
+        self.hoy = timezone.localdate()
+        self.ayer = self.hoy - timedelta(days=1)
+
+    def resumen(self):
+        return sorted(
+            NotificationDailyRollup.objects.values_list(
+                'day', 'notification_type', 'status', 'notifications',
+                'devices_count', 'success_count',
+            )
+        )
+
+    def test_rebuild_agrupa_por_dia_tipo_estado_y_remitente(self):
+        crear_historial(self.admin, self.ayer, devices_count=10, success_count=9)
+        crear_historial(self.admin, self.ayer, devices_count=5, success_count=5)
+        crear_historial(self.admin, self.ayer, status='failed', devices_count=3)
+        crear_historial(self.admin, self.hoy, notification_type='user', devices_count=1, success_count=1)
+        crear_historial(self.admin, self.hoy, status='pending')
+
+        self.assertEqual(rebuild_rollups(), 3)
+        self.assertEqual(self.resumen(), [
+            (self.ayer, 'broadcast', 'failed', 1, 3, 0),
+            (self.ayer, 'broadcast', 'sent', 2, 15, 14),
+            (self.hoy, 'user', 'sent', 1, 1, 1),
+        ])
+
+    def test_rebuild_de_un_rango_no_toca_el_resto(self):
+        crear_historial(self.admin, self.ayer, devices_count=2, success_count=2)
+        crear_historial(self.admin, self.hoy, devices_count=4, success_count=4)
+        rebuild_rollups()
+        NotificationHistory.objects.filter(created_at__date=self.ayer).delete()
+        crear_historial(self.admin, self.hoy, devices_count=1, success_count=1)
+
+        rebuild_rollups(date_from=self.hoy, date_to=self.hoy)
+        self.assertEqual(self.resumen(), [
+            (self.ayer, 'broadcast', 'sent', 1, 2, 2),
+            (self.hoy, 'broadcast', 'sent', 2, 5, 5),
+        ])
+
+    def test_rebuild_no_recalcula_dias_archivados(self):
+        crear_historial(self.admin, self.ayer, devices_count=2, success_count=2)
+        rebuild_rollups()
+        NotificationHistory.objects.all().delete()
+        set_archived_before(self.hoy)
+
+        rebuild_rollups()
+        self.assertEqual(self.resumen(), [(self.ayer, 'broadcast', 'sent', 1, 2, 2)])
+
+    def test_record_send_coincide_con_rebuild(self):
+        for counts in ({'devices_count': 3, 'success_count': 3}, {'devices_count': 2}):
+            record_send(crear_historial(self.admin, self.hoy, **counts))
+        record_send(crear_historial(self.admin, self.hoy, status='processing'))
+        incremental = self.resumen()
+
+        rebuild_rollups()
+        self.assertEqual(self.resumen(), incremental)
+        self.assertEqual(incremental, [(self.hoy, 'broadcast', 'sent', 2, 5, 3)])
+
+    def test_analitica(self):
+        self.admin.is_staff = True
+        self.admin.save()
+        crear_historial(self.admin, self.ayer, devices_count=10, success_count=9)
+        crear_historial(self.admin, self.hoy, status='failed', devices_count=3)
+        rebuild_rollups()
+        client = APIClient()
+        client.force_authenticate(self.admin)
+
+        response = client.get('/api/v1/notifications/analytics/', {'group_by': 'status'})
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['totals']['notifications'], 2)
+        self.assertEqual(body['totals']['devices_count'], 13)
+        self.assertEqual(
+            [(row['status'], row['notifications']) for row in body['results']],
+            [('failed', 1), ('sent', 1)],
+        )
+
+
+@override_settings(NOTIFICATIONS_RETENTION={
+    'DAYS': 30, 'ARCHIVE': True, 'ARCHIVE_DIR': None, 'BATCH_SIZE': 2, 'SEGMENT_ROWS': 3,
+})
+class RetentionTests(TestCase):
+    """Archivado por lotes: filas eliminadas, segmentos, contadores y resúmenes"""
+
+    def setUp(self):
+        self.admin = crear_usuario('admin')
+        hoy = timezone.localdate()
+        self.viejo = hoy - timedelta(days=40)
+        self.reciente = hoy - timedelta(days=5)
+        self.corte = hoy - timedelta(days=30)
+
+        self.expirados = [
+            crear_historial(self.admin, self.viejo, devices_count=2, success_count=2).id
+            for _ in range(4)
+        ]
+        self.expirados.append(crear_historial(self.admin, self.viejo, status='failed').id)
+        self.pendiente = crear_historial(self.admin, self.viejo, status='pending')
+        self.actual = crear_historial(self.admin, self.reciente)
+        counters.rebuild_counters()
+
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = directorio.name
+
+    def archivar(self, **kwargs):
+        return archive_notifications(archive_dir=self.directorio, **kwargs)
+
+    def test_elimina_solo_envios_terminados_expirados(self):
+        result = self.archivar()
+
+        self.assertEqual(result['deleted'], 5)
+        self.assertEqual(result['cutoff'].date(), self.corte)
+        self.assertFalse(NotificationHistory.objects.filter(id__in=self.expirados).exists())
+        self.assertCountEqual(
+            NotificationHistory.objects.values_list('id', flat=True),
+            [self.pendiente.id, self.actual.id],
+        )
+
+    def test_escribe_segmentos_gzip_legibles(self):
+        result = self.archivar()
+
+        # 5 filas en lotes de 2 y segmentos de 3 filas (se cierran por lote)
+        self.assertEqual(len(result['segments']), 2)
+        filas = []
+        for segment in result['segments']:
+            with gzip.open(segment, 'rt', encoding='utf-8') as archivo:
+                filas.extend(json.loads(linea) for linea in archivo)
+        self.assertEqual([fila['id'] for fila in filas], self.expirados)
+        self.assertEqual(filas[0]['title'], 'Título')
+
+    def test_sin_archivo_solo_elimina(self):
+        result = self.archivar(archive=False)
+
+        self.assertEqual((result['deleted'], result['segments']), (5, []))
+
+    def test_ajusta_contadores(self):
+        claves = (counters.TOTAL_NOTIFICATIONS, counters.sent_key(self.viejo),
+                  counters.sent_key(self.reciente))
+        self.assertEqual(counters.get_counters(*claves), dict(zip(claves, (7, 4, 1))))
+
+        self.archivar()
+        self.assertEqual(counters.get_counters(*claves), dict(zip(claves, (2, 0, 1))))
+
+    def test_conserva_resumenes_de_dias_archivados(self):
+        self.archivar()
+
+        self.assertEqual(archived_before(), self.corte)
+        filas = NotificationDailyRollup.objects.filter(day=self.viejo)
+        self.assertEqual(
+            sorted(filas.values_list('status', 'notifications', 'devices_count')),
+            [('failed', 1, 0), ('sent', 4, 8)],
+        )
+
+        rebuild_rollups()
+        self.assertEqual(filas.count(), 2)
+        self.assertTrue(NotificationDailyRollup.objects.filter(day=self.reciente).exists())
+
+    def test_dry_run_no_elimina(self):
+        salida = StringIO()
+        call_command('archive_notifications', '--dry-run', stdout=salida)
+
+        self.assertIn('5 envíos', salida.getvalue())
+        self.assertEqual(NotificationHistory.objects.count(), 7)
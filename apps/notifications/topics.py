@@ -0,0 +1,97 @@
+import logging
+
+from django.conf import settings
+from fcm_django.models import FCMDevice
+from fcm_django.settings import FCM_DJANGO_SETTINGS
+from firebase_admin import messaging
+
+from .fanout import iter_token_batches
+
+logger = logging.getLogger(__name__)
+
+# Límite de tokens por llamada de (des)suscripción a un tópico de FCM
+MAX_TOPIC_BATCH_SIZE = 1000
+
+
+def topic_mode_enabled():
+    """Indica si los broadcasts se envían como un mensaje a un tópico"""
+    return settings.NOTIFICATIONS_BROADCAST['MODE'] == 'topic'
+
+
+def broadcast_topic():
+    return settings.NOTIFICATIONS_BROADCAST['TOPIC']
+
+
+def _app():
+    return FCM_DJANGO_SETTINGS['DEFAULT_FIREBASE_APP']
+
+
+def subscribe(tokens, topic=None):
+    """Suscribe hasta 1000 tokens al tópico de broadcast"""
+    return messaging.subscribe_to_topic(tokens, topic or broadcast_topic(), app=_app())
+
+
+def unsubscribe(tokens, topic=None):
+    """Elimina hasta 1000 tokens del tópico de broadcast"""
+    return messaging.unsubscribe_from_topic(tokens, topic or broadcast_topic(), app=_app())
+
+
+def update_device_subscription(device, active=None):
+    """
+    Suscribe o desuscribe un dispositivo según su estado ``active`` (o
+    según ``active``, si se indica, sin modificar la instancia).
+
+    Se llama al registrar, actualizar o eliminar un dispositivo; los
+    errores de FCM se registran sin interrumpir el registro
+    (``sync_fcm_topic`` los corrige después).
+    """
+    if not topic_mode_enabled():
+        return
+    if active is None:
+        active = device.active
+    try:
+        if active:
+            subscribe([device.registration_id])
+        else:
+            unsubscribe([device.registration_id])
+    except Exception:
+        logger.warning(
+            'No se pudo actualizar la suscripción del dispositivo %s', device.id,
+            exc_info=True
+        )
+
+
+def send_to_topic(title, body, data=None, topic=None):
+    """Envía una notificación a todos los suscriptores del tópico"""
+    message = messaging.Message(
+        topic=topic or broadcast_topic(),
+        notification=messaging.Notification(title=title, body=body),
+        data=data or None,
+    )
+    return messaging.send(message, app=_app())
+
+
+def sync_topic(topic=None, batch_size=MAX_TOPIC_BATCH_SIZE):
+    """
+    Re-sincroniza la membresía del tópico con la tabla de dispositivos.
+
+    Suscribe los dispositivos activos y desuscribe los inactivos, en
+    lotes de hasta 1000 tokens (una llamada a FCM por lote). Suscribir
+    un token que ya lo estaba no tiene efecto, así que es idempotente.
+    """
+    topic = topic or broadcast_topic()
+    batch_size = min(batch_size, MAX_TOPIC_BATCH_SIZE)
+    totals = {'subscribed': 0, 'unsubscribed': 0, 'failed': 0}
+
+    devices = FCMDevice.objects.all()
+    for _ids, tokens in iter_token_batches(devices, batch_size):
+        response = subscribe(tokens, topic)
+        totals['subscribed'] += response.success_count
+        totals['failed'] += response.failure_count
+
+    for _ids, tokens in iter_token_batches(devices, batch_size, active=False):
+        response = unsubscribe(tokens, topic)
+        totals['unsubscribed'] += response.success_count
+        totals['failed'] += response.failure_count
+
+    return totals
@@ -2,7 +2,11 @@ from django.urls import path
 from .views import (
     SendTestNotificationView,
     SendNotificationToUserView,
-    SendBroadcastView
+    SendBroadcastView,
+    SendSegmentView,
+    NotificationHistoryListView,
+    NotificationJobStatusView,
+    NotificationAnalyticsView,
 )
 
 urlpatterns = [
@@ -12,4 +16,10 @@ urlpatterns = [
     # Endpoints para admins
     path('send-to-user/', SendNotificationToUserView.as_view(), name='send_to_user'),
     path('broadcast/', SendBroadcastView.as_view(), name='send_broadcast'),
+    path('segment/', SendSegmentView.as_view(), name='send_segment'),
+    path('history/', NotificationHistoryListView.as_view(), name='notification_history_list'),
+    path('analytics/', NotificationAnalyticsView.as_view(), name='notification_analytics'),
+
+    # Estado de un envío encolado
+    path('jobs/<int:pk>/', NotificationJobStatusView.as_view(), name='notification_job_status'),
 ]
@@ -1,22 +1,86 @@
 from rest_framework.views import APIView
+from rest_framework.generics import ListAPIView, RetrieveAPIView
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import serializers, status
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from fcm_django.api.rest_framework import FCMDeviceAuthorizedViewSet
 from fcm_django.models import FCMDevice
-from firebase_admin.messaging import Message, Notification
 from django.contrib.auth import get_user_model
+from django.db.models import Sum
+from django.urls import reverse
+from core.pagination import KeysetPagination
+from .jobs import enqueue_notification
+from .models import NotificationDailyRollup, NotificationHistory
+from .rollups import METRIC_FIELDS
+from .segments import parse_segment, segment_devices
+from .serializers import AnalyticsQuerySerializer, NotificationHistorySerializer
+from .topics import update_device_subscription
 
 User = get_user_model()
 
 
+class TopicFCMDeviceAuthorizedViewSet(FCMDeviceAuthorizedViewSet):
+    """
+    Registro de dispositivos de fcm-django que además mantiene la
+    suscripción al tópico de broadcast (solo en modo ``topic``)
+    """
+
+    def perform_create(self, serializer):
+        device = super().perform_create(serializer)
+        update_device_subscription(device)
+        return device
+
+    def perform_update(self, serializer):
+        device = super().perform_update(serializer)
+        update_device_subscription(device)
+        return device
+
+    def perform_destroy(self, instance):
+        # Sin tocar instance.active: post_delete descuenta el dispositivo
+        # de los contadores según su estado real
+        update_device_subscription(instance, active=False)
+        super().perform_destroy(instance)
+
+
+def parse_scheduled_for(request):
+    """Fecha opcional (``scheduled_for``) a partir de la cual enviar"""
+    value = request.data.get('scheduled_for')
+    if not value:
+        return None
+    try:
+        return serializers.DateTimeField().run_validation(value)
+    except serializers.ValidationError as exc:
+        raise serializers.ValidationError({'scheduled_for': exc.detail})
+
+
+SCHEDULED_FOR_SCHEMA = openapi.Schema(
+    type=openapi.TYPE_STRING,
+    format='date-time',
+    description='Enviar a partir de esta fecha (vacío = inmediatamente)'
+)
+
+
+def job_response(job):
+    """Respuesta 202 de un envío encolado"""
+    return Response({
+        'success': True,
+        'message': 'Notificación programada' if job.scheduled_for else 'Notificación encolada',
+        'job_id': job.id,
+        'status': job.status,
+        'scheduled_for': job.scheduled_for,
+        'status_url': reverse('notification_job_status', args=[job.id]),
+    }, status=status.HTTP_202_ACCEPTED)
+
+
 class SendTestNotificationView(APIView):
     """Endpoint para enviar notificaciones de prueba"""
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
-        operation_description="Enviar notificación de prueba al usuario autenticado",
+        operation_description="Encolar una notificación de prueba al usuario autenticado",
         request_body=openapi.Schema(
             type=openapi.TYPE_OBJECT,
             properties={
@@ -26,36 +90,27 @@ class SendTestNotificationView(APIView):
             },
             required=['title', 'body']
         ),
-        responses={200: "Notificación enviada", 404: "Sin dispositivos"},
+        responses={202: "Notificación encolada", 404: "Sin dispositivos"},
         tags=['Notificaciones']
     )
     def post(self, request):
-        """Enviar notificación de prueba"""
+        """Encolar notificación de prueba"""
         try:
             title = request.data.get('title', '🧪 Notificación de Prueba')
             body = request.data.get('body', 'Esta es una prueba desde Django')
             data = request.data.get('data', {'type': 'test', 'action': 'open_app'})
 
-            user_devices = FCMDevice.objects.filter(user=request.user, active=True)
-
-            if not user_devices.exists():
+            if not FCMDevice.objects.filter(user=request.user, active=True).exists():
                 return Response({
                     'success': False,
                     'error': 'No tienes dispositivos registrados'
                 }, status=status.HTTP_404_NOT_FOUND)
 
-            message = Message(
-                notification=Notification(title=title, body=body),
-                data=data
+            job = enqueue_notification(
+                title, body, 'test',
+                sent_by=request.user, target_user=request.user, data=data
             )
-
-            user_devices.send_message(message)
-
-            return Response({
-                'success': True,
-                'message': f'Notificación enviada a {user_devices.count()} dispositivos',
-                'devices_count': user_devices.count()
-            })
+            return job_response(job)
 
         except Exception as e:
             return Response({
@@ -69,7 +124,7 @@ class SendNotificationToUserView(APIView):
     permission_classes = [IsAdminUser]
 
     @swagger_auto_schema(
-        operation_description="Enviar notificación a usuario específico (solo admins)",
+        operation_description="Encolar notificación a usuario específico (solo admins)",
         request_body=openapi.Schema(
             type=openapi.TYPE_OBJECT,
             properties={
@@ -77,14 +132,17 @@ class SendNotificationToUserView(APIView):
                 'username': openapi.Schema(type=openapi.TYPE_STRING),
                 'title': openapi.Schema(type=openapi.TYPE_STRING),
                 'body': openapi.Schema(type=openapi.TYPE_STRING),
-                'data': openapi.Schema(type=openapi.TYPE_OBJECT)
+                'data': openapi.Schema(type=openapi.TYPE_OBJECT),
+                'scheduled_for': SCHEDULED_FOR_SCHEMA,
             },
             required=['title', 'body']
         ),
+        responses={202: "Notificación encolada", 404: "Usuario sin dispositivos"},
         tags=['Notificaciones Admin']
     )
     def post(self, request):
-        """Enviar notificación a usuario específico"""
+        """Encolar notificación a usuario específico"""
+        scheduled_for = parse_scheduled_for(request)
         try:
             user_id = request.data.get('user_id')
             username = request.data.get('username')
@@ -101,25 +159,17 @@ class SendNotificationToUserView(APIView):
             body = request.data.get('body')
             data = request.data.get('data', {})
 
-            user_devices = FCMDevice.objects.filter(user=target_user, active=True)
-            
-            if not user_devices.exists():
+            if not FCMDevice.objects.filter(user=target_user, active=True).exists():
                 return Response({
                     'error': f'Usuario {target_user.username} sin dispositivos'
                 }, status=status.HTTP_404_NOT_FOUND)
 
-            message = Message(
-                notification=Notification(title=title, body=body),
-                data=data
+            job = enqueue_notification(
+                title, body, 'user',
+                sent_by=request.user, target_user=target_user, data=data,
+                scheduled_for=scheduled_for
             )
-
-            user_devices.send_message(message)
-
-            return Response({
-                'success': True,
-                'message': f'Enviado a {target_user.username}',
-                'devices_count': user_devices.count()
-            })
+            return job_response(job)
 
         except User.DoesNotExist:
             return Response({'error': 'Usuario no encontrado'}, 
@@ -134,40 +184,229 @@ class SendBroadcastView(APIView):
     permission_classes = [IsAdminUser]
 
     @swagger_auto_schema(
-        operation_description="Enviar notificación a todos los usuarios",
+        operation_description="Encolar notificación a todos los usuarios",
         request_body=openapi.Schema(
             type=openapi.TYPE_OBJECT,
             properties={
                 'title': openapi.Schema(type=openapi.TYPE_STRING),
                 'body': openapi.Schema(type=openapi.TYPE_STRING),
-                'data': openapi.Schema(type=openapi.TYPE_OBJECT)
+                'data': openapi.Schema(type=openapi.TYPE_OBJECT),
+                'scheduled_for': SCHEDULED_FOR_SCHEMA,
             },
             required=['title', 'body']
         ),
+        responses={202: "Broadcast encolado"},
         tags=['Notificaciones Admin']
     )
     def post(self, request):
-        """Enviar broadcast"""
+        """Encolar broadcast"""
+        scheduled_for = parse_scheduled_for(request)
         try:
             title = request.data.get('title')
             body = request.data.get('body')
             data = request.data.get('data', {'type': 'broadcast'})
 
-            all_devices = FCMDevice.objects.filter(active=True)
+            # El worker lo envía en lotes multicast (ver fanout.py)
+            job = enqueue_notification(
+                title, body, 'broadcast', sent_by=request.user, data=data,
+                scheduled_for=scheduled_for
+            )
+            return job_response(job)
+
+        except Exception as e:
+            return Response({'error': str(e)}, 
+                          status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-            message = Message(
-                notification=Notification(title=title, body=body),
-                data=data
+
+class SendSegmentView(APIView):
+    """Enviar a un segmento de usuarios (solo admins)"""
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        operation_description="Encolar notificación a un segmento de usuarios. "
+                              "Con preview=true solo retorna el tamaño de la audiencia",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'title': openapi.Schema(type=openapi.TYPE_STRING),
+                'body': openapi.Schema(type=openapi.TYPE_STRING),
+                'data': openapi.Schema(type=openapi.TYPE_OBJECT),
+                'segment': openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'tipo_documento': openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(type=openapi.TYPE_STRING)
+                        ),
+                        'is_staff': openapi.Schema(type=openapi.TYPE_BOOLEAN),
+                        'date_joined_from': openapi.Schema(type=openapi.TYPE_STRING, format='date-time'),
+                        'date_joined_to': openapi.Schema(type=openapi.TYPE_STRING, format='date-time'),
+                        'last_login_from': openapi.Schema(type=openapi.TYPE_STRING, format='date-time'),
+                        'last_login_to': openapi.Schema(type=openapi.TYPE_STRING, format='date-time'),
+                        'device_type': openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(type=openapi.TYPE_STRING)
+                        ),
+                    }
+                ),
+                'scheduled_for': SCHEDULED_FOR_SCHEMA,
+                'preview': openapi.Schema(type=openapi.TYPE_BOOLEAN, default=False),
+            },
+            required=['title', 'body', 'segment']
+        ),
+        responses={202: "Notificación encolada", 200: "Tamaño de la audiencia", 400: "Segmento inválido"},
+        tags=['Notificaciones Admin']
+    )
+    def post(self, request):
+        """Encolar notificación a un segmento"""
+        segment = parse_segment(request.data.get('segment') or {})
+        scheduled_for = parse_scheduled_for(request)
+
+        if request.data.get('preview'):
+            devices_count = segment_devices(segment).filter(active=True).count()
+            return Response({'segment': segment, 'devices_count': devices_count})
+
+        title = request.data.get('title')
+        body = request.data.get('body')
+        if not title or not body:
+            return Response({'error': 'title y body requeridos'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        job = enqueue_notification(
+            title, body, 'segment',
+            sent_by=request.user, data=request.data.get('data', {}), segment=segment,
+            scheduled_for=scheduled_for
+        )
+        return job_response(job)
+
+
+class NotificationJobStatusView(RetrieveAPIView):
+    """
+    Estado de un envío encolado (pending → processing → sent/failed)
+
+    Cada usuario ve los envíos que hizo; los admins ven todos.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = NotificationHistorySerializer
+
+    def get_queryset(self):
+        queryset = NotificationHistory.objects.select_related('sent_by', 'target_user')
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(sent_by=self.request.user)
+
+    @swagger_auto_schema(
+        operation_description="Consultar el estado de un envío encolado",
+        tags=['Notificaciones']
+    )
+    def get(self, request, *args, **kwargs):
+        """Consultar estado del envío"""
+        return super().get(request, *args, **kwargs)
+
+
+class NotificationHistoryPagination(KeysetPagination):
+    """Keyset sobre (created_at, id): el historial crece sin límite"""
+    ordering = ('-created_at', '-id')
+
+
+class NotificationHistoryListView(ListAPIView):
+    """Historial de notificaciones paginado por keyset (solo admins)"""
+    permission_classes = [IsAdminUser]
+    serializer_class = NotificationHistorySerializer
+    pagination_class = NotificationHistoryPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['notification_type', 'status', 'sent_by', 'target_user']
+
+    def get_queryset(self):
+        return NotificationHistory.objects.select_related('sent_by', 'target_user')
+
+    @swagger_auto_schema(
+        operation_description="Listar el historial de notificaciones con "
+                              "paginación por cursor (sin COUNT ni OFFSET)",
+        manual_parameters=[
+            openapi.Parameter(
+                'include_total',
+                openapi.IN_QUERY,
+                description="Incluir el total de resultados (COUNT adicional)",
+                type=openapi.TYPE_BOOLEAN
             )
+        ],
+        tags=['Notificaciones Admin']
+    )
+    def get(self, request, *args, **kwargs):
+        """Listar historial de notificaciones"""
+        return super().get(request, *args, **kwargs)
 
-            all_devices.send_message(message)
 
-            return Response({
-                'success': True,
-                'message': 'Broadcast enviado',
-                'devices_count': all_devices.count()
-            })
+class NotificationAnalyticsView(APIView):
+    """
+    Analítica de envíos para gráficos (solo admins)
 
-        except Exception as e:
-            return Response({'error': str(e)}, 
-                          status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+    Lee ``NotificationDailyRollup`` (una row por día × tipo × estado ×
+    remitente), así que el costo depende de los días consultados y no
+    del tamaño del historial.
+    """
+    permission_classes = [IsAdminUser]
+
+    # Campo de la respuesta -> field del resumen
+    GROUP_FIELDS = {
+        'day': 'day',
+        'notification_type': 'notification_type',
+        'status': 'status',
+        'sent_by': 'sent_by_id',
+    }
+
+    @swagger_auto_schema(
+        operation_description="Totales de envíos agrupados por día, tipo, estado "
+                              "y/o remitente, a partir de los resúmenes diarios",
+        manual_parameters=[
+            openapi.Parameter('date_from', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              format='date', description="Desde (default: hace 29 días)"),
+            openapi.Parameter('date_to', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              format='date', description="Hasta, incluido (default: today)"),
+            openapi.Parameter('group_by', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="Lista separada por comas: day, "
+                                          "notification_type, status, sent_by (default: day)"),
+            openapi.Parameter('notification_type', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter('status', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter('sent_by', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        ],
+        responses={200: "Series agregadas", 400: "Parámetros inválidos"},
+        tags=['Notificaciones Admin']
+    )
+    def get(self, request):
+        """Totales agregados de envíos"""
+        serializer = AnalyticsQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        rollups = NotificationDailyRollup.objects.filter(
+            day__gte=params['date_from'], day__lte=params['date_to']
+        )
+        for field in ('notification_type', 'status'):
+            if field in params:
+                rollups = rollups.filter(**{field: params[field]})
+        if 'sent_by' in params:
+            rollups = rollups.filter(sent_by_id=params['sent_by'])
+
+        sums = {
+            'notifications': Sum('notifications'),
+            **{field: Sum(field) for field in METRIC_FIELDS},
+        }
+        columns = [self.GROUP_FIELDS[field] for field in params['group_by']]
+        rows = rollups.values(*columns).annotate(**sums).order_by(*columns)
+        totals = rollups.aggregate(**sums)
+
+        results = []
+        for row in rows:
+            item = {field: row[self.GROUP_FIELDS[field]] for field in params['group_by']}
+            item.update({field: row[field] or 0 for field in sums})
+            results.append(item)
+
+        return Response({
+            'date_from': params['date_from'],
+            'date_to': params['date_to'],
+            'group_by': params['group_by'],
+            'totals': {field: value or 0 for field, value in totals.items()},
+            'results': results,
+        })
@@ -1,3 +1,31 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Product, ProductImageVariant
+
+
+class ProductImageVariantInline(admin.TabularInline):
+    model = ProductImageVariant
+    extra = 0
+
+
+@admin.register(Product)
+class ProductAdmin(admin.ModelAdmin):
+    """
+    Productos sincronizados desde Strapi (solo lectura: se editan en Strapi)
+    """
+
+    list_display = ["strapi_id", "title", "strapi_updated_at", "fecha_sincronizacion"]
+    search_fields = ["title", "description"]
+    readonly_fields = [
+        "strapi_id",
+        "document_id",
+        "title",
+        "description",
+        "img",
+        "strapi_updated_at",
+        "fecha_sincronizacion",
+    ]
+    inlines = [ProductImageVariantInline]
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,191 @@
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Límites superiores (segundos) del histograma de latencia
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class CircuitOpenError(Exception):
+    """El circuito está abierto: no se consulta el upstream"""
+
+    def __init__(self, retry_after):
+        super().__init__("Circuito abierto: API de Strapi no disponible")
+        self.retry_after = retry_after
+
+
+class LatencyHistogram:
+    """Histograma acumulado de latencias (mismo formato que Prometheus)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        for index, limit in enumerate(self.buckets):
+            if seconds <= limit:
+                self.counts[index] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += 1
+        self.sum += seconds
+
+    def snapshot(self):
+        cumulative = 0
+        buckets = {}
+        for limit, count in zip((*self.buckets, "+Inf"), self.counts):
+            cumulative += count
+            buckets[str(limit)] = cumulative
+        return {"buckets": buckets, "count": self.total, "sum": round(self.sum, 6)}
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker con ventana deslizante de errores y latencia.
+
+    - ``closed``: las llamadas pasan; si en los últimos ``window``
+      segundos hubo al menos ``min_calls`` y la tasa de errores o de
+      llamadas lentas supera su umbral, el circuito se abre.
+    - ``open``: las llamadas fallan de inmediato con ``CircuitOpenError``
+      durante ``open_seconds``.
+    - ``half_open``: pasan hasta ``half_open_calls`` llamadas de prueba;
+      si todas salen bien el circuito se cierra y si alguna falla se
+      vuelve a abrir.
+
+    El estado es por proceso y seguro entre hilos; el cliente síncrono y
+    el asíncrono comparten la misma instancia.
+    """
+
+    def __init__(
+        self,
+        window=60,
+        min_calls=10,
+        error_rate=0.5,
+        slow_call=5,
+        slow_rate=0.5,
+        open_seconds=30,
+        half_open_calls=1,
+    ):
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call = slow_call
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+
+        self.state = CLOSED
+        self.opened_at = None
+        self.histogram = LatencyHistogram()
+        self._calls = deque()  # (instante, falló, lenta)
+        self._trial_calls = 0
+        self._trial_successes = 0
+        self._lock = threading.Lock()
+
+    def _trim(self, now):
+        while self._calls and self._calls[0][0] < now - self.window:
+            self._calls.popleft()
+
+    def _open(self, now):
+        self.state = OPEN
+        self.opened_at = now
+
+    def before_call(self):
+        """Autoriza una llamada o lanza ``CircuitOpenError``"""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                remaining = self.opened_at + self.open_seconds - now
+                if remaining > 0:
+                    raise CircuitOpenError(retry_after=remaining)
+                self.state = HALF_OPEN
+                self._trial_calls = self._trial_successes = 0
+
+            if self.state == HALF_OPEN:
+                if self._trial_calls >= self.half_open_calls:
+                    raise CircuitOpenError(retry_after=self.open_seconds)
+                self._trial_calls += 1
+
+    def record(self, duration, failed):
+        """Registra el resultado de una llamada autorizada"""
+        with self._lock:
+            now = time.monotonic()
+            self.histogram.observe(duration)
+            slow = duration >= self.slow_call
+
+            if self.state == HALF_OPEN:
+                if failed or slow:
+                    self._open(now)
+                    return
+                self._trial_successes += 1
+                if self._trial_successes >= self.half_open_calls:
+                    self.state = CLOSED
+                    self._calls.clear()
+                return
+
+            self._calls.append((now, failed, slow))
+            self._trim(now)
+            total = len(self._calls)
+            if self.state != CLOSED or total < self.min_calls:
+                return
+            failures = sum(1 for _, call_failed, _ in self._calls if call_failed)
+            slow_calls = sum(1 for _, _, call_slow in self._calls if call_slow)
+            if failures / total >= self.error_rate or slow_calls / total >= self.slow_rate:
+                self._open(now)
+
+    def snapshot(self):
+        """Estado actual, ventana y latencias para monitoreo"""
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            total = len(self._calls)
+            failures = sum(1 for _, failed, _ in self._calls if failed)
+            slow_calls = sum(1 for _, _, slow in self._calls if slow)
+            retry_after = None
+            if self.state == OPEN:
+                retry_after = max(0.0, self.opened_at + self.open_seconds - now)
+            return {
+                "state": self.state,
+                "retry_after": retry_after,
+                "window": {
+                    "seconds": self.window,
+                    "calls": total,
+                    "failures": failures,
+                    "slow_calls": slow_calls,
+                    "error_rate": failures / total if total else 0.0,
+                    "slow_rate": slow_calls / total if total else 0.0,
+                },
+                "latency": self.histogram.snapshot(),
+            }
+
+
+_breaker = None
+_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker():
+    """Retorna el circuit breaker de Strapi del proceso actual"""
+    global _breaker
+    if _breaker is None:
+        with _breaker_lock:
+            if _breaker is None:
+                config = settings.STRAPI_CIRCUIT_BREAKER
+                _breaker = CircuitBreaker(
+                    window=config["WINDOW"],
+                    min_calls=config["MIN_CALLS"],
+                    error_rate=config["ERROR_RATE"],
+                    slow_call=config["SLOW_CALL"],
+                    slow_rate=config["SLOW_RATE"],
+                    open_seconds=config["OPEN_SECONDS"],
+                    half_open_calls=config["HALF_OPEN_CALLS"],
+                )
+    return _breaker
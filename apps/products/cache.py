@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .breaker import CircuitOpenError
+from .services import fetch_products
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = "products:v2:page={page}:size={pageSize}:fields={fields}"
+REFRESH_LOCK_KEY = "{key}:refreshing"
+
+# Estados reportados en la cabecera X-Cache
+HIT = "HIT"
+STALE = "STALE"
+MISS = "MISS"
+FALLBACK = "FALLBACK"
+
+
+class _Flight:
+    """Petición en curso hacia Strapi compartida por varios hilos"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def _single_flight(key, fn):
+    """
+    Ejecuta ``fn`` una sola vez por clave aunque haya llamadas concurrentes.
+
+    El primer hilo hace la petición y el resto espera su resultado (o su
+    excepción) en lugar de lanzar peticiones duplicadas al upstream.
+    """
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+
+    if not leader:
+        if not flight.event.wait(settings.PRODUCTS_CACHE["FLIGHT_WAIT"]):
+            raise TimeoutError("Tiempo de espera agotado aguardando a Strapi")
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    try:
+        flight.result = fn()
+        return flight.result
+    except Exception as exc:
+        flight.error = exc
+        raise
+    finally:
+        with _flights_lock:
+            _flights.pop(key, None)
+        flight.event.set()
+
+
+def cache_key(query):
+    """Clave de cache para una consulta normalizada"""
+    return CACHE_KEY.format(
+        page=query["page"] or "",
+        pageSize=query["pageSize"] or "",
+        fields=",".join(query["fields"] or ()),
+    )
+
+
+def _fetch_and_store(key, query):
+    """Consulta Strapi y guarda la respuesta como última copia válida"""
+    data = fetch_products(query)
+    entry = {"data": data, "fetched_at": time.time()}
+    cache.set(key, entry, settings.PRODUCTS_CACHE["KEEP_TTL"])
+    return data
+
+
+def _refresh_in_background(key, query):
+    """Revalida una entrada vencida sin bloquear la respuesta"""
+    # Evita que varios workers revaliden la misma entrada a la vez
+    lock_key = REFRESH_LOCK_KEY.format(key=key)
+    if not cache.add(lock_key, 1, settings.PRODUCTS_CACHE["REFRESH_LOCK_TTL"]):
+        return
+
+    def refresh():
+        try:
+            _single_flight(key, lambda: _fetch_and_store(key, query))
+        except Exception:
+            logger.warning("No se pudo revalidar %s en Strapi", key, exc_info=True)
+        finally:
+            cache.delete(lock_key)
+
+    threading.Thread(target=refresh, name="products-refresh", daemon=True).start()
+
+
+def get_products(query):
+    """
+    Retorna los productos de una consulta aplicando stale-while-revalidate.
+
+    - Entrada fresca: se sirve directamente (``HIT``).
+    - Entrada vencida dentro de la ventana ``STALE_TTL``: se sirve de
+      inmediato y se revalida en segundo plano (``STALE``).
+    - Sin entrada o muy antigua: se consulta Strapi con single-flight
+      (``MISS``); si Strapi falla se sirve la última copia válida
+      (``FALLBACK``) y, si no hay ninguna, se propaga el error. Con el
+      circuit breaker abierto esto ocurre sin esperar al upstream.
+
+    Retorna una tupla ``(data, estado)``.
+    """
+    config = settings.PRODUCTS_CACHE
+    key = cache_key(query)
+    entry = cache.get(key)
+
+    if entry is not None:
+        age = time.time() - entry["fetched_at"]
+        if age < config["FRESH_TTL"]:
+            return entry["data"], HIT
+        if age < config["FRESH_TTL"] + config["STALE_TTL"]:
+            _refresh_in_background(key, query)
+            return entry["data"], STALE
+
+    try:
+        return _single_flight(key, lambda: _fetch_and_store(key, query)), MISS
+    except Exception as exc:
+        if entry is None:
+            raise
+        # Con el circuito abierto la causa ya es conocida: sin traceback
+        logger.warning(
+            "Strapi no disponible, sirviendo copia de %s",
+            key,
+            exc_info=not isinstance(exc, CircuitOpenError),
+        )
+        return entry["data"], FALLBACK
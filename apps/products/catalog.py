@@ -0,0 +1,62 @@
+from django.db.models import Prefetch
+
+from core.search import get_search_backend
+
+from .models import Product, ProductImageVariant
+from .projection import project
+
+# Tamaño de página por defecto de Strapi, para conservar el mismo contrato
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+SEARCH_FIELDS = ["title", "description"]
+
+
+def serialize_product(product, fields=None):
+    """Misma forma que ``transform_product`` pero desde la tabla local"""
+    data = {
+        "id": product.strapi_id,
+        "title": product.title,
+        "description": product.description,
+        "img": product.img,
+        "img_variants": [
+            {"id": variant.strapi_id, "img": variant.img, "title": variant.title}
+            for variant in product.img_variants.all()
+        ],
+    }
+    return project(data, fields)
+
+
+def get_products_from_database(query, search=None):
+    """
+    Retorna una página de productos desde la copia local.
+
+    La respuesta conserva la estructura de Strapi (``data`` y
+    ``meta.pagination``) para que los clientes no noten el cambio de
+    origen. ``search`` filtra por título y descripción.
+    """
+    queryset = Product.objects.prefetch_related(
+        Prefetch("img_variants", queryset=ProductImageVariant.objects.order_by("orden"))
+    )
+    if search:
+        backend = get_search_backend(queryset.db)
+        queryset = backend.filter(queryset, search, SEARCH_FIELDS)
+        queryset = backend.rank(queryset, search, SEARCH_FIELDS)
+
+    # Igual que Strapi: una página fuera de rango retorna ``data`` vacío
+    page = query["page"] or 1
+    page_size = min(query["pageSize"] or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    total = queryset.count()
+    offset = (page - 1) * page_size
+    products = queryset[offset:offset + page_size] if offset < total else []
+
+    return {
+        "data": [serialize_product(product, query["fields"]) for product in products],
+        "meta": {
+            "pagination": {
+                "page": page,
+                "pageSize": page_size,
+                "pageCount": -(-total // page_size),
+                "total": total,
+            }
+        },
+    }
@@ -0,0 +1,207 @@
+import asyncio
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .breaker import get_circuit_breaker
+
+
+class StrapiClient:
+    """
+    Cliente HTTP para la API de Strapi con conexiones persistentes.
+
+    Reutiliza una ``requests.Session`` con un pool de conexiones
+    keep-alive, de modo que las peticiones no repiten el handshake
+    TCP/TLS. Los timeouts de conexión y lectura están separados y los
+    fallos de conexión o respuestas 502/503/504 se reintentan con backoff
+    exponencial (solo métodos idempotentes). Los timeouts de lectura no
+    se reintentan para no multiplicar el tiempo que un worker queda
+    esperando a un upstream lento.
+
+    Todas las llamadas pasan por el circuit breaker del proceso: con el
+    circuito abierto fallan de inmediato con ``CircuitOpenError``.
+    """
+
+    RETRY_STATUS_CODES = (502, 503, 504)
+
+    def __init__(
+        self,
+        base_url,
+        pool_size=10,
+        connect_timeout=3.05,
+        read_timeout=10,
+        max_retries=2,
+        backoff_factor=0.3,
+        breaker=None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.breaker = breaker
+        self.timeout = (connect_timeout, read_timeout)
+
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.RETRY_STATUS_CODES,
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size, max_retries=retry
+        )
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, path, params=None, **kwargs):
+        """Realiza un GET a ``{base_url}/{path}`` con los timeouts del cliente"""
+        kwargs.setdefault("timeout", self.timeout)
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        if self.breaker is None:
+            return self.session.get(url, params=params, **kwargs)
+
+        self.breaker.before_call()
+        started = time.monotonic()
+        failed = True
+        try:
+            response = self.session.get(url, params=params, **kwargs)
+            failed = response.status_code >= 500
+            return response
+        finally:
+            self.breaker.record(time.monotonic() - started, failed)
+
+    def close(self):
+        """Cierra las conexiones del pool"""
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_strapi_client():
+    """
+    Retorna el cliente de Strapi del proceso actual.
+
+    Se crea de forma perezosa en la primera petición, es decir, después
+    del fork de gunicorn, así que cada worker tiene su propio pool.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                config = settings.STRAPI
+                _client = StrapiClient(
+                    base_url=config["BASE_URL"],
+                    pool_size=config["POOL_SIZE"],
+                    connect_timeout=config["CONNECT_TIMEOUT"],
+                    read_timeout=config["READ_TIMEOUT"],
+                    max_retries=config["MAX_RETRIES"],
+                    backoff_factor=config["BACKOFF_FACTOR"],
+                    breaker=get_circuit_breaker(),
+                )
+    return _client
+
+
+class AsyncStrapiClient:
+    """
+    Cliente asíncrono de Strapi sobre ``httpx.AsyncClient``.
+
+    Equivalente a ``StrapiClient`` para vistas async; comparte con él el
+    circuit breaker del proceso.
+    """
+
+    def __init__(self, http_client, breaker=None):
+        self.http = http_client
+        self.breaker = breaker
+
+    async def get(self, path, params=None, **kwargs):
+        """Realiza un GET relativo a ``base_url`` pasando por el breaker"""
+        path = path.lstrip("/")
+        if self.breaker is None:
+            return await self.http.get(path, params=params, **kwargs)
+
+        self.breaker.before_call()
+        started = time.monotonic()
+        failed = True
+        try:
+            response = await self.http.get(path, params=params, **kwargs)
+            failed = response.status_code >= 500
+            return response
+        finally:
+            self.breaker.record(time.monotonic() - started, failed)
+
+    async def aclose(self):
+        """Cierra las conexiones del pool"""
+        await self.http.aclose()
+
+
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def create_async_strapi_client():
+    """Crea un cliente asíncrono de Strapi con la configuración de ``STRAPI``"""
+    config = settings.STRAPI
+    http_client = httpx.AsyncClient(
+        base_url=config["BASE_URL"].rstrip("/") + "/",
+        timeout=httpx.Timeout(
+            config["READ_TIMEOUT"], connect=config["CONNECT_TIMEOUT"]
+        ),
+        limits=httpx.Limits(
+            max_connections=config["ASYNC_MAX_CONNECTIONS"],
+            max_keepalive_connections=config["POOL_SIZE"],
+        ),
+        # httpx solo reintenta errores de conexión (idempotente)
+        transport=httpx.AsyncHTTPTransport(retries=config["MAX_RETRIES"]),
+    )
+    return AsyncStrapiClient(http_client, breaker=get_circuit_breaker())
+
+
+def get_async_strapi_client():
+    """
+    Retorna el cliente asíncrono de Strapi para el event loop actual.
+
+    Bajo ASGI hay un único loop por proceso, así que todas las peticiones
+    comparten el mismo pool de conexiones httpx. Un ``AsyncClient`` no
+    puede usarse desde otro loop, por eso se guarda uno por loop. Solo
+    debe llamarse desde un loop de larga vida; bajo WSGI usar
+    ``async_strapi_client(shared=False)``.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = create_async_strapi_client()
+        _async_clients[loop] = client
+    return client
+
+
+@asynccontextmanager
+async def async_strapi_client(shared=True):
+    """
+    Entrega un cliente asíncrono de Strapi para una petición.
+
+    Con ``shared=True`` (ASGI) se usa el cliente del loop del proceso.
+    Bajo WSGI Django ejecuta cada vista async en un event loop nuevo que
+    se descarta al terminar, así que un cliente por loop nunca se
+    reutilizaría y sus conexiones quedarían abiertas: con
+    ``shared=False`` se crea uno para la petición y se cierra al salir.
+    """
+    if shared:
+        yield get_async_strapi_client()
+        return
+
+    client = create_async_strapi_client()
+    try:
+        yield client
+    finally:
+        await client.aclose()
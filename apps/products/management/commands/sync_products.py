@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.products.services import StrapiResponseError
+from apps.products.sync import sync_products
+
+
+class Command(BaseCommand):
+    help = "Sincroniza la tabla local de productos con la API de Strapi"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Recorre todo el catálogo y elimina los productos que ya no existen",
+        )
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=100,
+            help="Productos por página consultada a Strapi (default: 100)",
+        )
+
+    def handle(self, *args, **options):
+        """Sincroniza los productos modificados desde la última ejecución"""
+        try:
+            result = sync_products(full=options["full"], page_size=options["page_size"])
+        except StrapiResponseError as e:
+            raise CommandError(f"Strapi respondió {e.status_code}: {e.detail}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Productos sincronizados: {result['synced']}, "
+                f"eliminados: {result['deleted']}"
+            )
+        )
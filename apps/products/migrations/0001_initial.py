@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:57
+
+import core.db
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        core.db.OptionalTrigramExtension(),
+        migrations.CreateModel(
+            name='Product',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('strapi_id', models.PositiveIntegerField(db_index=True, help_text='Cambia al publicar; no es único entre sincronizaciones', verbose_name='ID en Strapi')),
+                ('document_id', models.CharField(help_text='Identificador estable; el ID numérico cambia al publicar', max_length=64, unique=True, verbose_name='Document ID en Strapi')),
+                ('title', models.TextField(blank=True, verbose_name='Título')),
+                ('description', models.TextField(blank=True, verbose_name='Descripción')),
+                ('img', models.URLField(blank=True, help_text='Imagen del primer color disponible', max_length=500, null=True, verbose_name='Imagen principal')),
+                ('strapi_updated_at', models.DateTimeField(blank=True, db_index=True, help_text='Marca usada por la sincronización incremental', null=True, verbose_name='Última modificación en Strapi')),
+                ('fecha_sincronizacion', models.DateTimeField(auto_now=True, verbose_name='Fecha de sincronización')),
+            ],
+            options={
+                'verbose_name': 'Producto',
+                'verbose_name_plural': 'Productos',
+                'ordering': ['strapi_id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductImageVariant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('strapi_id', models.PositiveIntegerField(blank=True, null=True, verbose_name='ID en Strapi')),
+                ('img', models.URLField(blank=True, max_length=500, null=True, verbose_name='Imagen')),
+                ('title', models.CharField(blank=True, max_length=255, null=True, verbose_name='Título')),
+                ('orden', models.PositiveSmallIntegerField(default=0, verbose_name='Orden')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='img_variants', to='products.product', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Variante de imagen',
+                'verbose_name_plural': 'Variantes de imagen',
+                'ordering': ['product', 'orden'],
+            },
+        ),
+        core.db.PostgresOnlyAddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('title', output_field=models.TextField())), name='gin_trgm_ops'), name='product_title_trgm'),
+        ),
+        core.db.PostgresOnlyAddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('description', output_field=models.TextField())), name='gin_trgm_ops'), name='product_description_trgm'),
+        ),
+    ]
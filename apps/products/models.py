@@ -1,2 +1,92 @@
-# Este archivo está vacío porque no guardamos datos en BD
-# Solo consultamos la API externa de Strapi y retornamos la data tal como viene
+from django.db import models
+
+from core.db import trigram_index
+
+
+class Product(models.Model):
+    """
+    Copia local de un producto de Strapi
+
+    Se llena con el comando ``sync_products``; cuando
+    ``PRODUCTS_SOURCE = "database"`` el endpoint de productos se sirve
+    desde esta tabla en lugar de consultar Strapi en cada petición.
+    """
+
+    strapi_id = models.PositiveIntegerField(
+        db_index=True,
+        verbose_name="ID en Strapi",
+        help_text="Cambia al publicar; no es único entre sincronizaciones",
+    )
+
+    document_id = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name="Document ID en Strapi",
+        help_text="Identificador estable; el ID numérico cambia al publicar",
+    )
+
+    title = models.TextField(blank=True, verbose_name="Título")
+
+    description = models.TextField(blank=True, verbose_name="Descripción")
+
+    img = models.URLField(
+        max_length=500,
+        blank=True,
+        null=True,
+        verbose_name="Imagen principal",
+        help_text="Imagen del primer color disponible",
+    )
+
+    strapi_updated_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name="Última modificación en Strapi",
+        help_text="Marca usada por la sincronización incremental",
+    )
+
+    fecha_sincronizacion = models.DateTimeField(
+        auto_now=True, verbose_name="Fecha de sincronización"
+    )
+
+    class Meta:
+        verbose_name = "Producto"
+        verbose_name_plural = "Productos"
+        ordering = ["strapi_id"]
+        indexes = [
+            # Índices de trigramas para la búsqueda (solo PostgreSQL)
+            trigram_index("title", "product_title_trgm"),
+            trigram_index("description", "product_description_trgm"),
+        ]
+
+    def __str__(self):
+        return f"{self.strapi_id} - {self.title[:50]}"
+
+
+class ProductImageVariant(models.Model):
+    """Variante de imagen del primer color de un producto"""
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="img_variants",
+        verbose_name="Producto",
+    )
+
+    strapi_id = models.PositiveIntegerField(
+        null=True, blank=True, verbose_name="ID en Strapi"
+    )
+
+    img = models.URLField(max_length=500, blank=True, null=True, verbose_name="Imagen")
+
+    title = models.CharField(max_length=255, blank=True, null=True, verbose_name="Título")
+
+    orden = models.PositiveSmallIntegerField(default=0, verbose_name="Orden")
+
+    class Meta:
+        verbose_name = "Variante de imagen"
+        verbose_name_plural = "Variantes de imagen"
+        ordering = ["product", "orden"]
+
+    def __str__(self):
+        return f"{self.product_id} - {self.img}"
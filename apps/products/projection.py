@@ -0,0 +1,87 @@
+# Campo de salida -> lo que requiere de Strapi para construirse (``id``
+# siempre viene). A partir de los campos pedidos se generan ``fields[]`` y
+# ``populate[...]`` para que Strapi solo serialice y envíe esos datos.
+PRODUCT_PROJECTION = {
+    "id": {},
+    "title": {"fields": ["title"]},
+    "description": {"fields": ["description"]},
+    "img": {"populate": {"product_color": {"fields": ["img"]}}},
+    "img_variants": {
+        "populate": {
+            "product_color": {"populate": {"images": {"fields": ["img", "title"]}}}
+        }
+    },
+}
+
+OUTPUT_FIELDS = tuple(PRODUCT_PROJECTION)
+
+
+def parse_fields(value):
+    """
+    Interpreta ``?fields=title,img``.
+
+    Retorna una tupla ordenada de campos conocidos (los desconocidos se
+    descartan) o None si no se pidió ninguno, lo que equivale a todos.
+    """
+    requested = {field.strip() for field in (value or "").split(",")}
+    fields = tuple(field for field in OUTPUT_FIELDS if field in requested)
+    return fields or None
+
+
+def _merge(target, spec):
+    """Une ``spec`` en ``target`` (listas de campos y populate anidados)"""
+    for field in spec.get("fields", []):
+        if field not in target.setdefault("fields", []):
+            target["fields"].append(field)
+    for relation, nested in spec.get("populate", {}).items():
+        _merge(target.setdefault("populate", {}).setdefault(relation, {}), nested)
+
+
+def _key(prefix, name):
+    return f"{prefix}[{name}]" if prefix else name
+
+
+def _flatten(spec, prefix, params):
+    """
+    Convierte el árbol de proyección a la notación con corchetes de Strapi,
+    p. ej. ``populate[product_color][populate][images][fields][0]=img``
+    """
+    for index, field in enumerate(spec.get("fields", [])):
+        params[f"{_key(prefix, 'fields')}[{index}]"] = field
+    for relation, nested in spec.get("populate", {}).items():
+        relation_prefix = f"{_key(prefix, 'populate')}[{relation}]"
+        if not nested:
+            params[relation_prefix] = "true"
+        _flatten(nested, relation_prefix, params)
+
+
+def projection_params(fields=None, extra_fields=()):
+    """
+    Parámetros de Strapi para construir los campos de salida indicados.
+
+    Siempre incluye al menos un ``fields[]`` de primer nivel.
+
+    ``extra_fields`` agrega atributos de primer nivel que no forman parte
+    de la salida pero que quien consulta necesita (p. ej. ``updatedAt``
+    en la sincronización).
+    """
+    spec = {}
+    for field in fields or OUTPUT_FIELDS:
+        _merge(spec, PRODUCT_PROJECTION[field])
+    if extra_fields:
+        _merge(spec, {"fields": list(extra_fields)})
+    if not spec.get("fields"):
+        # Sin ``fields[]`` Strapi retorna todos los atributos escalares
+        # (p. ej. con ``?fields=img`` o ``?fields=id``)
+        spec["fields"] = ["documentId"]
+
+    params = {}
+    _flatten(spec, "", params)
+    return params
+
+
+def project(data, fields=None):
+    """Reduce un producto ya transformado a los campos pedidos"""
+    if fields is None:
+        return data
+    return {field: data[field] for field in fields}
@@ -0,0 +1,200 @@
+import asyncio
+
+from .client import get_async_strapi_client, get_strapi_client
+from .projection import parse_fields, project, projection_params
+
+
+class StrapiResponseError(Exception):
+    """La API de Strapi respondió con un código distinto de 200"""
+
+    def __init__(self, status_code, detail):
+        super().__init__(f"Strapi respondió {status_code}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _positive_int(value):
+    """Convierte a entero positivo o retorna None si no es válido"""
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number > 0 else None
+
+
+def normalize_query(query_params):
+    """
+    Normaliza los parámetros de paginación y proyección de la petición.
+
+    Valores vacíos o inválidos se descartan para que Strapi aplique sus
+    valores por defecto; el resultado se usa también como clave de cache.
+    ``fields`` es None cuando se piden todos los campos.
+    """
+    return {
+        "page": _positive_int(query_params.get("page")),
+        "pageSize": _positive_int(query_params.get("pageSize")),
+        "fields": parse_fields(query_params.get("fields")),
+    }
+
+
+def parse_page_range(value, max_pages):
+    """
+    Interpreta el parámetro ``pages`` de la vista asíncrona.
+
+    Acepta ``"a-b"`` (rango inclusivo), un número de página o ``"all"``.
+    Retorna ``(primera, última)``, con ``última = None`` para ``"all"``,
+    o None si el valor no es válido. El rango se recorta a ``max_pages``.
+    """
+    value = (value or "").strip().lower()
+    if value == "all":
+        return 1, None
+
+    first, _, last = value.partition("-")
+    first = _positive_int(first)
+    last = _positive_int(last) if last else first
+    if first is None or last is None or last < first:
+        return None
+    return first, min(last, first + max_pages - 1)
+
+
+def build_params(query, extra_fields=()):
+    """Construye los parámetros de Strapi para una consulta normalizada"""
+    # Solo los campos y relaciones que necesita la respuesta
+    params = projection_params(query.get("fields"), extra_fields)
+
+    # Parámetros de paginación
+    if query["page"]:
+        params["pagination[page]"] = query["page"]
+    if query["pageSize"]:
+        params["pagination[pageSize]"] = query["pageSize"]
+    return params
+
+
+def transform_product(product, fields=None):
+    """
+    Reduce un producto de Strapi a id, title, description, img e img_variants
+
+    Con ``fields`` solo se retornan esos campos.
+    """
+    # Imagen principal y variantes del primer color disponible
+    main_image = None
+    image_variants = []
+    if product.get("product_color") and len(product["product_color"]) > 0:
+        first_color = product["product_color"][0]
+        main_image = first_color.get("img")
+        image_variants = [
+            {
+                "id": img.get("id"),
+                "img": img.get("img"),
+                "title": img.get("title"),
+            }
+            for img in first_color.get("images") or []
+        ]
+
+    return project(
+        {
+            "id": product.get("id"),
+            "title": product.get("title"),
+            "description": product.get("description"),
+            "img": main_image,
+            "img_variants": image_variants,
+        },
+        fields,
+    )
+
+
+def fetch_products(query):
+    """
+    Consulta una página de productos en Strapi y la transforma.
+
+    Retorna la respuesta con la misma estructura de paginación de Strapi.
+    Lanza ``StrapiResponseError`` si la respuesta no es 200 y deja pasar
+    las excepciones de ``requests`` (timeout, conexión).
+    """
+    response = get_strapi_client().get("products", params=build_params(query))
+    if response.status_code != 200:
+        raise StrapiResponseError(response.status_code, response.text)
+
+    strapi_data = response.json()
+    return {
+        "data": [
+            transform_product(product, query.get("fields"))
+            for product in strapi_data.get("data", [])
+        ],
+        "meta": strapi_data.get("meta", {}),
+    }
+
+
+def open_products_stream(query):
+    """
+    Abre una consulta a Strapi sin leer el cuerpo (``stream=True``).
+
+    Retorna la respuesta de ``requests`` para transformarla con
+    ``streaming.stream_products``; quien la recibe debe cerrarla.
+    """
+    response = get_strapi_client().get(
+        "products", params=build_params(query), stream=True
+    )
+    if response.status_code != 200:
+        detail = response.text
+        response.close()
+        raise StrapiResponseError(response.status_code, detail)
+    return response
+
+
+async def fetch_products_async(query, client=None):
+    """
+    Versión asíncrona de ``fetch_products`` sobre un cliente httpx.
+
+    Sin ``client`` usa el compartido del event loop actual. Deja pasar
+    las excepciones de ``httpx`` (timeout, conexión).
+    """
+    if client is None:
+        client = get_async_strapi_client()
+    response = await client.get("products", params=build_params(query))
+    if response.status_code != 200:
+        raise StrapiResponseError(response.status_code, response.text)
+
+    strapi_data = response.json()
+    return {
+        "data": [
+            transform_product(product, query.get("fields"))
+            for product in strapi_data.get("data", [])
+        ],
+        "meta": strapi_data.get("meta", {}),
+    }
+
+
+async def fetch_page_range(
+    first, last, page_size, max_pages, concurrency, fields=None, client=None
+):
+    """
+    Consulta en paralelo las páginas ``first..last`` y las une en orden.
+
+    Con ``last = None`` se piden todas las páginas: la primera indica
+    ``pageCount`` y el resto se consultan a la vez. Como mucho se
+    consultan ``max_pages`` páginas y ``concurrency`` simultáneamente.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(page):
+        async with semaphore:
+            return await fetch_products_async(
+                {"page": page, "pageSize": page_size, "fields": fields}, client
+            )
+
+    first_page = await fetch(first)
+    pagination = dict(first_page["meta"].get("pagination", {}))
+    page_count = pagination.get("pageCount") or first
+    if last is None:
+        last = min(page_count, first + max_pages - 1)
+    last = min(last, page_count)
+
+    rest = await asyncio.gather(*(fetch(page) for page in range(first + 1, last + 1)))
+
+    data = list(first_page["data"])
+    for page in rest:
+        data.extend(page["data"])
+
+    pagination.update({"page": first, "pageFrom": first, "pageTo": max(first, last)})
+    return {"data": data, "meta": {"pagination": pagination}}
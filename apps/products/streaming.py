@@ -0,0 +1,139 @@
+import codecs
+import json
+import logging
+
+from .services import transform_product
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = " \t\n\r"
+
+# Cierre de una respuesta interrumpida (ver ``stream_products``)
+STREAM_ERROR = {
+    "error": "Error al consultar la API de productos",
+    "detail": "La respuesta de la API externa se interrumpió",
+}
+
+_decoder = json.JSONDecoder()
+
+
+class StrapiStreamParser:
+    """
+    Parser incremental de una respuesta de Strapi ``{"data": [...], ...}``.
+
+    Lee el cuerpo por bloques y entrega los elementos de ``data`` uno a
+    uno con ``products()``, de modo que en memoria solo hay un producto
+    (más el bloque leído) en lugar de la página completa. El resto de
+    claves de primer nivel (``meta``) quedan en ``extra`` al terminar.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self.extra = {}
+
+    def _fill(self):
+        """Descarta lo ya consumido y agrega el siguiente bloque al buffer"""
+        if self._eof:
+            raise ValueError("Respuesta de Strapi incompleta")
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._eof = True
+            text = self._text.decode(b"", final=True)
+        else:
+            text = self._text.decode(chunk)
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+
+    def _peek(self):
+        """Retorna el siguiente carácter que no es espacio sin consumirlo"""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            self._fill()
+
+    def _expect(self, chars):
+        """Consume uno de los caracteres estructurales esperados"""
+        char = self._peek()
+        if char not in chars:
+            raise ValueError(f"JSON inesperado en la respuesta de Strapi: {char!r}")
+        self._pos += 1
+        return char
+
+    def _value(self):
+        """Decodifica el siguiente valor completo, leyendo más si hace falta"""
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            else:
+                # Un número al final del buffer podría continuar en el
+                # siguiente bloque, así que solo se acepta si hay algo después
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            self._fill()
+
+    def _array(self):
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            if self._expect(",]") == "]":
+                return
+
+    def products(self):
+        """Genera los productos de ``data`` a medida que se leen"""
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self._value()
+            self._expect(":")
+            if key == "data":
+                yield from self._array()
+            else:
+                self.extra[key] = self._value()
+            if self._expect(",}") == "}":
+                return
+
+
+def _dumps(value):
+    # Mismo formato compacto que el JSONRenderer de DRF
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def stream_products(upstream, fields=None, chunk_size=CHUNK_SIZE):
+    """
+    Transforma una respuesta de Strapi abierta con ``stream=True``.
+
+    Genera el JSON de salida (misma estructura que ``fetch_products``)
+    producto por producto mientras se lee el cuerpo del upstream. Si la
+    lectura falla a mitad de camino ya se envió el status 200, así que
+    se cierra ``data`` y el documento termina con una clave ``error``
+    (``STREAM_ERROR``) en lugar de ``meta``: el JSON sigue siendo válido
+    y el cliente sabe que la lista está incompleta.
+    """
+    parser = StrapiStreamParser(upstream.iter_content(chunk_size))
+    try:
+        yield '{"data":['
+        for index, product in enumerate(parser.products()):
+            yield ("," if index else "") + _dumps(transform_product(product, fields))
+        yield '],"meta":' + _dumps(parser.extra.get("meta", {})) + "}"
+    except Exception:
+        logger.exception("Error transformando la respuesta de Strapi en streaming")
+        yield '],"error":' + _dumps(STREAM_ERROR) + "}"
+    finally:
+        upstream.close()
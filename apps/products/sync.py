@@ -0,0 +1,104 @@
+from django.db import transaction
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+
+from .client import get_strapi_client
+from .models import Product, ProductImageVariant
+from .services import StrapiResponseError, build_params, transform_product
+
+# Atributos de Strapi que la copia local guarda además de la salida
+SYNC_EXTRA_FIELDS = ("documentId", "updatedAt")
+
+
+def _fetch_page(page, page_size, updated_since=None):
+    """Consulta una página de Strapi ordenada por ``updatedAt``"""
+    params = build_params(
+        {"page": page, "pageSize": page_size, "fields": None},
+        extra_fields=SYNC_EXTRA_FIELDS,
+    )
+    # Orden estable para que la paginación no salte ni repita productos
+    params["sort[0]"] = "updatedAt:asc"
+    params["sort[1]"] = "id:asc"
+    if updated_since is not None:
+        # $gte y no $gt: productos con la misma marca se vuelven a
+        # guardar, lo cual es idempotente
+        params["filters[updatedAt][$gte]"] = updated_since.isoformat()
+
+    response = get_strapi_client().get("products", params=params)
+    if response.status_code != 200:
+        raise StrapiResponseError(response.status_code, response.text)
+    return response.json()
+
+
+@transaction.atomic
+def _save_product(raw):
+    """
+    Crea o actualiza un producto y reemplaza sus variantes de imagen.
+
+    La clave es ``documentId``: en Strapi 5 el ``id`` numérico de un
+    documento cambia al volver a publicarlo, y usarlo como clave dejaría
+    filas duplicadas del mismo producto.
+    """
+    data = transform_product(raw)
+    product, _ = Product.objects.update_or_create(
+        document_id=raw["documentId"],
+        defaults={
+            "strapi_id": data["id"],
+            "title": data["title"] or "",
+            "description": data["description"] or "",
+            "img": data["img"],
+            "strapi_updated_at": parse_datetime(raw.get("updatedAt") or ""),
+        },
+    )
+
+    product.img_variants.all().delete()
+    ProductImageVariant.objects.bulk_create(
+        ProductImageVariant(
+            product=product,
+            strapi_id=variant["id"],
+            img=variant["img"],
+            title=variant["title"],
+            orden=position,
+        )
+        for position, variant in enumerate(data["img_variants"])
+    )
+    return product
+
+
+def sync_products(full=False, page_size=100):
+    """
+    Sincroniza la tabla local de productos con Strapi.
+
+    En modo incremental solo se piden los productos modificados desde la
+    última sincronización (máximo ``strapi_updated_at`` local). Con
+    ``full=True`` se recorre todo el catálogo y se eliminan los productos
+    que ya no existen en Strapi.
+
+    Retorna un diccionario con los contadores ``synced`` y ``deleted``.
+    """
+    updated_since = None
+    if not full:
+        # Max() ignora los NULL; ordenar por la columna no, y en
+        # PostgreSQL los NULL van primero en orden descendente
+        updated_since = Product.objects.aggregate(
+            ultima=Max("strapi_updated_at")
+        )["ultima"]
+
+    seen_ids = set()
+    page = 1
+    while True:
+        strapi_data = _fetch_page(page, page_size, updated_since)
+        for raw in strapi_data.get("data", []):
+            seen_ids.add(_save_product(raw).document_id)
+
+        pagination = strapi_data.get("meta", {}).get("pagination", {})
+        if page >= (pagination.get("pageCount") or 0):
+            break
+        page += 1
+
+    deleted = 0
+    if full:
+        _, per_model = Product.objects.exclude(document_id__in=seen_ids).delete()
+        deleted = per_model.get(Product._meta.label, 0)
+
+    return {"synced": len(seen_ids), "deleted": deleted}
@@ -1,3 +1,363 @@
-from django.test import TestCase
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qsl, urlparse
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from . import breaker, client
+from .breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from .projection import parse_fields, projection_params
+
+
+def strapi_product(pk):
+    """Producto con la forma que retorna Strapi 5"""
+    return {
+        "id": pk,
+        "documentId": f"doc{pk}",
+        "title": f"Producto {pk}",
+        "description": f"Descripción {pk}",
+        "updatedAt": "2026-01-01T00:00:00.000Z",
+        "product_color": [
+            {
+                "id": pk * 10,
+                "img": f"https://img/{pk}.png",
+                "images": [
+                    {"id": pk * 100 + i, "img": f"https://img/{pk}_{i}.png", "title": None}
+                    for i in range(2)
+                ],
+            }
+        ],
+    }
+
+
+class StrapiStandIn:
+    """
+    Servidor HTTP local que imita ``GET /api/products`` de Strapi.
+
+    Pagina ``products`` según ``pagination[page]`` y
+    ``pagination[pageSize]`` y guarda los parámetros de cada petición en
+    ``requests`` para verificar lo que se le pidió.
+    """
+
+    def __init__(self, products):
+        self.products = products
+        self.requests = []
+        self.status = 200
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = dict(parse_qsl(url.query))
+                stand_in.requests.append(params)
+                if stand_in.status != 200:
+                    self.send_response(stand_in.status)
+                    self.end_headers()
+                    self.wfile.write(b"error")
+                    return
+
+                page = int(params.get("pagination[page]", 1))
+                size = int(params.get("pagination[pageSize]", 25))
+                items = stand_in.products[(page - 1) * size:page * size]
+                body = json.dumps({
+                    "data": items,
+                    "meta": {
+                        "pagination": {
+                            "page": page,
+                            "pageSize": size,
+                            "pageCount": -(-len(stand_in.products) // size),
+                            "total": len(stand_in.products),
+                        }
+                    },
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/api"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class StrapiTestMixin:
+    """Apunta el cliente de Strapi a un ``StrapiStandIn`` durante el test"""
+
+    products = [strapi_product(pk) for pk in range(1, 6)]
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.strapi = StrapiStandIn(self.products)
+        self.addCleanup(self.strapi.close)
+
+        overrides = override_settings(
+            STRAPI={**settings.STRAPI, "BASE_URL": self.strapi.base_url, "MAX_RETRIES": 0},
+            PRODUCTS_SOURCE="strapi",
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        # El cliente se crea perezosamente con la configuración vigente
+        patcher = mock.patch.object(client, "_client", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class ProjectionParamsTests(SimpleTestCase):
+    """Parámetros ``fields[]``/``populate`` generados a partir de ``?fields``"""
+
+    def test_parse_fields_descarta_desconocidos_y_ordena(self):
+        self.assertEqual(parse_fields("img, id,bogus"), ("id", "img"))
+        self.assertIsNone(parse_fields("bogus"))
+        self.assertIsNone(parse_fields(None))
+
+    def test_todos_los_campos(self):
+        params = projection_params()
+        self.assertEqual(params["fields[0]"], "title")
+        self.assertEqual(params["fields[1]"], "description")
+        self.assertEqual(params["populate[product_color][fields][0]"], "img")
+        self.assertEqual(
+            params["populate[product_color][populate][images][fields][0]"], "img"
+        )
+        self.assertEqual(
+            params["populate[product_color][populate][images][fields][1]"], "title"
+        )
+
+    def test_solo_relaciones_pide_documentId(self):
+        params = projection_params(("img",))
+        self.assertEqual(params["fields[0]"], "documentId")
+        self.assertEqual(params["populate[product_color][fields][0]"], "img")
+        self.assertNotIn("fields[1]", params)
+
+    def test_solo_id_pide_documentId(self):
+        self.assertEqual(projection_params(("id",)), {"fields[0]": "documentId"})
+
+    def test_extra_fields_sin_duplicados(self):
+        params = projection_params(("title",), extra_fields=("documentId", "title"))
+        self.assertEqual(params["fields[0]"], "title")
+        self.assertEqual(params["fields[1]"], "documentId")
+        self.assertNotIn("fields[2]", params)
+
+
+class ProductsProjectionTests(StrapiTestMixin, TestCase):
+    """Respuesta de ``/api/v1/products/`` contra el stand-in de Strapi"""
+
+    url = "/api/v1/products/"
+
+    def test_respuesta_completa(self):
+        response = APIClient().get(self.url, {"pageSize": 2, "page": 2})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Cache"], "MISS")
+        body = response.json()
+        self.assertEqual([p["id"] for p in body["data"]], [3, 4])
+        self.assertEqual(
+            body["data"][0],
+            {
+                "id": 3,
+                "title": "Producto 3",
+                "description": "Descripción 3",
+                "img": "https://img/3.png",
+                "img_variants": [
+                    {"id": 300, "img": "https://img/3_0.png", "title": None},
+                    {"id": 301, "img": "https://img/3_1.png", "title": None},
+                ],
+            },
+        )
+        self.assertEqual(body["meta"]["pagination"]["total"], 5)
+
+        params = self.strapi.requests[-1]
+        self.assertEqual(params["pagination[page]"], "2")
+        self.assertEqual(params["pagination[pageSize]"], "2")
+
+    def test_fields_limita_respuesta_y_consulta(self):
+        response = APIClient().get(self.url, {"pageSize": 2, "fields": "img,bogus"})
+
+        self.assertEqual(response.json()["data"][0], {"img": "https://img/1.png"})
+        params = self.strapi.requests[-1]
+        self.assertEqual(params["fields[0]"], "documentId")
+        self.assertEqual(params["populate[product_color][fields][0]"], "img")
+        self.assertFalse(any("images" in key for key in params))
+
+    def test_fields_id(self):
+        response = APIClient().get(self.url, {"fields": "id"})
+
+        self.assertEqual(response.json()["data"][0], {"id": 1})
+        self.assertEqual(self.strapi.requests[-1], {"fields[0]": "documentId"})
+
+    def test_cache_por_fields(self):
+        api = APIClient()
+        api.get(self.url, {"fields": "title"})
+        response = api.get(self.url, {"fields": "title"})
+        self.assertEqual(response["X-Cache"], "HIT")
+
+        response = api.get(self.url, {"fields": "img"})
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len(self.strapi.requests), 2)
+
+    def test_stream_con_fields(self):
+        response = APIClient().get(self.url, {"fields": "title", "stream": "1"})
+
+        self.assertEqual(response["X-Cache"], "BYPASS")
+        body = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(body["data"][0], {"title": "Producto 1"})
+        self.assertEqual(body["meta"]["pagination"]["total"], 5)
+
+
+class FakeClock:
+    """Reemplazo de ``time.monotonic`` que solo avanza a mano"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    """Máquina de estados closed → open → half_open → closed/open"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(breaker.time, "monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(
+            window=60, min_calls=4, error_rate=0.5, slow_call=2,
+            slow_rate=0.5, open_seconds=30, half_open_calls=2,
+        )
+
+    def call(self, duration=0.1, failed=False):
+        self.breaker.before_call()
+        self.breaker.record(duration, failed)
+
+    def test_no_abre_con_pocas_llamadas(self):
+        for _ in range(3):
+            self.call(failed=True)
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_abre_por_tasa_de_errores(self):
+        self.call()
+        self.call()
+        self.call(failed=True)
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.call(failed=True)
+        self.assertEqual(self.breaker.state, OPEN)
+
+        self.clock.now += 10
+        with self.assertRaises(CircuitOpenError) as error:
+            self.breaker.before_call()
+        self.assertAlmostEqual(error.exception.retry_after, 20)
+
+    def test_abre_por_llamadas_lentas(self):
+        for duration in (0.1, 0.1, 3, 3):
+            self.call(duration)
+        self.assertEqual(self.breaker.state, OPEN)
+
+    def test_la_ventana_descarta_llamadas_antiguas(self):
+        self.call(failed=True)
+        self.call(failed=True)
+        self.clock.now += 61
+        self.call()
+        self.call()
+        self.call()
+        self.call(failed=True)
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertEqual(self.breaker.snapshot()["window"]["calls"], 4)
+
+    def open_breaker(self):
+        for _ in range(4):
+            self.call(failed=True)
+        self.clock.now += 30
+
+    def test_half_open_cierra_tras_pruebas_exitosas(self):
+        self.open_breaker()
+
+        self.breaker.before_call()
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.breaker.before_call()
+        # Solo ``half_open_calls`` llamadas de prueba a la vez
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+        self.breaker.record(0.1, False)
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.breaker.record(0.1, False)
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertEqual(self.breaker.snapshot()["window"]["calls"], 0)
+
+    def test_half_open_reabre_si_una_prueba_falla(self):
+        self.open_breaker()
+
+        self.breaker.before_call()
+        self.breaker.record(0.1, True)
+        self.assertEqual(self.breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+    def test_snapshot_con_histograma(self):
+        self.call(0.07)
+        self.call(3, failed=True)
+
+        snapshot = self.breaker.snapshot()
+        self.assertEqual(snapshot["window"]["failures"], 1)
+        self.assertEqual(snapshot["window"]["slow_calls"], 1)
+        self.assertEqual(snapshot["latency"]["count"], 2)
+        self.assertEqual(snapshot["latency"]["buckets"]["0.05"], 0)
+        self.assertEqual(snapshot["latency"]["buckets"]["0.1"], 1)
+        self.assertEqual(snapshot["latency"]["buckets"]["+Inf"], 2)
+
+
+class ProductsCircuitBreakerTests(StrapiTestMixin, TestCase):
+    """El endpoint de productos con el circuito de Strapi abierto"""
+
+    def setUp(self):
+        super().setUp()
+        self.breaker = CircuitBreaker(min_calls=2, error_rate=0.5, open_seconds=30)
+        patcher = mock.patch.object(breaker, "_breaker", self.breaker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_circuito_abierto_responde_503_sin_consultar_strapi(self):
+        api = APIClient()
+        self.strapi.status = 502
+        api.get("/api/v1/products/", {"page": 1})
+        api.get("/api/v1/products/", {"page": 2})
+        self.assertEqual(self.breaker.state, OPEN)
+        consultas = len(self.strapi.requests)
+
+        response = api.get("/api/v1/products/", {"page": 3})
+        self.assertEqual(response.status_code, 503)
+        self.assertGreater(int(response["Retry-After"]), 0)
+        self.assertEqual(len(self.strapi.requests), consultas)
+
+        health = api.get("/api/v1/products/health/")
+        self.assertEqual(health.status_code, 503)
+        self.assertEqual(health.json()["state"], OPEN)
+
+    def test_circuito_abierto_sirve_la_ultima_copia(self):
+        api = APIClient()
+        api.get("/api/v1/products/", {"page": 1})
+        self.breaker._open(breaker.time.monotonic())
+
+        with override_settings(
+            PRODUCTS_CACHE={**settings.PRODUCTS_CACHE, "FRESH_TTL": 0, "STALE_TTL": 0}
+        ):
+            response = api.get("/api/v1/products/", {"page": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Cache"], "FALLBACK")
+        self.assertEqual(len(self.strapi.requests), 1)
@@ -1,7 +1,11 @@
 from django.urls import path
-from .views import ProductsAPIView
+from .views import ProductsAPIView, ProductsAsyncView, StrapiHealthAPIView
 
 urlpatterns = [
     # Endpoint para consultar productos desde Strapi
     path('products/', ProductsAPIView.as_view(), name='products-list'),
+    # Versión asíncrona con consulta de varias páginas en paralelo
+    path('products/async/', ProductsAsyncView.as_view(), name='products-async'),
+    # Estado del circuit breaker y latencias de Strapi
+    path('products/health/', StrapiHealthAPIView.as_view(), name='products-health'),
 ]
@@ -1,10 +1,33 @@
+import math
+
+import httpx
 import requests
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
+from core.pagination import VALORES_VERDADEROS
+
+from .breaker import OPEN, CircuitOpenError, get_circuit_breaker
+from .cache import get_products
+from .client import async_strapi_client
+from .catalog import get_products_from_database
+from .services import (
+    StrapiResponseError,
+    fetch_page_range,
+    fetch_products_async,
+    normalize_query,
+    open_products_stream,
+    parse_page_range,
+)
+from .streaming import stream_products
+
 
 class ProductsAPIView(APIView):
     """
@@ -13,6 +36,24 @@ class ProductsAPIView(APIView):
     Este endpoint consulta la API externa de Strapi, procesa los datos
     y retorna solo los campos necesarios: id, title, description,
     img (imagen principal) e img_variants (variantes de imágenes).
+
+    Las respuestas se guardan en cache con stale-while-revalidate; la
+    cabecera ``X-Cache`` indica si se sirvieron desde cache (HIT/STALE),
+    desde Strapi (MISS) o desde la última copia válida (FALLBACK). Si el
+    circuit breaker de Strapi está abierto y no hay copia se responde 503
+    de inmediato, sin esperar al timeout.
+
+    Con ``PRODUCTS_SOURCE = "database"`` se sirve desde la copia local
+    sincronizada con ``sync_products`` (cabecera ``X-Source: database``),
+    lo que además permite filtrar con ``search``.
+
+    ``fields`` limita los campos de la respuesta y también lo que se pide
+    a Strapi.
+
+    Con ``stream=1`` la respuesta de Strapi se transforma producto por
+    producto mientras se lee (``X-Cache: BYPASS``), sin cargar la página
+    completa en memoria. Es opcional: el streaming no pasa por la cache
+    ni tiene copia de respaldo (FALLBACK) si Strapi falla.
     """
 
     permission_classes = [permissions.AllowAny]
@@ -32,6 +73,26 @@ class ProductsAPIView(APIView):
                 description="Cantidad de elementos por página",
                 type=openapi.TYPE_INTEGER,
             ),
+            openapi.Parameter(
+                "search",
+                openapi.IN_QUERY,
+                description="Buscar en título y descripción "
+                            "(solo con PRODUCTS_SOURCE=database)",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "fields",
+                openapi.IN_QUERY,
+                description="Campos a retornar separados por coma "
+                            "(id, title, description, img, img_variants)",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "stream",
+                openapi.IN_QUERY,
+                description="Transformar la respuesta en streaming, sin cache",
+                type=openapi.TYPE_BOOLEAN,
+            ),
         ],
         responses={
             200: openapi.Response(
@@ -84,6 +145,9 @@ class ProductsAPIView(APIView):
                     }
                 },
             ),
+            503: openapi.Response(
+                description="Circuito abierto: la API externa no está disponible",
+            ),
             500: openapi.Response(
                 description="Error al consultar la API externa",
                 examples={
@@ -107,94 +171,54 @@ class ProductsAPIView(APIView):
         - img: Imagen principal (del primer color disponible)
         - img_variants: Array con todas las variantes de imágenes
         """
-        try:
-            # URL de la API externa de Strapi con populate específico
-            strapi_url = (
-                "https://strapi-disglobal-production.up.railway.app/api/products"
+        query = normalize_query(request.query_params)
+        if settings.PRODUCTS_SOURCE == "database":
+            data = get_products_from_database(
+                query, search=request.query_params.get("search")
             )
+            response = Response(data, status=status.HTTP_200_OK)
+            response["X-Source"] = "database"
+            return response
 
-            # Construir parámetros de query
-            params = {}
+        stream = request.query_params.get("stream", "").lower() in VALORES_VERDADEROS
 
-            # Parámetros de populate específicos (fijos)
-            params["populate[0]"] = "product_color.images"
-            params["populate[1]"] = "product_features"
-            params["populate[2]"] = "product_tecnology"
+        try:
+            if stream:
+                response = StreamingHttpResponse(
+                    stream_products(open_products_stream(query), query["fields"]),
+                    content_type="application/json",
+                )
+                response["X-Cache"] = "BYPASS"
+                return response
 
-            # Parámetros de paginación
-            page = request.query_params.get("page")
-            if page:
-                params["pagination[page]"] = page
+            data, cache_status = get_products(query)
 
-            page_size = request.query_params.get("pageSize")
-            if page_size:
-                params["pagination[pageSize]"] = page_size
+            response = Response(data, status=status.HTTP_200_OK)
+            response["X-Cache"] = cache_status
+            return response
 
-            # Realizar petición a la API externa
-            response = requests.get(
-                strapi_url,
-                params=params,
-                timeout=30,  # Timeout de 30 segundos
+        except CircuitOpenError as e:
+            response = Response(
+                {
+                    "error": "Error al consultar la API de productos",
+                    "detail": "La API externa no está disponible temporalmente",
+                },
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
             )
+            response["Retry-After"] = math.ceil(e.retry_after)
+            return response
 
-            # Verificar si la petición fue exitosa
-            if response.status_code == 200:
-                # Obtener los datos de Strapi
-                strapi_data = response.json()
-
-                # Procesar y filtrar los datos para devolver solo lo necesario
-                filtered_products = []
-
-                for product in strapi_data.get('data', []):
-                    # Obtener la imagen principal del primer color disponible
-                    main_image = None
-                    if (product.get('product_color') and
-                            len(product['product_color']) > 0):
-                        main_image = product['product_color'][0].get('img')
-
-                    # Obtener todas las imágenes variantes del primer color
-                    image_variants = []
-                    if (product.get('product_color') and
-                            len(product['product_color']) > 0):
-                        images = product['product_color'][0].get('images', [])
-                        image_variants = [
-                            {
-                                "id": img.get('id'),
-                                "img": img.get('img'),
-                                "title": img.get('title')
-                            }
-                            for img in images
-                        ]
-
-                    # Crear el producto filtrado
-                    filtered_product = {
-                        "id": product.get('id'),
-                        "title": product.get('title'),
-                        "description": product.get('description'),
-                        "img": main_image,
-                        "img_variants": image_variants
-                    }
-
-                    filtered_products.append(filtered_product)
-
-                # Crear la respuesta con la misma estructura de paginación
-                filtered_response = {
-                    "data": filtered_products,
-                    "meta": strapi_data.get('meta', {})
-                }
-
-                return Response(filtered_response, status=status.HTTP_200_OK)
-            else:
-                return Response(
-                    {
-                        "error": "Error al consultar la API de productos",
-                        "status_code": response.status_code,
-                        "detail": response.text,
-                    },
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                )
+        except StrapiResponseError as e:
+            return Response(
+                {
+                    "error": "Error al consultar la API de productos",
+                    "status_code": e.status_code,
+                    "detail": e.detail,
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
 
-        except requests.exceptions.Timeout:
+        except (requests.exceptions.Timeout, TimeoutError):
             return Response(
                 {
                     "error": "Error al consultar la API de productos",
@@ -217,3 +241,148 @@ class ProductsAPIView(APIView):
                 {"error": "Error al consultar la API de productos", "detail": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+
+
+class ProductsAsyncView(View):
+    """
+    Versión asíncrona del endpoint de productos.
+
+    Además de ``page`` y ``pageSize`` acepta ``fields`` y ``pages``
+    (``"2-5"`` o ``"all"``) para consultar varias páginas en paralelo y
+    retornarlas unidas en una sola respuesta.
+
+    El despliegue corre bajo WSGI (``core.wsgi``): Django ejecuta la vista
+    con su adaptador async→sync, las páginas se piden en paralelo dentro
+    de la petición y el cliente httpx se crea y se cierra con ella. Bajo
+    ASGI se usa el cliente compartido del event loop del proceso. No pasa
+    por la cache de ``ProductsAPIView``.
+    """
+
+    http_method_names = ["get"]
+
+    async def get(self, request):
+        """Consultar productos desde Strapi sin bloquear el worker"""
+        config = settings.STRAPI
+        query = normalize_query(request.GET)
+        pages = request.GET.get("pages")
+
+        page_range = None
+        if pages:
+            page_range = parse_page_range(pages, config["ASYNC_MAX_PAGES"])
+            if page_range is None:
+                return JsonResponse(
+                    {"error": "El parámetro pages debe ser 'a-b', un número o 'all'"},
+                    status=400,
+                )
+
+        try:
+            shared = isinstance(request, ASGIRequest)
+            async with async_strapi_client(shared=shared) as client:
+                if page_range:
+                    data = await fetch_page_range(
+                        *page_range,
+                        page_size=query["pageSize"],
+                        max_pages=config["ASYNC_MAX_PAGES"],
+                        concurrency=config["ASYNC_CONCURRENCY"],
+                        fields=query["fields"],
+                        client=client,
+                    )
+                else:
+                    data = await fetch_products_async(query, client)
+            return JsonResponse(data)
+
+        except CircuitOpenError as e:
+            response = JsonResponse(
+                {
+                    "error": "Error al consultar la API de productos",
+                    "detail": "La API externa no está disponible temporalmente",
+                },
+                status=503,
+            )
+            response["Retry-After"] = math.ceil(e.retry_after)
+            return response
+
+        except StrapiResponseError as e:
+            return JsonResponse(
+                {
+                    "error": "Error al consultar la API de productos",
+                    "status_code": e.status_code,
+                    "detail": e.detail,
+                },
+                status=500,
+            )
+
+        except httpx.TimeoutException:
+            return JsonResponse(
+                {
+                    "error": "Error al consultar la API de productos",
+                    "detail": "Timeout - La API externa no respondió a tiempo",
+                },
+                status=500,
+            )
+
+        except httpx.TransportError:
+            return JsonResponse(
+                {
+                    "error": "Error al consultar la API de productos",
+                    "detail": "No se pudo conectar con la API externa",
+                },
+                status=500,
+            )
+
+        except Exception as e:
+            return JsonResponse(
+                {"error": "Error al consultar la API de productos", "detail": str(e)},
+                status=500,
+            )
+
+
+class StrapiHealthAPIView(APIView):
+    """
+    Estado de la integración con Strapi en este proceso
+
+    Retorna el estado del circuit breaker, los contadores de la ventana
+    deslizante y el histograma de latencias. Responde 503 con el
+    circuito abierto para que los monitores lo detecten directamente.
+    """
+
+    permission_classes = [permissions.AllowAny]
+
+    @swagger_auto_schema(
+        operation_description="Estado del circuit breaker y latencias de Strapi",
+        responses={
+            200: openapi.Response(
+                description="Circuito cerrado o en prueba (half_open)",
+                examples={
+                    "application/json": {
+                        "state": "closed",
+                        "retry_after": None,
+                        "window": {
+                            "seconds": 60,
+                            "calls": 12,
+                            "failures": 0,
+                            "slow_calls": 0,
+                            "error_rate": 0.0,
+                            "slow_rate": 0.0,
+                        },
+                        "latency": {
+                            "buckets": {"0.05": 0, "0.1": 3, "+Inf": 12},
+                            "count": 12,
+                            "sum": 2.31,
+                        },
+                    }
+                },
+            ),
+            503: openapi.Response(description="Circuito abierto"),
+        },
+        tags=["Productos"],
+    )
+    def get(self, request):
+        """Consultar el estado de salud de la integración con Strapi"""
+        snapshot = get_circuit_breaker().snapshot()
+        code = (
+            status.HTTP_503_SERVICE_UNAVAILABLE
+            if snapshot["state"] == OPEN
+            else status.HTTP_200_OK
+        )
+        return Response(snapshot, status=code)
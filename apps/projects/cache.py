@@ -0,0 +1,138 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import Count, Max
+
+from .models import Project
+from .statistics import calcular_estadisticas
+
+
+SNAPSHOT_KEY = "projects:stats:snapshot:{version}:{digest}"
+VERSION_KEY = "projects:stats:version"
+CONTADOR_KEY = "projects:stats:{evento}"
+
+# Eventos contabilizados para medir cuánto tráfico absorbe el cache
+EVENTOS = ("hits", "misses", "not_modified", "invalidaciones")
+
+
+def cache_compartido():
+    """Indica si el cache es compartido entre procesos (Redis)"""
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache))
+
+
+def version_desde_bd():
+    """
+    Versión derivada de la tabla: ``MAX(fecha_modificacion)`` y total.
+
+    Cuesta una consulta agregada por petición; solo se usa cuando el
+    cache es local a cada proceso y una clave de versión no llegaría a
+    los demás workers.
+    """
+    resultado = Project.objects.order_by().aggregate(
+        ultima=Max("fecha_modificacion"), total=Count("id")
+    )
+    ultima = resultado["ultima"]
+    marca = int(ultima.timestamp() * 1000) if ultima else 0
+    return f"{marca}-{resultado['total']}"
+
+
+def obtener_version():
+    """
+    Retorna la versión vigente de las estadísticas.
+
+    Con un cache compartido es una clave que las señales del modelo
+    incrementan (ver ``invalidar_estadisticas``), sin consultar la base
+    de datos. Si la clave se perdió se crea con la hora actual, de modo
+    que no coincide con ninguna versión anterior. Con LocMem se deriva
+    de la tabla (``version_desde_bd``).
+    """
+    if not cache_compartido():
+        return version_desde_bd()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(VERSION_KEY)
+    if version is None:
+        return version_desde_bd()
+    return f"v{version}"
+
+
+def invalidar_estadisticas():
+    """
+    Invalida los snapshots y ETags de estadísticas.
+
+    Se llama desde ``post_save``/``post_delete`` al confirmarse la
+    transacción. Con un cache compartido incrementa la clave de versión;
+    con LocMem la versión cambia sola al modificarse la tabla. Los
+    ``update()`` de queryset no disparan señales: con cache compartido
+    sus cambios se ven al expirar el snapshot
+    (``PROJECTS_STATS_CACHE_TIMEOUT``).
+    """
+    registrar_evento("invalidaciones")
+    if not cache_compartido():
+        return
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, int(time.time() * 1000), None)
+
+
+def registrar_evento(evento):
+    """Incrementa el contador de un evento del cache"""
+    key = CONTADOR_KEY.format(evento=evento)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def obtener_contadores():
+    """Retorna los contadores de hits/misses del snapshot de estadísticas"""
+    valores = cache.get_many([CONTADOR_KEY.format(evento=e) for e in EVENTOS])
+    contadores = {e: valores.get(CONTADOR_KEY.format(evento=e), 0) for e in EVENTOS}
+
+    lecturas = contadores["hits"] + contadores["misses"] + contadores["not_modified"]
+    absorbidas = contadores["hits"] + contadores["not_modified"]
+    contadores["hit_ratio"] = round(absorbidas / lecturas, 4) if lecturas else None
+    contadores["version"] = obtener_version()
+    return contadores
+
+
+def digest_parametros(query_params):
+    """Huella estable de los parámetros de la petición"""
+    normalizados = sorted(
+        (clave, valor)
+        for clave in query_params
+        for valor in query_params.getlist(clave)
+    )
+    return hashlib.md5(repr(normalizados).encode("utf-8")).hexdigest()
+
+
+def etag_estadisticas(version, query_params):
+    """ETag del snapshot para una versión y combinación de filtros"""
+    return f'"{version}-{digest_parametros(query_params)[:16]}"'
+
+
+def obtener_estadisticas(queryset, query_params, version):
+    """
+    Retorna las estadísticas desde el snapshot en cache o las calcula.
+
+    El snapshot se indexa por versión y filtros, por lo que guardar o
+    eliminar un proyecto (que incrementa la versión) lo invalida sin
+    tener que recorrer las claves existentes.
+    """
+    key = SNAPSHOT_KEY.format(version=version, digest=digest_parametros(query_params))
+    estadisticas = cache.get(key)
+    if estadisticas is not None:
+        registrar_evento("hits")
+        return estadisticas
+
+    registrar_evento("misses")
+    estadisticas = calcular_estadisticas(queryset)
+    cache.set(key, estadisticas, settings.PROJECTS_STATS_CACHE_TIMEOUT)
+    return estadisticas
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+LOCMEM_BACKEND = "django.core.cache.backends.locmem.LocMemCache"
+
+
+@register()
+def cache_compartido(app_configs, **kwargs):
+    """
+    Advierte si producción usa el cache en memoria local.
+
+    Con varios workers de gunicorn cada proceso tiene su propia copia:
+    los snapshots de estadísticas se recalculan por worker y los
+    contadores de hits/misses solo reflejan al proceso que responde.
+    """
+    if settings.DEBUG or settings.CACHES["default"]["BACKEND"] != LOCMEM_BACKEND:
+        return []
+    return [
+        Warning(
+            "El cache por defecto es LocMemCache con DEBUG=False.",
+            hint="Define USE_REDIS_CACHE=True (REDIS_URL) para compartir el "
+            "cache de estadísticas entre workers.",
+            id="projects.W001",
+        )
+    ]
@@ -0,0 +1,67 @@
+import hashlib
+from calendar import timegm
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .cache import digest_parametros
+
+
+def _timestamp(fecha):
+    """Convierte un datetime en timestamp UTC (precisión de segundos)"""
+    return timegm(fecha.utctimetuple()) if fecha else None
+
+
+def validadores_coleccion(queryset, query_params):
+    """
+    Calcula el ETag de una colección de proyectos.
+
+    Se basa en ``MAX(fecha_modificacion)`` y el total de filas, lo que
+    detecta altas, ediciones y bajas con una sola consulta agregada y
+    sin serializar ningún proyecto. No se emite Last-Modified: cuando una
+    fila se borra o sale del filtro el máximo no avanza, y un cliente que
+    solo envía ``If-Modified-Since`` recibiría un 304 obsoleto.
+    """
+    resultado = queryset.order_by().aggregate(
+        ultima=Max("fecha_modificacion"), total=Count("id")
+    )
+    ultima = resultado["ultima"]
+
+    huella = "|".join(
+        [
+            ultima.isoformat() if ultima else "",
+            str(resultado["total"]),
+            digest_parametros(query_params),
+        ]
+    )
+    return f'"{hashlib.md5(huella.encode("utf-8")).hexdigest()}"'
+
+
+def validadores_detalle(proyecto):
+    """Calcula ETag y Last-Modified de un proyecto a partir de su timestamp"""
+    modificado = proyecto.fecha_modificacion
+    etag = f'"{proyecto.pk}-{modificado.timestamp():.6f}"'
+    return etag, _timestamp(modificado)
+
+
+def respuesta_condicional(request, etag, last_modified=None):
+    """
+    Retorna ``304 Not Modified`` si los validadores del cliente coinciden.
+
+    Evalúa ``If-None-Match`` e ``If-Modified-Since`` con las reglas de
+    Django. Retorna ``None`` cuando hay que construir la respuesta completa.
+    """
+    return get_conditional_response(
+        request._request, etag=etag, last_modified=last_modified
+    )
+
+
+def aplicar_validadores(response, etag, last_modified=None):
+    """Agrega ETag y Last-Modified a una respuesta exitosa"""
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    # Obligar a revalidar: el cliente reutiliza su copia solo tras un 304
+    response["Cache-Control"] = "no-cache"
+    return response
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:52
+
+import core.db
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0001_initial'),
+    ]
+
+    operations = [
+        core.db.OptionalTrigramExtension(),
+        core.db.PostgresOnlyAddIndex(
+            model_name='project',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('nombre', output_field=models.TextField())), name='gin_trgm_ops'), name='project_nombre_trgm'),
+        ),
+        core.db.PostgresOnlyAddIndex(
+            model_name='project',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('objetivo', output_field=models.TextField())), name='gin_trgm_ops'), name='project_objetivo_trgm'),
+        ),
+        core.db.PostgresOnlyAddIndex(
+            model_name='project',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('ultima_actualizacion', output_field=models.TextField())), name='gin_trgm_ops'), name='project_ultima_act_trgm'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 
+from core.db import trigram_index
+
 
 class Project(models.Model):
     """
@@ -92,6 +94,12 @@ class Project(models.Model):
         verbose_name = "Proyecto"
         verbose_name_plural = "Proyectos"
         ordering = ["nombre"]
+        indexes = [
+            # Índices de trigramas para la búsqueda (solo PostgreSQL)
+            trigram_index("nombre", "project_nombre_trgm"),
+            trigram_index("objetivo", "project_objetivo_trgm"),
+            trigram_index("ultima_actualizacion", "project_ultima_act_trgm"),
+        ]
 
     def __str__(self):
         return f"{self.nombre} - {self.get_fase_display()}"
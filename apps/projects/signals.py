@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidar_estadisticas
+from .models import Project
+
+
+@receiver(post_save, sender=Project)
+def invalidar_estadisticas_proyectos(sender, **kwargs):
+    """Invalida el snapshot de estadísticas al guardar un proyecto"""
+    transaction.on_commit(invalidar_estadisticas)
+
+
+@receiver(post_delete, sender=Project)
+def invalidar_estadisticas_eliminacion(sender, **kwargs):
+    """Invalida el snapshot de estadísticas al eliminar un proyecto"""
+    transaction.on_commit(invalidar_estadisticas)
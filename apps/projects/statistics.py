@@ -0,0 +1,51 @@
+from django.db.models import Count, Q
+
+from .models import Project
+
+
+# Dimensiones agregadas en la respuesta: clave del JSON -> (campo, choices)
+DIMENSIONES = {
+    "por_fase": ("fase", Project.FASE_CHOICES),
+    "por_status": ("status", Project.STATUS_CHOICES),
+    "por_prioridad": ("prioridad", Project.PRIORIDAD_CHOICES),
+}
+
+
+def _alias(campo, valor):
+    """Nombre de la anotación para el conteo de un valor de un campo"""
+    return f"{campo}__{valor}"
+
+
+def calcular_estadisticas(queryset):
+    """
+    Calcula las estadísticas de proyectos en una sola consulta.
+
+    Usa agregación condicional (``COUNT(*) FILTER (WHERE ...)``) para
+    obtener el total y el desglose por cada dimensión en un único
+    recorrido, sin importar cuántos choices existan. Recibe un queryset
+    ya filtrado, por lo que respeta los mismos filtros que el listado.
+    """
+    agregados = {"total_proyectos": Count("id")}
+    for campo, choices in DIMENSIONES.values():
+        for valor, _ in choices:
+            agregados[_alias(campo, valor)] = Count("id", filter=Q(**{campo: valor}))
+
+    for valor, _ in Project.LISTO_OFRECER_CHOICES:
+        agregados[_alias("listo_para_ofrecer", valor)] = Count(
+            "id", filter=Q(listo_para_ofrecer=valor)
+        )
+
+    # order_by() evita que el ordering por defecto se arrastre a la consulta
+    resultado = queryset.order_by().aggregate(**agregados)
+
+    estadisticas = {"total_proyectos": resultado["total_proyectos"]}
+    for clave, (campo, choices) in DIMENSIONES.items():
+        estadisticas[clave] = {
+            valor: resultado[_alias(campo, valor)] for valor, _ in choices
+        }
+
+    estadisticas["listos_para_ofrecer"] = resultado[_alias("listo_para_ofrecer", "si")]
+    estadisticas["no_listos_para_ofrecer"] = resultado[
+        _alias("listo_para_ofrecer", "no")
+    ]
+    return estadisticas
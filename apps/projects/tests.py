@@ -1,3 +1,361 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.db.models.functions import Length
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from core.db import extension_installed, prefix_index, requires_trigram, trigram_index
+from core.search import SimpleSearchBackend, TrigramSearchBackend, get_search_backend
+
+from . import cache as cache_estadisticas
+from .cache import obtener_contadores, obtener_version
+from .models import Project
+from .statistics import calcular_estadisticas
+
+
+def crear_proyecto(nombre, **campos):
+    """Proyecto mínimo para los tests"""
+    campos.setdefault("objetivo", f"Objetivo de {nombre}")
+    campos.setdefault("ultima_actualizacion", "Sin novedades")
+    return Project.objects.create(nombre=nombre, **campos)
+
+
+def estadisticas_por_consultas(queryset):
+    """Cálculo original: un COUNT por cada valor de cada dimensión"""
+    def contar(campo, choices):
+        return {valor: queryset.filter(**{campo: valor}).count() for valor, _ in choices}
+
+    return {
+        "total_proyectos": queryset.count(),
+        "por_fase": contar("fase", Project.FASE_CHOICES),
+        "por_status": contar("status", Project.STATUS_CHOICES),
+        "por_prioridad": contar("prioridad", Project.PRIORIDAD_CHOICES),
+        "listos_para_ofrecer": queryset.filter(listo_para_ofrecer="si").count(),
+        "no_listos_para_ofrecer": queryset.filter(listo_para_ofrecer="no").count(),
+    }
+
+
+class CalcularEstadisticasTests(TestCase):
+    """Estadísticas agregadas en una sola consulta"""
+
+    def setUp(self):
+        combinaciones = [
+            ("ejecucion", "en_curso", "alta", "si"),
+            ("ejecucion", "en_seguimiento", "normal", "no"),
+            ("completado", "en_curso", "normal", "si"),
+            ("pausado", "pausado", "baja", "no"),
+            ("pausado", "pausado", "alta", "no"),
+        ]
+        for numero, (fase, estado, prioridad, listo) in enumerate(combinaciones):
+            crear_proyecto(
+                f"Proyecto {numero}", fase=fase, status=estado,
+                prioridad=prioridad, listo_para_ofrecer=listo,
+            )
+
+    def test_mismo_resultado_en_una_consulta(self):
+        for queryset in (Project.objects.all(), Project.objects.filter(prioridad="alta")):
+            with self.assertNumQueries(1):
+                estadisticas = calcular_estadisticas(queryset)
+            self.assertEqual(estadisticas, estadisticas_por_consultas(queryset))
+
+    def test_tabla_vacia(self):
+        Project.objects.all().delete()
+
+        estadisticas = calcular_estadisticas(Project.objects.all())
+        self.assertEqual(estadisticas, estadisticas_por_consultas(Project.objects.all()))
+        self.assertEqual(estadisticas["por_fase"], {"ejecucion": 0, "completado": 0, "pausado": 0})
+
+
+class EstadisticasCacheTests(TestCase):
+    """Snapshot de estadísticas: versión, invalidación y ETag/304"""
+
+    url = "/api/v1/projects/estadisticas/"
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.alfa = crear_proyecto("Alfa", listo_para_ofrecer="si")
+        self.beta = crear_proyecto("Beta", prioridad="alta")
+
+    def test_version_cambia_con_altas_ediciones_y_bajas(self):
+        inicial = obtener_version()
+
+        gamma = crear_proyecto("Gamma")
+        tras_alta = obtener_version()
+        self.assertNotEqual(tras_alta, inicial)
+
+        Project.objects.filter(pk=gamma.pk).update(
+            fecha_modificacion=gamma.fecha_modificacion + timedelta(seconds=1)
+        )
+        tras_edicion = obtener_version()
+        self.assertNotEqual(tras_edicion, tras_alta)
+
+        gamma.delete()
+        self.assertNotEqual(obtener_version(), tras_edicion)
+
+    def test_snapshot_se_reutiliza_hasta_que_cambian_los_datos(self):
+        primera = self.client.get(self.url)
+        self.assertEqual(primera.status_code, 200)
+        self.assertEqual(primera.json()["total_proyectos"], 2)
+
+        segunda = self.client.get(self.url)
+        self.assertEqual(segunda.json(), primera.json())
+        contadores = obtener_contadores()
+        self.assertEqual((contadores["misses"], contadores["hits"]), (1, 1))
+
+        crear_proyecto("Gamma")
+        tercera = self.client.get(self.url)
+        self.assertEqual(tercera.json()["total_proyectos"], 3)
+        self.assertNotEqual(tercera["ETag"], primera["ETag"])
+        self.assertEqual(obtener_contadores()["misses"], 2)
+
+    def test_etag_y_304(self):
+        respuesta = self.client.get(self.url)
+        etag = respuesta["ETag"]
+
+        no_modificado = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(no_modificado.status_code, 304)
+        self.assertEqual(obtener_contadores()["not_modified"], 1)
+
+        self.beta.delete()
+        tras_baja = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(tras_baja.status_code, 200)
+        self.assertEqual(tras_baja.json()["total_proyectos"], 1)
+
+    def test_etag_depende_de_los_filtros(self):
+        todos = self.client.get(self.url)
+        filtrados = self.client.get(self.url, {"prioridad": "alta"})
+
+        self.assertNotEqual(todos["ETag"], filtrados["ETag"])
+        self.assertEqual(filtrados.json()["total_proyectos"], 1)
+        respuesta = self.client.get(
+            self.url, {"prioridad": "alta"}, HTTP_IF_NONE_MATCH=todos["ETag"]
+        )
+        self.assertEqual(respuesta.status_code, 200)
+
+
+class VersionCompartidaTests(TestCase):
+    """Versión en el cache compartido, incrementada por las señales"""
+
+    def setUp(self):
+        cache.clear()
+        compartido = mock.patch.object(cache_estadisticas, "cache_compartido", return_value=True)
+        compartido.start()
+        self.addCleanup(compartido.stop)
+
+    def test_version_sin_consultas(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(obtener_version(), obtener_version())
+
+    def test_version_cambia_al_confirmar(self):
+        inicial = obtener_version()
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            proyecto = crear_proyecto("Gamma")
+            self.assertEqual(obtener_version(), inicial)
+        self.assertEqual(len(callbacks), 1)
+        tras_alta = obtener_version()
+        self.assertNotEqual(tras_alta, inicial)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            proyecto.delete()
+        self.assertNotEqual(obtener_version(), tras_alta)
+
+    def test_clave_perdida_no_reutiliza_versiones(self):
+        inicial = obtener_version()
+        cache.delete(cache_estadisticas.VERSION_KEY)
+
+        with mock.patch.object(cache_estadisticas.time, "time", return_value=1):
+            self.assertNotEqual(obtener_version(), inicial)
+
+
+class GetCondicionalTests(TestCase):
+    """ETag y Last-Modified del listado, el detalle y listos_para_ofrecer"""
+
+    url = "/api/v1/projects/"
+
+    def setUp(self):
+        self.client = APIClient()
+        self.alfa = crear_proyecto("Alfa", listo_para_ofrecer="si")
+        self.beta = crear_proyecto("Beta", listo_para_ofrecer="si")
+
+    def test_listado_solo_emite_etag(self):
+        respuesta = self.client.get(self.url)
+
+        self.assertIn("ETag", respuesta)
+        self.assertNotIn("Last-Modified", respuesta)
+        self.assertEqual(respuesta["Cache-Control"], "no-cache")
+        no_modificado = self.client.get(self.url, HTTP_IF_NONE_MATCH=respuesta["ETag"])
+        self.assertEqual(no_modificado.status_code, 304)
+
+    def test_listado_cambia_al_eliminar(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        self.beta.delete()
+        respuesta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([p["nombre"] for p in respuesta.json()["results"]], ["Alfa"])
+
+    def test_listado_cambia_cuando_una_fila_sale_del_filtro(self):
+        url = f"{self.url}listos_para_ofrecer/"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # La fila más antigua sale del filtro: MAX(fecha_modificacion) no
+        # avanza, pero el total sí
+        Project.objects.filter(pk=self.alfa.pk).update(
+            listo_para_ofrecer="no", fecha_modificacion=self.alfa.fecha_modificacion
+        )
+        respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.json()), 1)
+
+    def test_detalle_con_etag_y_last_modified(self):
+        url = f"{self.url}{self.alfa.pk}/"
+        respuesta = self.client.get(url)
+
+        self.assertIn("Last-Modified", respuesta)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=respuesta["ETag"]).status_code, 304
+        )
+        self.assertEqual(
+            self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=respuesta["Last-Modified"]
+            ).status_code,
+            304,
+        )
+
+        self.alfa.nombre = "Alfa 2"
+        self.alfa.save()
+        respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=respuesta["ETag"])
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()["nombre"], "Alfa 2")
+
+
+class PaginacionKeysetTests(TestCase):
+    """Paginación por keyset opcional del listado (``?pagination=cursor``)"""
+
+    url = "/api/v1/projects/"
+
+    def setUp(self):
+        self.client = APIClient()
+        for numero in range(7):
+            crear_proyecto(f"Proyecto {numero}", prioridad="alta" if numero % 2 else "normal")
+
+    def recorrer(self, params):
+        """Sigue los enlaces ``next`` y retorna las páginas obtenidas"""
+        paginas = []
+        respuesta = self.client.get(self.url, params)
+        while True:
+            self.assertEqual(respuesta.status_code, 200)
+            paginas.append(respuesta.json())
+            siguiente = paginas[-1]["next"]
+            if not siguiente:
+                return paginas
+            respuesta = self.client.get(siguiente)
+
+    def test_por_defecto_paginacion_por_numero(self):
+        contenido = self.client.get(self.url).json()
+
+        self.assertEqual(contenido["count"], 7)
+        self.assertNotIn("cursor", contenido["next"] or "")
+
+    def test_recorre_todo_sin_repetir_ni_contar(self):
+        paginas = self.recorrer({"pagination": "cursor", "page_size": 3})
+
+        self.assertEqual([len(p["results"]) for p in paginas], [3, 3, 1])
+        nombres = [p["nombre"] for pagina in paginas for p in pagina["results"]]
+        self.assertEqual(nombres, sorted(nombres))
+        self.assertEqual(len(set(nombres)), 7)
+        self.assertTrue(all("count" not in pagina for pagina in paginas))
+        self.assertIsNone(paginas[0]["previous"])
+        self.assertIsNotNone(paginas[-1]["previous"])
+
+    def test_respeta_filtros_y_ordenamiento(self):
+        paginas = self.recorrer(
+            {"pagination": "cursor", "page_size": 2, "prioridad": "alta", "ordering": "-nombre"}
+        )
+
+        nombres = [p["nombre"] for pagina in paginas for p in pagina["results"]]
+        self.assertEqual(nombres, ["Proyecto 5", "Proyecto 3", "Proyecto 1"])
+
+    def test_include_total(self):
+        contenido = self.client.get(
+            self.url, {"pagination": "cursor", "page_size": 2, "include_total": "1"}
+        ).json()
+
+        self.assertEqual(contenido["count"], 7)
+        self.assertEqual(len(contenido["results"]), 2)
+
+
+class NombreCortoSearchBackend(SimpleSearchBackend):
+    """Backend de prueba: relevancia = nombre más corto primero"""
+
+    supports_ranking = True
+
+    def rank(self, queryset, term, fields):
+        return queryset.order_by(Length("nombre"), "nombre")
+
+
+class BusquedaTests(TestCase):
+    """Búsqueda del listado y orden por relevancia"""
+
+    url = "/api/v1/projects/"
+
+    def setUp(self):
+        self.client = APIClient()
+        crear_proyecto("Portal de clientes largo")
+        crear_proyecto("Portal")
+        crear_proyecto("Inventario", objetivo="Integrar el portal de pagos")
+
+    def nombres(self, params):
+        respuesta = self.client.get(self.url, params)
+        self.assertEqual(respuesta.status_code, 200)
+        return [p["nombre"] for p in respuesta.json()["results"]]
+
+    def test_backend_segun_la_base_de_datos(self):
+        backend = get_search_backend()
+        if extension_installed(connection):
+            self.assertIsInstance(backend, TrigramSearchBackend)
+        else:
+            self.assertIs(type(backend), SimpleSearchBackend)
+
+    def test_indices_de_trigramas(self):
+        self.assertTrue(requires_trigram(trigram_index("nombre", "x_trgm")))
+        self.assertFalse(requires_trigram(prefix_index("nombre", "x_prefix")))
+
+    @override_settings(SEARCH_BACKEND="core.search.SimpleSearchBackend")
+    def test_filtra_en_todos_los_campos(self):
+        self.assertEqual(
+            self.nombres({"search": "portal"}),
+            ["Inventario", "Portal", "Portal de clientes largo"],
+        )
+        self.assertEqual(self.nombres({"search": "pagos"}), ["Inventario"])
+
+    @override_settings(SEARCH_BACKEND=f"{__name__}.NombreCortoSearchBackend")
+    def test_ordena_por_relevancia(self):
+        self.assertEqual(
+            self.nombres({"search": "portal"}),
+            ["Portal", "Inventario", "Portal de clientes largo"],
+        )
+
+    @override_settings(SEARCH_BACKEND=f"{__name__}.NombreCortoSearchBackend")
+    def test_ordering_o_cursor_desactivan_la_relevancia(self):
+        self.assertEqual(
+            self.nombres({"search": "portal", "ordering": "-nombre"}),
+            ["Portal de clientes largo", "Portal", "Inventario"],
+        )
+        self.assertEqual(
+            self.nombres({"search": "portal", "pagination": "cursor"}),
+            ["Inventario", "Portal", "Portal de clientes largo"],
+        )
+
+    @skipUnless(
+        connection.vendor == "postgresql" and extension_installed(connection),
+        "Requiere PostgreSQL con pg_trgm",
+    )
+    def test_relevancia_por_trigramas(self):
+        self.assertEqual(self.nombres({"search": "portal"})[0], "Portal")
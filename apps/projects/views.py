@@ -8,6 +8,22 @@ from django_filters.rest_framework import DjangoFilterBackend
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
+from .cache import (
+    etag_estadisticas,
+    obtener_contadores,
+    obtener_estadisticas,
+    obtener_version,
+    registrar_evento,
+)
+from core.pagination import PARAMETROS_KEYSET, KeysetPaginationMixin
+from core.search import RankedSearchFilter
+
+from .conditional import (
+    aplicar_validadores,
+    respuesta_condicional,
+    validadores_coleccion,
+    validadores_detalle,
+)
 from .models import Project
 from .serializers import (
     ProjectSerializer,
@@ -17,20 +33,66 @@ from .serializers import (
 )
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+# Parámetros de filtrado compartidos por el listado y las estadísticas
+PARAMETROS_FILTRO = [
+    openapi.Parameter(
+        "fase",
+        openapi.IN_QUERY,
+        description="Filtrar por fase (ejecucion, completado, pausado)",
+        type=openapi.TYPE_STRING,
+    ),
+    openapi.Parameter(
+        "status",
+        openapi.IN_QUERY,
+        description="Filtrar por status (en_curso, en_seguimiento, pausado)",
+        type=openapi.TYPE_STRING,
+    ),
+    openapi.Parameter(
+        "prioridad",
+        openapi.IN_QUERY,
+        description="Filtrar por prioridad (normal, alta, baja)",
+        type=openapi.TYPE_STRING,
+    ),
+    openapi.Parameter(
+        "listo_para_ofrecer",
+        openapi.IN_QUERY,
+        description="Filtrar por disponibilidad (si, no)",
+        type=openapi.TYPE_STRING,
+    ),
+    openapi.Parameter(
+        "search",
+        openapi.IN_QUERY,
+        description="Buscar en nombre, objetivo o última actualización "
+        "(ordenado por relevancia si no se indica ordering)",
+        type=openapi.TYPE_STRING,
+    ),
+]
+
+PARAMETRO_ORDENAMIENTO = openapi.Parameter(
+    "ordering",
+    openapi.IN_QUERY,
+    description="Ordenar por campo (nombre, fecha_creacion, fecha_modificacion)",
+    type=openapi.TYPE_STRING,
+)
+
+
+class ProjectViewSet(KeysetPaginationMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar proyectos de la empresa
 
     Permite realizar operaciones CRUD sobre los proyectos y
-    proporciona filtros y búsqueda avanzada.
+    proporciona filtros y búsqueda avanzada. El listado admite
+    paginación por keyset con ``?pagination=cursor``.
     """
 
     queryset = Project.objects.all()
     permission_classes = [AllowAny]
+    # RankedSearchFilter va al final para ordenar por relevancia sobre
+    # el orden por defecto (solo si no se envía ?ordering=)
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
         filters.OrderingFilter,
+        RankedSearchFilter,
     ]
     filterset_fields = ["fase", "status", "prioridad", "listo_para_ofrecer"]
     search_fields = ["nombre", "objetivo", "ultima_actualizacion"]
@@ -49,50 +111,23 @@ class ProjectViewSet(viewsets.ModelViewSet):
 
     @swagger_auto_schema(
         operation_description="Obtener lista de todos los proyectos",
-        manual_parameters=[
-            openapi.Parameter(
-                "fase",
-                openapi.IN_QUERY,
-                description="Filtrar por fase (ejecucion, completado, pausado)",
-                type=openapi.TYPE_STRING,
-            ),
-            openapi.Parameter(
-                "status",
-                openapi.IN_QUERY,
-                description="Filtrar por status (en_curso, en_seguimiento, pausado)",
-                type=openapi.TYPE_STRING,
-            ),
-            openapi.Parameter(
-                "prioridad",
-                openapi.IN_QUERY,
-                description="Filtrar por prioridad (normal, alta, baja)",
-                type=openapi.TYPE_STRING,
-            ),
-            openapi.Parameter(
-                "listo_para_ofrecer",
-                openapi.IN_QUERY,
-                description="Filtrar por disponibilidad (si, no)",
-                type=openapi.TYPE_STRING,
-            ),
-            openapi.Parameter(
-                "search",
-                openapi.IN_QUERY,
-                description="Buscar en nombre, objetivo o última actualización",
-                type=openapi.TYPE_STRING,
-            ),
-            openapi.Parameter(
-                "ordering",
-                openapi.IN_QUERY,
-                description="Ordenar por campo (nombre, fecha_creacion, fecha_modificacion)",
-                type=openapi.TYPE_STRING,
-            ),
-        ],
+        manual_parameters=PARAMETROS_FILTRO
+        + [PARAMETRO_ORDENAMIENTO]
+        + PARAMETROS_KEYSET,
         responses={200: ProjectListSerializer(many=True)},
         tags=["Proyectos"],
     )
     def list(self, request, *args, **kwargs):
         """Listar todos los proyectos con filtros y búsqueda"""
-        return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        etag = validadores_coleccion(queryset, request.query_params)
+
+        no_modificado = respuesta_condicional(request, etag)
+        if no_modificado is not None:
+            return no_modificado
+
+        response = super().list(request, *args, **kwargs)
+        return aplicar_validadores(response, etag)
 
     @swagger_auto_schema(
         operation_description="Obtener detalles de un proyecto específico",
@@ -101,7 +136,15 @@ class ProjectViewSet(viewsets.ModelViewSet):
     )
     def retrieve(self, request, *args, **kwargs):
         """Obtener detalles de un proyecto específico"""
-        return super().retrieve(request, *args, **kwargs)
+        instance = self.get_object()
+        etag, last_modified = validadores_detalle(instance)
+
+        no_modificado = respuesta_condicional(request, etag, last_modified)
+        if no_modificado is not None:
+            return no_modificado
+
+        serializer = self.get_serializer(instance)
+        return aplicar_validadores(Response(serializer.data), etag, last_modified)
 
     @swagger_auto_schema(
         operation_description="Crear un nuevo proyecto",
@@ -154,7 +197,9 @@ class ProjectViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
     @swagger_auto_schema(
-        operation_description="Obtener estadísticas de proyectos",
+        operation_description="Obtener estadísticas de proyectos. Acepta los "
+        "mismos filtros que el listado y calcula todo en una sola consulta",
+        manual_parameters=PARAMETROS_FILTRO,
         responses={
             200: openapi.Response(
                 description="Estadísticas de proyectos",
@@ -178,42 +223,46 @@ class ProjectViewSet(viewsets.ModelViewSet):
     )
     @action(detail=False, methods=["get"])
     def estadisticas(self, request):
-        """Obtener estadísticas generales de proyectos"""
-        total_proyectos = Project.objects.count()
-
-        # Estadísticas por fase
-        por_fase = {}
-        for fase_value, _ in Project.FASE_CHOICES:
-            por_fase[fase_value] = Project.objects.filter(fase=fase_value).count()
-
-        # Estadísticas por status
-        por_status = {}
-        for status_value, _ in Project.STATUS_CHOICES:
-            por_status[status_value] = Project.objects.filter(
-                status=status_value
-            ).count()
-
-        # Estadísticas por prioridad
-        por_prioridad = {}
-        for prioridad_value, _ in Project.PRIORIDAD_CHOICES:
-            por_prioridad[prioridad_value] = Project.objects.filter(
-                prioridad=prioridad_value
-            ).count()
-
-        # Estadísticas de disponibilidad
-        listos_para_ofrecer = Project.objects.filter(listo_para_ofrecer="si").count()
-        no_listos_para_ofrecer = Project.objects.filter(listo_para_ofrecer="no").count()
-
-        estadisticas = {
-            "total_proyectos": total_proyectos,
-            "por_fase": por_fase,
-            "por_status": por_status,
-            "por_prioridad": por_prioridad,
-            "listos_para_ofrecer": listos_para_ofrecer,
-            "no_listos_para_ofrecer": no_listos_para_ofrecer,
-        }
-
-        return Response(estadisticas, status=status.HTTP_200_OK)
+        """Obtener estadísticas generales de proyectos (acepta los filtros del listado)"""
+        version = obtener_version()
+        etag = etag_estadisticas(version, request.query_params)
+
+        # El cliente ya tiene el snapshot vigente: responder sin cuerpo
+        no_modificado = respuesta_condicional(request, etag)
+        if no_modificado is not None:
+            registrar_evento("not_modified")
+            return no_modificado
+
+        queryset = self.filter_queryset(self.get_queryset())
+        estadisticas = obtener_estadisticas(queryset, request.query_params, version)
+
+        response = Response(estadisticas, status=status.HTTP_200_OK)
+        return aplicar_validadores(response, etag)
+
+    @swagger_auto_schema(
+        operation_description="Obtener contadores del cache de estadísticas "
+        "(hits, misses, respuestas 304 e invalidaciones)",
+        responses={
+            200: openapi.Response(
+                description="Contadores del cache de estadísticas",
+                examples={
+                    "application/json": {
+                        "hits": 120,
+                        "misses": 4,
+                        "not_modified": 310,
+                        "invalidaciones": 3,
+                        "hit_ratio": 0.9908,
+                        "version": "1760659200000-12",
+                    }
+                },
+            )
+        },
+        tags=["Proyectos"],
+    )
+    @action(detail=False, methods=["get"], url_path="estadisticas/cache")
+    def estadisticas_cache(self, request):
+        """Obtener los contadores del snapshot de estadísticas"""
+        return Response(obtener_contadores(), status=status.HTTP_200_OK)
 
     @swagger_auto_schema(
         operation_description="Obtener solo proyectos listos para ofrecer",
@@ -224,5 +273,12 @@ class ProjectViewSet(viewsets.ModelViewSet):
     def listos_para_ofrecer(self, request):
         """Obtener solo los proyectos que están listos para ofrecer"""
         proyectos = self.get_queryset().filter(listo_para_ofrecer="si")
+        etag = validadores_coleccion(proyectos, request.query_params)
+
+        no_modificado = respuesta_condicional(request, etag)
+        if no_modificado is not None:
+            return no_modificado
+
         serializer = ProjectListSerializer(proyectos, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        response = Response(serializer.data, status=status.HTTP_200_OK)
+        return aplicar_validadores(response, etag)
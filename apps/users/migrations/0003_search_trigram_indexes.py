@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:52
+
+import core.db
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0002_alter_user_options_user_direccion_user_documento_and_more'),
+    ]
+
+    operations = [
+        core.db.OptionalTrigramExtension(),
+        core.db.PostgresOnlyAddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('username', output_field=models.TextField())), name='gin_trgm_ops'), name='user_username_trgm'),
+        ),
+        core.db.PostgresOnlyAddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('first_name', output_field=models.TextField())), name='gin_trgm_ops'), name='user_first_name_trgm'),
+        ),
+        core.db.PostgresOnlyAddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('last_name', output_field=models.TextField())), name='gin_trgm_ops'), name='user_last_name_trgm'),
+        ),
+        core.db.PostgresOnlyAddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('documento', output_field=models.TextField())), name='gin_trgm_ops'), name='user_documento_trgm'),
+        ),
+    ]
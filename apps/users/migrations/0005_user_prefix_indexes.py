@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:11
+
+import core.db
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0004_segment_indexes'),
+    ]
+
+    operations = [
+        core.db.PostgresOnlyAddIndex(
+            model_name='user',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('username', output_field=models.TextField())), name='text_pattern_ops'), name='user_username_prefix'),
+        ),
+        core.db.PostgresOnlyAddIndex(
+            model_name='user',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('first_name', output_field=models.TextField())), name='text_pattern_ops'), name='user_first_name_prefix'),
+        ),
+        core.db.PostgresOnlyAddIndex(
+            model_name='user',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('last_name', output_field=models.TextField())), name='text_pattern_ops'), name='user_last_name_prefix'),
+        ),
+    ]
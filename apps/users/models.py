@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from core.db import prefix_index, trigram_index
+
 
 # Create your models here.
 class User(AbstractUser):
@@ -56,6 +58,21 @@ class User(AbstractUser):
                 name='unique_documento_per_tipo'
             )
         ]
+        indexes = [
+            # Índices de trigramas para la búsqueda (solo PostgreSQL)
+            trigram_index('username', 'user_username_trgm'),
+            trigram_index('first_name', 'user_first_name_trgm'),
+            trigram_index('last_name', 'user_last_name_trgm'),
+            trigram_index('documento', 'user_documento_trgm'),
+            # Segmentos de audiencia de notificaciones
+            models.Index(fields=['tipo_documento'], name='user_tipo_documento_idx'),
+            models.Index(fields=['date_joined'], name='user_date_joined_idx'),
+            models.Index(fields=['last_login'], name='user_last_login_idx'),
+            # Autocompletado por prefijo en el admin (solo PostgreSQL)
+            prefix_index('username', 'user_username_prefix'),
+            prefix_index('first_name', 'user_first_name_prefix'),
+            prefix_index('last_name', 'user_last_name_prefix'),
+        ]
 
     def __str__(self):
         if self.first_name and self.last_name:
@@ -1,3 +1,83 @@
+import json
+from unittest import mock
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .models import User
+from .views import UserViewSet
+
+
+def crear_usuarios(cantidad):
+    """Usuarios ``usuario-{n}`` en orden de id"""
+    return [
+        User.objects.create_user(
+            username=f'usuario-{n}', tipo_documento='V', documento=str(10000000 + n),
+        )
+        for n in range(cantidad)
+    ]
+
+
+class UserListTests(TestCase):
+    """Listado paginado de usuarios y exportación en streaming"""
+
+    url = '/api/v1/users/'
+
+    def setUp(self):
+        self.usuarios = crear_usuarios(5)
+        self.staff = User.objects.create_user(username='staff', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuarios[0])
+
+    def test_listado_paginado(self):
+        contenido = self.client.get(self.url).json()
+
+        self.assertEqual(set(contenido), {'count', 'next', 'previous', 'results'})
+        self.assertEqual(contenido['count'], 6)
+        self.assertEqual(
+            [u['username'] for u in contenido['results']],
+            [f'usuario-{n}' for n in range(5)] + ['staff'],
+        )
+        self.assertNotIn('password', contenido['results'][0])
+
+    def test_listado_con_filtros(self):
+        contenido = self.client.get(self.url, {'search': 'usuario-3'}).json()
+
+        self.assertEqual([u['username'] for u in contenido['results']], ['usuario-3'])
+
+    def test_cursor(self):
+        usernames = []
+        respuesta = self.client.get(self.url, {'pagination': 'cursor', 'page_size': 4})
+        while True:
+            contenido = respuesta.json()
+            self.assertNotIn('count', contenido)
+            self.assertLessEqual(len(contenido['results']), 4)
+            usernames += [u['username'] for u in contenido['results']]
+            if not contenido['next']:
+                break
+            respuesta = self.client.get(contenido['next'])
+
+        # Mismo orden que la vista (id), sin repetir ni saltar filas
+        self.assertEqual(usernames, [f'usuario-{n}' for n in range(5)] + ['staff'])
+
+    def test_stream_solo_staff(self):
+        respuesta = self.client.get(self.url, {'stream': '1'})
+        self.assertEqual(respuesta.status_code, 403)
+
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(self.url, {'stream': '1'}).status_code, 403)
+
+    def test_stream_exporta_todo_sin_paginar(self):
+        self.client.force_authenticate(self.staff)
+
+        with mock.patch.object(UserViewSet, 'stream_chunk_size', 2):
+            respuesta = self.client.get(self.url, {'stream': '1', 'is_active': 'true'})
+            self.assertEqual(respuesta.status_code, 200)
+            self.assertTrue(respuesta.streaming)
+            cuerpo = b''.join(respuesta.streaming_content)
 
-# Create your tests here.
+        self.assertIn('attachment', respuesta['Content-Disposition'])
+        usuarios = json.loads(cuerpo)
+        self.assertEqual(len(usuarios), 6)
+        self.assertEqual(usuarios[0]['documento_completo'], 'V-10000000')
+        self.assertNotIn('password', usuarios[0])
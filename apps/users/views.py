@@ -5,7 +5,15 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+from core.pagination import (
+    PARAMETROS_KEYSET,
+    VALORES_VERDADEROS,
+    KeysetPaginationMixin,
+)
+from core.search import get_search_backend
 
 from .models import User
 from .serializers import (
@@ -16,14 +24,21 @@ from .serializers import (
 )
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(KeysetPaginationMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestión completa de usuarios venezolanos
     
     Proporciona operaciones CRUD para usuarios con campos personalizados
     para empresas en Venezuela (dirección, tipo de documento, documento).
+    El listado está paginado (keyset opcional con ``?pagination=cursor``)
+    y admite exportación en streaming con ``?stream=1`` para staff.
     """
-    queryset = User.objects.all()
+    queryset = User.objects.order_by('id')
+    ordering = ['id']
+    # Campos de búsqueda del listado (con índices de trigramas en PostgreSQL)
+    user_search_fields = ['username', 'first_name', 'last_name', 'documento']
+    # Tamaño de lote para la exportación en streaming (?stream=1)
+    stream_chunk_size = 500
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -52,7 +67,8 @@ class UserViewSet(viewsets.ModelViewSet):
             openapi.Parameter(
                 'search',
                 openapi.IN_QUERY,
-                description="Buscar por username, nombre, apellido o documento",
+                description="Buscar por username, nombre, apellido o documento "
+                            "(ordenado por relevancia en PostgreSQL)",
                 type=openapi.TYPE_STRING
             ),
             openapi.Parameter(
@@ -67,8 +83,15 @@ class UserViewSet(viewsets.ModelViewSet):
                 openapi.IN_QUERY,
                 description="Filtrar usuarios activos/inactivos",
                 type=openapi.TYPE_BOOLEAN
+            ),
+            openapi.Parameter(
+                'stream',
+                openapi.IN_QUERY,
+                description="Exportar todos los usuarios como JSON en streaming "
+                            "sin paginar (solo staff)",
+                type=openapi.TYPE_BOOLEAN
             )
-        ],
+        ] + PARAMETROS_KEYSET,
         responses={
             200: UserSerializer(many=True),
             401: "No autenticado"
@@ -82,12 +105,11 @@ class UserViewSet(viewsets.ModelViewSet):
         # Filtros
         search = request.query_params.get('search')
         if search:
-            queryset = queryset.filter(
-                models.Q(username__icontains=search) |
-                models.Q(first_name__icontains=search) |
-                models.Q(last_name__icontains=search) |
-                models.Q(documento__icontains=search)
-            )
+            backend = get_search_backend(queryset.db)
+            queryset = backend.filter(queryset, search, self.user_search_fields)
+            # El cursor necesita un orden por columnas: sin relevancia
+            if not self.uses_keyset_pagination():
+                queryset = backend.rank(queryset, search, self.user_search_fields)
         
         tipo_documento = request.query_params.get('tipo_documento')
         if tipo_documento:
@@ -96,9 +118,52 @@ class UserViewSet(viewsets.ModelViewSet):
         is_active = request.query_params.get('is_active')
         if is_active is not None:
             queryset = queryset.filter(is_active=is_active.lower() == 'true')
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+
+        # Exportación completa en streaming (solo staff)
+        stream = request.query_params.get('stream', '')
+        if stream.lower() in VALORES_VERDADEROS:
+            if not request.user.is_staff:
+                return Response(
+                    {'detail': 'Solo el personal administrativo puede exportar usuarios'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            return self.stream_list(queryset)
+
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def stream_list(self, queryset):
+        """
+        Exportar usuarios como un arreglo JSON en streaming.
+
+        Recorre el queryset con ``iterator(chunk_size=...)`` y escribe un
+        bloque por cada lote, de modo que la memoria se mantiene constante
+        sin importar la cantidad de usuarios.
+        """
+        serializer_class = self.get_serializer_class()
+        context = self.get_serializer_context()
+        encoder = JSONEncoder(ensure_ascii=False)
+        chunk_size = self.stream_chunk_size
+
+        def generar():
+            yield '['
+            bloque = []
+            primero = True
+            for user in queryset.iterator(chunk_size=chunk_size):
+                data = serializer_class(user, context=context).data
+                bloque.append(('' if primero else ',') + encoder.encode(data))
+                primero = False
+                if len(bloque) >= chunk_size:
+                    yield ''.join(bloque)
+                    bloque = []
+            if bloque:
+                yield ''.join(bloque)
+            yield ']'
+
+        response = StreamingHttpResponse(generar(), content_type='application/json')
+        response['Content-Disposition'] = 'attachment; filename="usuarios.json"'
+        return response
 
     @swagger_auto_schema(
         operation_description="Registrar un nuevo usuario venezolano",
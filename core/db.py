@@ -0,0 +1,123 @@
+import logging
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import DatabaseError, migrations, models, transaction
+from django.db.models.functions import Cast, Upper
+
+logger = logging.getLogger(__name__)
+
+
+def extension_installed(connection, name="pg_trgm"):
+    """Indica si la extensión ``name`` está instalada (solo PostgreSQL)"""
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = %s", [name])
+        return cursor.fetchone() is not None
+
+
+def trigram_index(field, name):
+    """
+    Índice GIN de trigramas sobre ``UPPER(campo::text)``.
+
+    Coincide con la expresión que Django genera para ``icontains`` e
+    ``istartswith`` en PostgreSQL, por lo que esas búsquedas usan el
+    índice en lugar de un recorrido secuencial.
+    """
+    return GinIndex(
+        OpClass(Upper(Cast(field, output_field=models.TextField())), name="gin_trgm_ops"),
+        name=name,
+    )
+
+
+def prefix_index(field, name):
+    """
+    Índice B-tree sobre ``UPPER(campo::text)`` con ``text_pattern_ops``.
+
+    Sirve a ``istartswith`` (``UPPER(campo::text) LIKE 'ABC%'``) como un
+    rango del índice, más barato que el GIN de trigramas cuando solo se
+    busca por prefijo (autocompletado). Solo PostgreSQL.
+    """
+    return models.Index(
+        OpClass(Upper(Cast(field, output_field=models.TextField())), name="text_pattern_ops"),
+        name=name,
+    )
+
+
+class OptionalTrigramExtension(TrigramExtension):
+    """
+    Habilita ``pg_trgm`` solo si el servidor puede hacerlo.
+
+    ``CREATE EXTENSION`` requiere que la extensión esté disponible (paquete
+    ``postgresql-contrib``) y privilegio para crearla. Si falta alguna de
+    las dos la migración continúa sin ella: los índices de trigramas se
+    omiten (ver ``PostgresOnlyAddIndex``) y la búsqueda usa ``icontains``
+    sin índice ni relevancia (ver ``core.search``). Para activarla después
+    se ejecuta ``CREATE EXTENSION pg_trgm`` como superusuario y se vuelven
+    a aplicar las migraciones de índices.
+
+    Al revertir no se elimina: otras migraciones pueden depender de ella.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        connection = schema_editor.connection
+        if connection.vendor != "postgresql" or extension_installed(connection, self.name):
+            return
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = %s", [self.name])
+            disponible = cursor.fetchone() is not None
+        if not disponible:
+            logger.warning(
+                "La extensión %s no está disponible; se omiten los índices de trigramas",
+                self.name,
+            )
+            return
+        try:
+            with transaction.atomic(using=connection.alias):
+                super().database_forwards(app_label, schema_editor, from_state, to_state)
+        except DatabaseError:
+            logger.warning(
+                "No se pudo crear la extensión %s (¿sin privilegio CREATE?); "
+                "se omiten los índices de trigramas",
+                self.name,
+                exc_info=True,
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        pass
+
+
+def requires_trigram(index):
+    """Indica si el índice usa una clase de operadores de ``pg_trgm``"""
+    return any(
+        isinstance(expresion, OpClass) and expresion.extra["name"].endswith("_trgm_ops")
+        for expresion in index.expressions
+    )
+
+
+class PostgresOnlyAddIndex(migrations.AddIndex):
+    """
+    ``AddIndex`` que solo crea el índice en PostgreSQL.
+
+    Permite declarar índices específicos de PostgreSQL (GIN con
+    ``gin_trgm_ops``) en los modelos sin romper las migraciones en otras
+    bases de datos. Los índices de trigramas también se omiten si
+    ``pg_trgm`` no está instalada (ver ``OptionalTrigramExtension``). El
+    estado del modelo se actualiza igual en cualquier caso.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        connection = schema_editor.connection
+        if connection.vendor != "postgresql":
+            return
+        if requires_trigram(self.index) and not extension_installed(connection):
+            logger.warning("pg_trgm no está instalada: se omite el índice %s", self.index.name)
+            return
+        super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        # En PostgreSQL es DROP INDEX IF EXISTS: vale también si se omitió
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        super().database_backwards(app_label, schema_editor, from_state, to_state)
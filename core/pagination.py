@@ -0,0 +1,107 @@
+from drf_yasg import openapi
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+VALORES_VERDADEROS = ("1", "true", "yes", "si")
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Paginación por keyset (cursor) con cursores opacos.
+
+    A diferencia de ``PageNumberPagination`` no ejecuta ``COUNT(*)`` ni
+    ``OFFSET``: cada página se obtiene con ``WHERE campo > cursor`` sobre
+    el ordenamiento de la vista, por lo que el costo no crece con la
+    profundidad. El total solo se calcula si se pide con ``include_total``.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = "-id"
+    total_query_param = "include_total"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.total = None
+        valor = request.query_params.get(self.total_query_param, "")
+        if valor.lower() in VALORES_VERDADEROS:
+            self.total = queryset.count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        contenido = {"next": self.get_next_link(), "previous": self.get_previous_link()}
+        if self.total is not None:
+            contenido["count"] = self.total
+        contenido["results"] = data
+        return Response(contenido)
+
+    def get_paginated_response_schema(self, schema):
+        respuesta = super().get_paginated_response_schema(schema)
+        respuesta["properties"]["count"] = {
+            "type": "integer",
+            "example": 123,
+            "description": f"Solo presente si se envía {self.total_query_param}=1",
+        }
+        return respuesta
+
+
+class KeysetPaginationMixin:
+    """
+    Permite activar la paginación por keyset en una vista de forma opcional.
+
+    Se usa ``KeysetPagination`` cuando la petición envía
+    ``?pagination=cursor`` o un ``cursor``; en otro caso se mantiene la
+    paginación por defecto de la vista.
+    """
+
+    keyset_pagination_class = KeysetPagination
+    keyset_query_param = "pagination"
+    keyset_query_value = "cursor"
+
+    def uses_keyset_pagination(self):
+        """Indica si la petición actual pidió paginación por keyset"""
+        params = self.request.query_params
+        modo = params.get(self.keyset_query_param, "").lower()
+        return (
+            modo == self.keyset_query_value
+            or self.keyset_pagination_class.cursor_query_param in params
+        )
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            if self.request is not None and self.uses_keyset_pagination():
+                self._paginator = self.keyset_pagination_class()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
+
+
+# Parámetros de documentación (drf-yasg) para el modo keyset
+PARAMETROS_KEYSET = [
+    openapi.Parameter(
+        "pagination",
+        openapi.IN_QUERY,
+        description="Usar 'cursor' para paginación por keyset (sin COUNT ni OFFSET)",
+        type=openapi.TYPE_STRING,
+        enum=["cursor"],
+    ),
+    openapi.Parameter(
+        "cursor",
+        openapi.IN_QUERY,
+        description="Cursor opaco devuelto en 'next'/'previous' (modo keyset)",
+        type=openapi.TYPE_STRING,
+    ),
+    openapi.Parameter(
+        "page_size",
+        openapi.IN_QUERY,
+        description="Cantidad de elementos por página en modo keyset (máx. 100)",
+        type=openapi.TYPE_INTEGER,
+    ),
+    openapi.Parameter(
+        "include_total",
+        openapi.IN_QUERY,
+        description="Incluir el total de resultados (ejecuta un COUNT adicional)",
+        type=openapi.TYPE_BOOLEAN,
+    ),
+]
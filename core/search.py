@@ -0,0 +1,112 @@
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connections
+from django.db.models import Q
+from django.db.models.functions import Greatest
+from django.utils.module_loading import import_string
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from core.db import extension_installed
+
+# Alias de base de datos -> si tiene pg_trgm instalada (se consulta una vez)
+_trigramas_instalados = {}
+
+
+class SimpleSearchBackend:
+    """
+    Búsqueda por ``icontains`` sobre varios campos (comportamiento original).
+
+    Es el respaldo para bases de datos sin ``pg_trgm`` (otros motores o
+    PostgreSQL sin la extensión): filtra igual que el backend indexado
+    pero no calcula relevancia.
+    """
+
+    supports_ranking = False
+
+    def filter(self, queryset, term, fields):
+        """Filtra las filas donde algún campo contiene el término"""
+        condiciones = [Q(**{f"{campo}__icontains": term}) for campo in fields]
+        return queryset.filter(reduce(or_, condiciones))
+
+    def rank(self, queryset, term, fields):
+        """Sin relevancia disponible: se conserva el orden del queryset"""
+        return queryset
+
+
+class TrigramSearchBackend(SimpleSearchBackend):
+    """
+    Búsqueda indexada con trigramas de PostgreSQL (``pg_trgm``).
+
+    El filtro sigue siendo ``UPPER(campo::text) LIKE UPPER('%x%')``, que
+    PostgreSQL resuelve con los índices GIN ``gin_trgm_ops`` definidos en
+    los modelos en lugar de un recorrido secuencial. La relevancia es la
+    mayor similitud de palabra entre el término y los campos.
+    """
+
+    supports_ranking = True
+    rank_annotation = "search_rank"
+
+    def rank(self, queryset, term, fields):
+        """Anota ``search_rank`` y ordena por relevancia descendente"""
+        similitudes = [TrigramWordSimilarity(term, campo) for campo in fields]
+        rank = similitudes[0] if len(similitudes) == 1 else Greatest(*similitudes)
+        orden_actual = queryset.query.order_by or queryset.model._meta.ordering
+        return queryset.annotate(**{self.rank_annotation: rank}).order_by(
+            f"-{self.rank_annotation}", *orden_actual
+        )
+
+
+def get_search_backend(using="default"):
+    """
+    Retorna el backend de búsqueda para la base de datos indicada.
+
+    Se puede forzar uno con ``settings.SEARCH_BACKEND`` (ruta importable);
+    si no, se usa trigramas en PostgreSQL con ``pg_trgm`` instalada e
+    ``icontains`` en el resto.
+    """
+    ruta = getattr(settings, "SEARCH_BACKEND", None)
+    if ruta:
+        return import_string(ruta)()
+    if using not in _trigramas_instalados:
+        _trigramas_instalados[using] = extension_installed(connections[using])
+    if _trigramas_instalados[using]:
+        return TrigramSearchBackend()
+    return SimpleSearchBackend()
+
+
+class RankedSearchFilter(filters.SearchFilter):
+    """
+    ``SearchFilter`` que ordena los resultados por relevancia.
+
+    Filtra con la semántica de DRF (cada término debe aparecer en algún
+    campo) y, si el backend soporta relevancia y el cliente no pidió un
+    ``ordering`` explícito, ordena por ``search_rank``. Debe ir después
+    de ``OrderingFilter`` en ``filter_backends`` para conservar su orden
+    como criterio secundario.
+
+    Con paginación por keyset no se ordena por relevancia:
+    ``CursorPagination`` reordena por las columnas de la vista (un cursor
+    no puede posicionarse sobre una similitud calculada).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        queryset = super().filter_queryset(request, queryset, view)
+        terms = self.get_search_terms(request)
+        if not terms or api_settings.ORDERING_PARAM in request.query_params:
+            return queryset
+        uses_keyset = getattr(view, "uses_keyset_pagination", None)
+        if uses_keyset and uses_keyset():
+            return queryset
+
+        backend = get_search_backend(queryset.db)
+        if not backend.supports_ranking:
+            return queryset
+
+        fields = [
+            campo.lstrip("^=@$") for campo in self.get_search_fields(view, request)
+        ]
+        return backend.rank(queryset, " ".join(terms), fields)
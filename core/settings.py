@@ -77,6 +77,7 @@ INSTALLED_APPS = [
     "apps.users",
     "apps.projects",
     "apps.notifications",
+    "apps.products",
 ]
 
 MIDDLEWARE = [
@@ -197,6 +198,10 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Backend de búsqueda (ver core/search.py). None = automático: trigramas si
+# PostgreSQL tiene pg_trgm instalada, icontains en el resto
+SEARCH_BACKEND = None
+
 # drf-yasg configuration
 SWAGGER_SETTINGS = {
     "SECURITY_DEFINITIONS": {
@@ -341,6 +346,81 @@ CORS_ALLOW_METHODS = [
     "PUT",
 ]
 
+# ========================================
+# CACHE SETTINGS
+# ========================================
+
+if env.use_redis_cache:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": env.redis_url,
+            "KEY_PREFIX": "discorp",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "discorp",
+        }
+    }
+
+# Tiempo de vida (segundos) del snapshot de estadísticas de proyectos
+PROJECTS_STATS_CACHE_TIMEOUT = env.projects_stats_cache_timeout
+
+# ========================================
+# STRAPI SETTINGS
+# ========================================
+
+# Cliente HTTP compartido (por worker) para la API de productos
+STRAPI = {
+    "BASE_URL": env.strapi_url,
+    "POOL_SIZE": env.strapi_pool_size,
+    "CONNECT_TIMEOUT": env.strapi_connect_timeout,
+    "READ_TIMEOUT": env.strapi_read_timeout,
+    "MAX_RETRIES": env.strapi_max_retries,
+    "BACKOFF_FACTOR": env.strapi_backoff_factor,
+    # Cliente asíncrono (vista /api/v1/products/async/)
+    "ASYNC_MAX_CONNECTIONS": env.strapi_async_max_connections,
+    # Máximo de páginas por petición y páginas consultadas en paralelo
+    "ASYNC_MAX_PAGES": env.strapi_async_max_pages,
+    "ASYNC_CONCURRENCY": env.strapi_async_concurrency,
+}
+
+# Circuit breaker (por proceso) compartido por los clientes de Strapi
+STRAPI_CIRCUIT_BREAKER = {
+    # Ventana deslizante (segundos) y mínimo de llamadas para evaluarla
+    "WINDOW": env.strapi_breaker_window,
+    "MIN_CALLS": env.strapi_breaker_min_calls,
+    # Proporción de errores (5xx, timeout, conexión) que abre el circuito
+    "ERROR_RATE": env.strapi_breaker_error_rate,
+    # Una llamada es lenta desde SLOW_CALL segundos; SLOW_RATE abre el circuito
+    "SLOW_CALL": env.strapi_breaker_slow_call,
+    "SLOW_RATE": env.strapi_breaker_slow_rate,
+    # Tiempo abierto antes de permitir llamadas de prueba (half-open)
+    "OPEN_SECONDS": env.strapi_breaker_open_seconds,
+    "HALF_OPEN_CALLS": 1,
+}
+
+# Cache stale-while-revalidate de /api/v1/products/ (segundos)
+PRODUCTS_CACHE = {
+    # Tiempo en que una respuesta se sirve sin consultar Strapi
+    "FRESH_TTL": env.products_cache_fresh_ttl,
+    # Ventana adicional en que se sirve vencida mientras se revalida
+    "STALE_TTL": env.products_cache_stale_ttl,
+    # Retención de la última copia válida para fallos de Strapi
+    "KEEP_TTL": env.products_cache_keep_ttl,
+    # Bloqueo entre workers para revalidar una entrada una sola vez
+    "REFRESH_LOCK_TTL": 30,
+    # Espera máxima de peticiones concurrentes por la misma consulta
+    "FLIGHT_WAIT": env.strapi_connect_timeout + env.strapi_read_timeout,
+}
+
+# Origen del endpoint de productos: "strapi" (proxy con cache) o
+# "database" (copia local mantenida con `manage.py sync_products`)
+PRODUCTS_SOURCE = env.products_source
+
 # ========================================
 # CLOUDINARY SETTINGS
 # ========================================
@@ -457,3 +537,46 @@ FCM_DJANGO_SETTINGS = {
     # Eliminar dispositivos inactivos automáticamente
     "DELETE_INACTIVE_DEVICES": True,
 }
+
+# Envío masivo de notificaciones (apps.notifications.fanout)
+NOTIFICATIONS_FANOUT = {
+    # Tokens por llamada multicast (FCM admite como máximo 500)
+    "BATCH_SIZE": 500,
+    # Hilos que envían lotes en paralelo
+    "WORKERS": env.notifications_fanout_workers,
+    # Mensajes por segundo hacia FCM (token bucket); 0 = sin límite
+    "RATE_LIMIT": env.notifications_rate_limit,
+    # Ráfaga máxima del token bucket, en mensajes
+    "BURST": env.notifications_rate_burst,
+}
+
+# Cola de envíos (``manage.py process_notifications``)
+NOTIFICATIONS_QUEUE = {
+    # Segundos sin checkpoint tras los que un envío en proceso se
+    # considera abandonado (worker caído) y vuelve a la cola
+    "STALE_AFTER": env.notifications_stale_after,
+    # Cada cuántos segundos el worker renueva ``checkpoint_at`` mientras
+    # espera (limitador, lotes en vuelo), muy por debajo de STALE_AFTER
+    "HEARTBEAT": max(1, env.notifications_stale_after // 5),
+}
+
+# Retención del historial (``manage.py archive_notifications``): los envíos
+# terminados más antiguos que DAYS se archivan en segmentos .jsonl.gz y se
+# eliminan de la tabla
+NOTIFICATIONS_RETENTION = {
+    "DAYS": env.notifications_retention_days,
+    # False = eliminar sin archivar
+    "ARCHIVE": env.notifications_archive,
+    "ARCHIVE_DIR": BASE_DIR / env.notifications_archive_dir,
+    # Filas por lote (una transacción corta por lote)
+    "BATCH_SIZE": 1000,
+    # Filas por archivo de segmento
+    "SEGMENT_ROWS": 50000,
+}
+
+# Broadcast: "tokens" envía por lotes a cada dispositivo; "topic" envía un
+# solo mensaje al tópico al que se suscriben los dispositivos al registrarse
+NOTIFICATIONS_BROADCAST = {
+    "MODE": env.notifications_broadcast_mode,
+    "TOPIC": env.notifications_broadcast_topic,
+}
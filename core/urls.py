@@ -23,12 +23,12 @@ from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from drf_yasg.generators import OpenAPISchemaGenerator
 
-# FCM Django ViewSets
-from fcm_django.api.rest_framework import FCMDeviceAuthorizedViewSet
+# FCM Django ViewSet (con suscripción al tópico de broadcast)
+from apps.notifications.views import TopicFCMDeviceAuthorizedViewSet
 
 # Router para FCM Django
 fcm_router = DefaultRouter()
-fcm_router.register('devices', FCMDeviceAuthorizedViewSet, basename='fcm_device')
+fcm_router.register('devices', TopicFCMDeviceAuthorizedViewSet, basename='fcm_device')
 
 
 class BothHttpAndHttpsSchemaGenerator(OpenAPISchemaGenerator):